@@ -16,7 +16,6 @@ import jwt
 import waffle
 from django.db import transaction
 from django.contrib.contenttypes.models import ContentType
-from elasticsearch import exceptions as es_exceptions
 
 from api.base.settings.defaults import SLOAN_ID_COOKIE_NAME
 from api.caching.tasks import update_storage_usage_with_size
@@ -32,7 +31,6 @@ from framework.auth import cas
 from framework.auth import oauth_scopes
 from framework.auth.decorators import collect_auth, must_be_logged_in, must_be_signed
 from framework.exceptions import HTTPError
-from framework.sentry import log_exception
 from framework.routing import json_renderer, proxy_url
 from framework.transactions.handlers import no_auto_transaction
 from website import mails
@@ -342,16 +340,15 @@ def get_auth(auth, **kwargs):
                                     if value:
                                         sloan_flags[flag_name.replace('_display', '')] = strtobool(value)
 
-                                try:
-                                    metric_class.record_for_preprint(
-                                        preprint=node,
-                                        user=auth.user,
-                                        version=fileversion.identifier if fileversion else None,
-                                        path=path,
-                                        **sloan_flags
-                                    )
-                                except es_exceptions.ConnectionError:
-                                    log_exception()
+                                # Buffered, so that downloads do not wait on elastic
+                                metric_class.record_for_preprint(
+                                    preprint=node,
+                                    user=auth.user,
+                                    version=fileversion.identifier if fileversion else None,
+                                    path=path,
+                                    buffered=True,
+                                    **sloan_flags
+                                )
         if fileversion and provider_settings:
             region = fileversion.region
             credentials = region.waterbutler_credentials
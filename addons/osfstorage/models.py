@@ -44,41 +44,65 @@ class OsfStorageFileNode(BaseFileNode):
 
     @property
     def materialized_path(self):
+        # Stored on save, nodes saved before the path was persisted fall back to computing it
+        if self._materialized_path:
+            return self._materialized_path
+        return self.materialized_paths([self.pk]).get(self.pk, '/')
+
+    @materialized_path.setter
+    def materialized_path(self, val):
+        # raise Exception('Cannot set materialized path on OSFStorage as it is computed.')
+        logger.warn('Cannot set materialized path on OSFStorage because it\'s computed.')
+
+    @classmethod
+    def materialized_paths(cls, file_ids):
+        """Return the materialized paths of many file nodes as a dict of id -> path. Paths that
+        are stored are read with a single query, any others are computed with a single recursive query.
+        """
+        paths = {}
+        missing = {}
+        for pk, path, type_ in BaseFileNode.objects.filter(id__in=file_ids).values_list('id', '_materialized_path', 'type'):
+            if path:
+                paths[pk] = path
+            else:
+                missing[pk] = type_
+
+        if not missing:
+            return paths
+
         sql = """
-            WITH RECURSIVE materialized_path_cte(parent_id, GEN_PATH) AS (
+            WITH RECURSIVE materialized_path_cte(file_id, parent_id, GEN_PATH) AS (
               SELECT
+                T.id,
                 T.parent_id,
                 T.name :: TEXT AS GEN_PATH
               FROM %s AS T
-              WHERE T.id = %s
+              WHERE T.id = ANY(%s)
               UNION ALL
               SELECT
+                R.file_id,
                 T.parent_id,
                 (T.name || '/' || R.GEN_PATH) AS GEN_PATH
               FROM materialized_path_cte AS R
                 JOIN %s AS T ON T.id = R.parent_id
               WHERE R.parent_id IS NOT NULL
             )
-            SELECT gen_path
+            SELECT file_id, gen_path
             FROM materialized_path_cte AS N
-            WHERE parent_id IS NULL
-            LIMIT 1;
+            WHERE parent_id IS NULL;
         """
         with connection.cursor() as cursor:
-            cursor.execute(sql, [AsIs(self._meta.db_table), self.pk, AsIs(self._meta.db_table)])
-            row = cursor.fetchone()
-            if not row:
-                return '/'
-
-            path = row[0]
-            if not self.is_file:
-                path = path + '/'
-            return path
-
-    @materialized_path.setter
-    def materialized_path(self, val):
-        # raise Exception('Cannot set materialized path on OSFStorage as it is computed.')
-        logger.warn('Cannot set materialized path on OSFStorage because it\'s computed.')
+            cursor.execute(sql, [AsIs(BaseFileNode._meta.db_table), list(missing), AsIs(BaseFileNode._meta.db_table)])
+            for pk, path in cursor.fetchall():
+                paths[pk] = path if BaseFileNode._typedmodels_registry[missing[pk]].is_file else path + '/'
+        return paths
+
+    def _compute_materialized_path(self):
+        if self.parent_id is None:
+            path = self.name
+        else:
+            path = self.parent.materialized_path + self.name
+        return path if self.is_file else path + '/'
 
     @classmethod
     def get(cls, _id, target):
@@ -227,8 +251,13 @@ class OsfStorageFileNode(BaseFileNode):
 
     def save(self):
         self._path = ''
-        self._materialized_path = ''
-        return super(OsfStorageFileNode, self).save()
+        adding = self._state.adding
+        previous_path = self._materialized_path
+        self._materialized_path = self._compute_materialized_path()
+        ret = super(OsfStorageFileNode, self).save()
+        if not self.is_file and not adding and self._materialized_path != previous_path:
+            self.update_descendant_paths()
+        return ret
 
 
 class OsfStorageFile(OsfStorageFileNode, File):
@@ -446,6 +475,39 @@ class OsfStorageFolder(OsfStorageFileNode, Folder):
                         return True
         return False
 
+    def update_descendant_paths(self):
+        """Rewrite the stored materialized paths of every file and folder under this folder,
+        e.g. after it was moved or renamed, with a single UPDATE.
+        """
+        sql = """
+            WITH RECURSIVE descendants_cte(id, GEN_PATH) AS (
+              SELECT
+                T.id,
+                (%s || T.name || CASE WHEN T.type = %s THEN '/' ELSE '' END) AS GEN_PATH
+              FROM %s AS T
+              WHERE T.parent_id = %s AND T.type IN %s
+              UNION ALL
+              SELECT
+                T.id,
+                (R.GEN_PATH || T.name || CASE WHEN T.type = %s THEN '/' ELSE '' END) AS GEN_PATH
+              FROM descendants_cte AS R
+                JOIN %s AS T ON T.parent_id = R.id
+              WHERE T.type IN %s
+            )
+            UPDATE %s AS T
+            SET _materialized_path = D.GEN_PATH
+            FROM descendants_cte AS D
+            WHERE T.id = D.id;
+        """
+        folder_type = OsfStorageFolder._typedmodels_type
+        types = (OsfStorageFile._typedmodels_type, folder_type)
+        table = AsIs(self._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [
+                self._materialized_path, folder_type, table, self.pk, types,
+                folder_type, table, types, table,
+            ])
+
     def serialize(self, include_full=False, version=None):
         # Versions just for compatibility
         ret = super(OsfStorageFolder, self).serialize()
@@ -37,3 +37,8 @@ MAX_UPLOAD_SIZE = 5 * 1024  # 5 GB
 
 # Max file size permitted by frontend in megabytes for verified users
 HIGH_MAX_UPLOAD_SIZE = 5 * 1024  # 5 GB
+
+# Page sizes for folder listings requested by WaterButler. Listings are returned whole
+# unless a page size is requested; streamed listings are read from the database in chunks.
+MAX_CHILDREN_PAGE_SIZE = 1000
+CHILDREN_STREAM_CHUNK_SIZE = 1000
@@ -309,6 +309,33 @@ class TestOsfstorageFileNode(StorageTestCase):
         child = self.node_settings.get_root().append_folder('Cloud').append_file('Carp')
         assert_equals('/Cloud/Carp', child.materialized_path)
 
+    def test_materialized_path_is_stored(self):
+        child = self.node_settings.get_root().append_folder('Cloud').append_file('Carp')
+        assert_equals('/Cloud/Carp', BaseFileNode.objects.get(id=child.id)._materialized_path)
+        assert_equals('/', BaseFileNode.objects.get(id=self.node_settings.get_root().id)._materialized_path)
+
+    def test_materialized_path_updated_for_descendants(self):
+        folder = self.node_settings.get_root().append_folder('Cloud')
+        subfolder = folder.append_folder('Sub')
+        child = subfolder.append_file('Carp')
+        move_to = self.node_settings.get_root().append_folder('Sky')
+
+        folder.move_under(move_to, name='Cumulus')
+        assert_equals('/Sky/Cumulus/Sub/', OsfStorageFileNode.load(subfolder._id).materialized_path)
+        assert_equals('/Sky/Cumulus/Sub/Carp', OsfStorageFileNode.load(child._id).materialized_path)
+
+    def test_materialized_paths(self):
+        folder = self.node_settings.get_root().append_folder('Cloud')
+        child = folder.append_file('Carp')
+        # Paths that have not been stored yet are computed
+        BaseFileNode.objects.filter(id=folder.id).update(_materialized_path='')
+
+        assert_equals(
+            OsfStorageFileNode.materialized_paths([folder.id, child.id]),
+            {folder.id: '/Cloud/', child.id: '/Cloud/Carp'}
+        )
+        assert_equals('/Cloud/', OsfStorageFileNode.load(folder._id).materialized_path)
+
     def test_copy(self):
         to_copy = self.node_settings.get_root().append_file('Carp')
         copy_to = self.node_settings.get_root().append_folder('Cloud')
@@ -409,6 +436,65 @@ class TestOsfstorageFileNode(StorageTestCase):
         assert_equal(copied.parent, copy_to)
         assert_equal(to_copy.parent, self.node_settings.get_root())
 
+    def test_copy_nested_folder(self):
+        to_copy = self.node_settings.get_root().append_folder('Cloud')
+        child = to_copy.append_file('Carp')
+        subfolder = to_copy.append_folder('Deeper')
+        grandchild = subfolder.append_file('Trout')
+        trashed = subfolder.append_file('Gone')
+        trashed.delete()
+        for file_node in (child, grandchild):
+            file_node.add_version(factories.FileVersionFactory(region=self.node_settings.region))
+        record = child.records.first()
+        record.metadata = {'title': 'Carp'}
+        record.save()
+        new_project = ProjectFactory()
+        copy_to = new_project.get_addon('osfstorage').get_root()
+
+        copied = to_copy.copy_under(copy_to)
+
+        assert_equal(copied.target, new_project)
+        assert_equal(copied.copied_from, to_copy)
+        assert_equal(copied.materialized_path, '/Cloud/')
+        copied_children = {node.name: node for node in copied.children}
+        assert_equal(set(copied_children), {'Carp', 'Deeper'})
+        copied_grandchildren = list(copied_children['Deeper'].children)
+        assert_equal([node.name for node in copied_grandchildren], ['Trout'])
+        copied_grandchild = copied_grandchildren[0]
+        assert_equal(copied_grandchild.materialized_path, '/Cloud/Deeper/Trout')
+        assert_equal(copied_grandchild.target, new_project)
+        assert_equal(copied_grandchild.copied_from, grandchild)
+        assert_equal(list(copied_grandchild.versions.all()), list(grandchild.versions.all()))
+        assert_equal(
+            copied_grandchild.versions.first().get_basefilenode_version(copied_grandchild).version_name,
+            'Trout'
+        )
+        copied_child = copied_children['Carp']
+        assert_equal(copied_child.records.count(), child.records.count())
+        assert_equal(copied_child.records.get(schema=record.schema).metadata, {'title': 'Carp'})
+
+    def test_copy_between_regions(self):
+        canada = RegionFactory()
+        new_component = NodeFactory(parent=self.project)
+        component_node_settings = new_component.get_addon('osfstorage')
+        component_node_settings.region = canada
+        component_node_settings.save()
+
+        to_copy = self.node_settings.get_root().append_folder('Cloud')
+        child = to_copy.append_file('Carp')
+        for _ in range(2):
+            child.add_version(factories.FileVersionFactory(region=self.node_settings.region))
+
+        copied = to_copy.copy_under(component_node_settings.get_root())
+        copied_child = copied.children.get()
+
+        versions = copied_child.versions.order_by('-created')
+        assert_equal(versions.count(), 2)
+        assert_equal(versions.first().region, canada)
+        assert_not_in(versions.first(), child.versions.all())
+        assert_equal(versions.last().region, self.node_settings.region)
+        assert_equal(child.versions.first().region, self.node_settings.region)
+
     def test_move(self):
         to_move = self.node_settings.get_root().append_file('Carp')
         move_to = self.node_settings.get_root().append_folder('Cloud')
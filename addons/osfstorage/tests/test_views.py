@@ -26,7 +26,7 @@ from website.util import rubeus, api_url_for
 from framework.auth import cas
 
 from osf import features
-from osf.models import Tag, QuickFilesNode
+from osf.models import Tag, QuickFilesNode, PageCounter, PageCounterIncrement
 from osf.models import files as models
 from addons.osfstorage.apps import osf_storage_root
 from addons.osfstorage import utils
@@ -172,6 +172,72 @@ class TestGetMetadataHook(HookTestCase):
         assert_equal(res_date_modified, expected_date_modified)
         assert_equal(res_date_created, expected_date_created)
 
+    def test_children_paginated(self):
+        root = self.node_settings.get_root()
+        for name in ['c', 'a', 'b']:
+            root.append_file(name)
+        root.append_folder('d')
+
+        res = self.send_hook(
+            'osfstorage_get_children',
+            {'fid': root._id, 'user_id': self.user._id, 'page_size': 2},
+            {},
+            self.node
+        )
+        assert_equal([child['name'] for child in res.json['data']], ['a', 'b'])
+        assert_true(res.json['next'])
+
+        res = self.send_hook(
+            'osfstorage_get_children',
+            {'fid': root._id, 'user_id': self.user._id, 'page_size': 2, 'cursor': res.json['next']},
+            {},
+            self.node
+        )
+        assert_equal([child['name'] for child in res.json['data']], ['c', 'd'])
+        assert_equal(res.json['data'][1]['kind'], 'folder')
+        assert_is_none(res.json['next'])
+
+    def test_children_ids_only(self):
+        record = create_record_with_version('file', self.node_settings)
+        res = self.send_hook(
+            'osfstorage_get_children',
+            {'fid': record.parent._id, 'fields': 'ids'},
+            {},
+            self.node
+        )
+        assert_equal(res.json, [{
+            'id': record._id,
+            'path': '/' + record._id,
+            'name': 'file',
+            'kind': 'file',
+        }])
+
+    def test_children_stream(self):
+        root = self.node_settings.get_root()
+        for name in ['b', 'a']:
+            root.append_file(name)
+
+        with mock.patch.object(storage_settings, 'CHILDREN_STREAM_CHUNK_SIZE', 1):
+            res = self.send_hook(
+                'osfstorage_get_children',
+                {'fid': root._id, 'user_id': self.user._id, 'stream': 'true'},
+                {},
+                self.node
+            )
+        assert_equal(res.content_type, 'application/x-ndjson')
+        children = [json.loads(line) for line in res.body.decode('utf-8').splitlines()]
+        assert_equal([child['name'] for child in children], ['a', 'b'])
+
+    def test_children_invalid_cursor(self):
+        res = self.send_hook(
+            'osfstorage_get_children',
+            {'fid': self.node_settings.get_root()._id, 'cursor': 'not a cursor'},
+            {},
+            self.node,
+            expect_errors=True
+        )
+        assert_equal(res.status_code, 400)
+
     def test_osf_storage_root(self):
         auth = Auth(self.project.creator)
         result = osf_storage_root(self.node_settings.config, self.node_settings, auth)
@@ -850,6 +916,21 @@ class TestGetRevisions(StorageTestCase):
         assert_equal(res.json['revisions'][0]['index'], 15)
         assert_equal(res.json['revisions'][-1]['index'], 1)
 
+    def test_get_revisions_download_counts_include_pending_increments(self):
+        counter = PageCounter.objects.create(
+            _id='download:{}:{}:14'.format(self.project._id, self.record._id),
+            resource=self.project.guids.first(),
+            file=self.record,
+            version=14,
+            action='download',
+            total=2,
+        )
+        PageCounterIncrement.objects.create(page_counter=counter, date=datetime.date.today(), total=1, unique=1)
+
+        res = self.get_revisions()
+        assert_equal(res.json['revisions'][0]['downloads'], 3)
+        assert_equal(res.json['revisions'][1]['downloads'], 0)
+
     def test_get_revisions_path_not_found(self):
         res = self.get_revisions(fid='missing', expect_errors=True)
         assert_equal(res.status_code, 404)
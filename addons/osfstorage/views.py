@@ -1,6 +1,8 @@
 from __future__ import unicode_literals
 
 from rest_framework import status as http_status
+import base64
+import json
 import logging
 
 from django.core.exceptions import ValidationError
@@ -8,8 +10,9 @@ from django.db import IntegrityError
 from django.db import connection
 from django.db import transaction
 
-from flask import request
+from flask import request, Response, stream_with_context
 
+from api.base.utils import is_truthy
 from framework.auth import Auth
 from framework.sessions import get_session
 from framework.exceptions import HTTPError
@@ -121,13 +124,23 @@ def osfstorage_get_storage_quota_status(target, **kwargs):
 @must_be_signed
 @decorators.autoload_filenode(must_be='file')
 def osfstorage_get_revisions(file_node, payload, target, **kwargs):
+    from django.db.models import Sum
+    from django.db.models.functions import Coalesce
     from osf.models import PageCounter, FileVersion  # TODO Fix me onces django works
     is_anon = has_anonymous_link(target, Auth(private_key=request.args.get('view_only')))
 
     counter_prefix = 'download:{}:{}:'.format(file_node.target._id, file_node._id)
 
     version_count = file_node.versions.count()
-    counts = dict(PageCounter.objects.filter(resource=file_node.target.guids.first().id, file=file_node, action='download').values_list('_id', 'total'))
+    # Include increments that have not been flushed to the counters yet
+    counts = {
+        _id: total + pending_total
+        for _id, total, pending_total in PageCounter.objects.filter(
+            resource=file_node.target.guids.first().id, file=file_node, action='download'
+        ).annotate(
+            pending_total=Coalesce(Sum('increments__total'), 0)
+        ).values_list('_id', 'total', 'pending_total')
+    }
     qs = FileVersion.includable_objects.filter(basefilenode__id=file_node.id).include('creator__guids').order_by('-created')
 
     for i, version in enumerate(qs):
@@ -186,112 +199,224 @@ def osfstorage_get_metadata(file_node, **kwargs):
     return file_node.serialize(version=version, include_full=True)
 
 
+CHILDREN_SQL = """
+    SELECT F.id, F.name, {projection}
+    FROM osf_basefilenode AS F
+    {joins}
+    WHERE parent_id = %(parent_id)s
+    AND (NOT F.type IN ('osf.trashedfilenode', 'osf.trashedfile', 'osf.trashedfolder'))
+    {after}
+    ORDER BY F.name, F.id
+    {limit}
+"""
+
+# Just enough to address each child
+CHILDREN_IDS_PROJECTION = """
+    json_build_object(
+        'id', F._id
+        , 'path', '/' || F._id || CASE WHEN F.type = 'osf.osfstoragefile' THEN '' ELSE '/' END
+        , 'name', F.name
+        , 'kind', CASE WHEN F.type = 'osf.osfstoragefile' THEN 'file' ELSE 'folder' END
+    )
+"""
+
+# Read the documentation on FileVersion's fields before reading this code
+CHILDREN_PROJECTION = """
+    CASE
+        WHEN F.type = 'osf.osfstoragefile' THEN
+            json_build_object(
+                'id', F._id
+                , 'path', '/' || F._id
+                , 'name', F.name
+                , 'kind', 'file'
+                , 'size', LATEST_VERSION.size
+                , 'downloads',  COALESCE(DOWNLOAD_COUNT, 0)
+                , 'version', (SELECT COUNT(*) FROM osf_basefileversionsthrough WHERE osf_basefileversionsthrough.basefilenode_id = F.id)
+                , 'contentType', LATEST_VERSION.content_type
+                , 'modified', LATEST_VERSION.created
+                , 'created', EARLIEST_VERSION.created
+                , 'checkout', CHECKOUT_GUID
+                , 'md5', LATEST_VERSION.metadata ->> 'md5'
+                , 'sha256', LATEST_VERSION.metadata ->> 'sha256'
+                , 'latestVersionSeen', SEEN_LATEST_VERSION.case
+            )
+        ELSE
+            json_build_object(
+                'id', F._id
+                , 'path', '/' || F._id || '/'
+                , 'name', F.name
+                , 'kind', 'folder'
+            )
+    END
+"""
+
+CHILDREN_JOINS = """
+    LEFT JOIN LATERAL (
+        SELECT * FROM osf_fileversion
+        JOIN osf_basefileversionsthrough ON osf_fileversion.id = osf_basefileversionsthrough.fileversion_id
+        WHERE osf_basefileversionsthrough.basefilenode_id = F.id
+        ORDER BY created DESC
+        LIMIT 1
+    ) LATEST_VERSION ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT * FROM osf_fileversion
+        JOIN osf_basefileversionsthrough ON osf_fileversion.id = osf_basefileversionsthrough.fileversion_id
+        WHERE osf_basefileversionsthrough.basefilenode_id = F.id
+        ORDER BY created ASC
+        LIMIT 1
+    ) EARLIEST_VERSION ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT _id from osf_guid
+        WHERE object_id = F.checkout_id
+        AND content_type_id = %(user_content_type_id)s
+        LIMIT 1
+    ) CHECKOUT_GUID ON TRUE
+    LEFT JOIN LATERAL (
+        -- Include increments that have not been flushed to the counter yet
+        SELECT P.total + COALESCE((
+            SELECT SUM(I.total) FROM osf_pagecounterincrement AS I WHERE I.page_counter_id = P.id
+        ), 0) AS DOWNLOAD_COUNT FROM osf_pagecounter AS P
+        WHERE P.resource_id = %(target_guid_id)s
+        AND P.file_id = F.id
+        AND P.action = 'download'
+        AND P.version ISNULL
+        LIMIT 1
+    ) DOWNLOAD_COUNT ON TRUE
+    LEFT JOIN LATERAL (
+      SELECT EXISTS(
+        SELECT (1) FROM osf_fileversionusermetadata
+          INNER JOIN osf_fileversion ON osf_fileversionusermetadata.file_version_id = osf_fileversion.id
+          INNER JOIN osf_basefileversionsthrough ON osf_fileversion.id = osf_basefileversionsthrough.fileversion_id
+          WHERE osf_fileversionusermetadata.user_id = %(user_pk)s
+          AND osf_basefileversionsthrough.basefilenode_id = F.id
+        LIMIT 1
+      )
+    ) SEEN_FILE ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT CASE WHEN SEEN_FILE.exists
+        THEN
+            CASE WHEN EXISTS(
+              SELECT (1) FROM osf_fileversionusermetadata
+              WHERE osf_fileversionusermetadata.file_version_id = LATEST_VERSION.fileversion_id
+              AND osf_fileversionusermetadata.user_id = %(user_pk)s
+              LIMIT 1
+            )
+            THEN
+              json_build_object('user', %(user_id)s, 'seen', TRUE)
+            ELSE
+              json_build_object('user', %(user_id)s, 'seen', FALSE)
+            END
+        ELSE
+          NULL
+        END
+    ) SEEN_LATEST_VERSION ON TRUE
+"""
+
+
+def encode_children_cursor(name, pk):
+    return base64.urlsafe_b64encode(json.dumps([name, pk]).encode('utf-8')).decode('ascii')
+
+
+def decode_children_cursor(cursor):
+    try:
+        name, pk = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+    except (TypeError, ValueError):
+        raise make_error(http_status.HTTP_400_BAD_REQUEST, message_short='Invalid cursor')
+    if not isinstance(pk, int):
+        raise make_error(http_status.HTTP_400_BAD_REQUEST, message_short='Invalid cursor')
+    return name, pk
+
+
+def get_children_page(file_node, user_id=None, after=None, limit=None, ids_only=False):
+    """Return ``(pk, name, serialized child)`` rows for the children of ``file_node``, ordered
+    by name and pk. ``after`` is the ``(name, pk)`` of the last row of the previous page.
+    """
+    params = {'parent_id': file_node.id}
+    if ids_only:
+        projection, joins = CHILDREN_IDS_PROJECTION, ''
+    else:
+        from django.contrib.contenttypes.models import ContentType
+        projection, joins = CHILDREN_PROJECTION, CHILDREN_JOINS
+        params.update({
+            'user_id': user_id,
+            'user_pk': OSFUser.objects.filter(guids___id=user_id, guids___id__isnull=False).values_list('pk', flat=True).first(),
+            'user_content_type_id': ContentType.objects.get_for_model(OSFUser).id,
+            'target_guid_id': file_node.target.guids.first().id,
+        })
+    if after:
+        params['after_name'], params['after_pk'] = after
+    if limit:
+        params['limit'] = limit
+
+    with connection.cursor() as cursor:
+        cursor.execute(CHILDREN_SQL.format(
+            projection=projection,
+            joins=joins,
+            after='AND (F.name, F.id) > (%(after_name)s, %(after_pk)s)' if after else '',
+            limit='LIMIT %(limit)s' if limit else '',
+        ), params)
+        return cursor.fetchall()
+
+
+def iter_children(file_node, chunk_size, **kwargs):
+    after = kwargs.pop('after', None)
+    while True:
+        rows = get_children_page(file_node, after=after, limit=chunk_size, **kwargs)
+        for row in rows:
+            yield row
+        if len(rows) < chunk_size:
+            return
+        after = rows[-1][:2]
+
+
 @must_be_signed
 @decorators.autoload_filenode(must_be='folder')
 def osfstorage_get_children(file_node, **kwargs):
-    from django.contrib.contenttypes.models import ContentType
+    """List the children of a folder.
+
+    Query parameters:
+
+    * ``user_id``: guid of the user to report ``latestVersionSeen`` for
+    * ``fields=ids``: only include each child's id, path, name and kind
+    * ``page_size``: return at most this many children as ``{"data": [...], "next": cursor}``
+    * ``cursor``: the ``next`` cursor of the previous page
+    * ``stream=true``: stream every child (after ``cursor``, if given) as newline delimited JSON
+
+    Without ``page_size`` or ``stream`` the whole listing is returned as a list.
+    """
     user_id = request.args.get('user_id')
-    user_content_type_id = ContentType.objects.get_for_model(OSFUser).id
-    user_pk = OSFUser.objects.filter(guids___id=user_id, guids___id__isnull=False).values_list('pk', flat=True).first()
-    with connection.cursor() as cursor:
-        # Read the documentation on FileVersion's fields before reading this code
-        cursor.execute("""
-            SELECT json_agg(CASE
-                WHEN F.type = 'osf.osfstoragefile' THEN
-                    json_build_object(
-                        'id', F._id
-                        , 'path', '/' || F._id
-                        , 'name', F.name
-                        , 'kind', 'file'
-                        , 'size', LATEST_VERSION.size
-                        , 'downloads',  COALESCE(DOWNLOAD_COUNT, 0)
-                        , 'version', (SELECT COUNT(*) FROM osf_basefileversionsthrough WHERE osf_basefileversionsthrough.basefilenode_id = F.id)
-                        , 'contentType', LATEST_VERSION.content_type
-                        , 'modified', LATEST_VERSION.created
-                        , 'created', EARLIEST_VERSION.created
-                        , 'checkout', CHECKOUT_GUID
-                        , 'md5', LATEST_VERSION.metadata ->> 'md5'
-                        , 'sha256', LATEST_VERSION.metadata ->> 'sha256'
-                        , 'latestVersionSeen', SEEN_LATEST_VERSION.case
-                    )
-                ELSE
-                    json_build_object(
-                        'id', F._id
-                        , 'path', '/' || F._id || '/'
-                        , 'name', F.name
-                        , 'kind', 'folder'
-                    )
-                END
-            )
-            FROM osf_basefilenode AS F
-            LEFT JOIN LATERAL (
-                SELECT * FROM osf_fileversion
-                JOIN osf_basefileversionsthrough ON osf_fileversion.id = osf_basefileversionsthrough.fileversion_id
-                WHERE osf_basefileversionsthrough.basefilenode_id = F.id
-                ORDER BY created DESC
-                LIMIT 1
-            ) LATEST_VERSION ON TRUE
-            LEFT JOIN LATERAL (
-                SELECT * FROM osf_fileversion
-                JOIN osf_basefileversionsthrough ON osf_fileversion.id = osf_basefileversionsthrough.fileversion_id
-                WHERE osf_basefileversionsthrough.basefilenode_id = F.id
-                ORDER BY created ASC
-                LIMIT 1
-            ) EARLIEST_VERSION ON TRUE
-            LEFT JOIN LATERAL (
-                SELECT _id from osf_guid
-                WHERE object_id = F.checkout_id
-                AND content_type_id = %s
-                LIMIT 1
-            ) CHECKOUT_GUID ON TRUE
-            LEFT JOIN LATERAL (
-                SELECT P.total AS DOWNLOAD_COUNT FROM osf_pagecounter AS P
-                WHERE P.resource_id = %s
-                AND P.file_id = F.id
-                AND P.action = 'download'
-                AND P.version ISNULL
-                LIMIT 1
-            ) DOWNLOAD_COUNT ON TRUE
-            LEFT JOIN LATERAL (
-              SELECT EXISTS(
-                SELECT (1) FROM osf_fileversionusermetadata
-                  INNER JOIN osf_fileversion ON osf_fileversionusermetadata.file_version_id = osf_fileversion.id
-                  INNER JOIN osf_basefileversionsthrough ON osf_fileversion.id = osf_basefileversionsthrough.fileversion_id
-                  WHERE osf_fileversionusermetadata.user_id = %s
-                  AND osf_basefileversionsthrough.basefilenode_id = F.id
-                LIMIT 1
-              )
-            ) SEEN_FILE ON TRUE
-            LEFT JOIN LATERAL (
-                SELECT CASE WHEN SEEN_FILE.exists
-                THEN
-                    CASE WHEN EXISTS(
-                      SELECT (1) FROM osf_fileversionusermetadata
-                      WHERE osf_fileversionusermetadata.file_version_id = LATEST_VERSION.fileversion_id
-                      AND osf_fileversionusermetadata.user_id = %s
-                      LIMIT 1
-                    )
-                    THEN
-                      json_build_object('user', %s, 'seen', TRUE)
-                    ELSE
-                      json_build_object('user', %s, 'seen', FALSE)
-                    END
-                ELSE
-                  NULL
-                END
-            ) SEEN_LATEST_VERSION ON TRUE
-            WHERE parent_id = %s
-            AND (NOT F.type IN ('osf.trashedfilenode', 'osf.trashedfile', 'osf.trashedfolder'))
-        """, [
-            user_content_type_id,
-            file_node.target.guids.first().id,
-            user_pk,
-            user_pk,
-            user_id,
-            user_id,
-            file_node.id
-        ])
-        return cursor.fetchone()[0] or []
+    ids_only = request.args.get('fields') == 'ids'
+    cursor = request.args.get('cursor')
+    after = decode_children_cursor(cursor) if cursor else None
+
+    if is_truthy(request.args.get('stream')):
+        rows = iter_children(
+            file_node, osf_storage_settings.CHILDREN_STREAM_CHUNK_SIZE,
+            user_id=user_id, after=after, ids_only=ids_only
+        )
+        return Response(
+            stream_with_context(json.dumps(child) + '\n' for _, _, child in rows),
+            mimetype='application/x-ndjson'
+        )
+
+    page_size = request.args.get('page_size')
+    if page_size is None and after is None:
+        return [child for _, _, child in get_children_page(file_node, user_id=user_id, ids_only=ids_only)]
+
+    try:
+        page_size = int(page_size or osf_storage_settings.MAX_CHILDREN_PAGE_SIZE)
+    except ValueError:
+        raise make_error(http_status.HTTP_400_BAD_REQUEST, message_short='Invalid page_size')
+    if not 0 < page_size <= osf_storage_settings.MAX_CHILDREN_PAGE_SIZE:
+        raise make_error(http_status.HTTP_400_BAD_REQUEST, message_short='Invalid page_size')
+
+    # Fetch one extra row to know whether there is a next page
+    rows = get_children_page(file_node, user_id=user_id, after=after, limit=page_size + 1, ids_only=ids_only)
+    next_cursor = encode_children_cursor(*rows[page_size - 1][:2]) if len(rows) > page_size else None
+    return {
+        'data': [child for _, _, child in rows[:page_size]],
+        'next': next_cursor,
+    }
 
 
 @must_be_signed
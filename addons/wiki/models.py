@@ -123,13 +123,17 @@ class WikiVersion(ObjectIDMixin, BaseModel):
     wiki_page = models.ForeignKey('WikiPage', null=True, blank=True, on_delete=models.CASCADE, related_name='versions')
     content = models.TextField(default='', blank=True)
     identifier = models.IntegerField(default=1)
+    # The cleaned HTML and the text of the content, rendered for the node of the page when the
+    # version is saved. Versions saved before these were stored are rendered when first used,
+    # or by the backfill_wiki_rendered_text command.
+    rendered_html = models.TextField(null=True, blank=True)
+    rendered_text = models.TextField(null=True, blank=True)
 
     @property
     def is_current(self):
         return not self.wiki_page.deleted and self.id == self.wiki_page.versions.order_by('-created').first().id
 
-    def html(self, node):
-        """The cleaned HTML of the page"""
+    def _build_html(self, node):
         html_output = build_html_output(self.content, node=node)
         try:
             cleaner = Cleaner(
@@ -143,10 +147,32 @@ class WikiVersion(ObjectIDMixin, BaseModel):
             logger.warning('Returning unlinkified content.')
             return render_content(self.content, node=node)
 
+    def render(self, save=True):
+        """Render the HTML and the text of the page for its node, and store them unless save is False"""
+        self.rendered_html = self._build_html(self.wiki_page.node)
+        self.rendered_text = sanitize(self.rendered_html, tags=[], strip=True)
+        if save and self.pk:
+            WikiVersion.objects.filter(pk=self.pk).update(rendered_html=self.rendered_html, rendered_text=self.rendered_text)
+
+    def _is_rendered_for(self, node):
+        # Links to other pages point to the node the page is rendered for
+        return node.id == self.wiki_page.node_id
+
+    def html(self, node):
+        """The cleaned HTML of the page"""
+        if not self._is_rendered_for(node):
+            return self._build_html(node)
+        if self.rendered_html is None:
+            self.render()
+        return self.rendered_html
+
     def raw_text(self, node):
         """ The raw text of the page, suitable for using in a test search"""
-
-        return sanitize(self.html(node), tags=[], strip=True)
+        if not self._is_rendered_for(node):
+            return sanitize(self._build_html(node), tags=[], strip=True)
+        if self.rendered_text is None:
+            self.render()
+        return self.rendered_text
 
     @property
     def rendered_before_update(self):
@@ -174,6 +200,8 @@ class WikiVersion(ObjectIDMixin, BaseModel):
         return self.content
 
     def save(self, *args, **kwargs):
+        if kwargs.pop('render', True) and self.wiki_page.node:
+            self.render(save=False)
         rv = super(WikiVersion, self).save(*args, **kwargs)
         if self.wiki_page.node:
             self.wiki_page.node.update_search()
@@ -227,7 +255,10 @@ class WikiVersion(ObjectIDMixin, BaseModel):
         clone = self.clone()
         clone.wiki_page = wiki_page
         clone.user = user
-        clone.save()
+        # Rendered for the node of the new page when first used, so that cloning stays cheap
+        clone.rendered_html = None
+        clone.rendered_text = None
+        clone.save(render=False)
         return clone
 
     @property
@@ -378,7 +409,7 @@ class WikiPage(GuidMixin, BaseModel):
         for version in self.versions.all().order_by('created'):
             new_version = version.clone_version(new_wiki_page, user)
             if save:
-                new_version.save()
+                new_version.save(render=False)
         return
 
     @classmethod
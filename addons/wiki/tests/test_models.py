@@ -48,6 +48,64 @@ class TestWikiPageModel:
         page.save()
         assert ver1.is_current is False
 
+    def test_rendered_on_save(self):
+        node = NodeFactory()
+        page = WikiPage(page_name='foo', node=node)
+        page.save()
+        version = page.update(user=UserFactory(), content='**hello** [[bar]]')
+        version.refresh_from_db()
+        assert '<strong>hello</strong>' in version.rendered_html
+        assert '/{}/wiki/bar/'.format(node._id) in version.rendered_html
+        assert version.rendered_text == 'hello bar'
+        assert version.html(node) == version.rendered_html
+        assert version.raw_text(node) == version.rendered_text
+
+    def test_stored_rendering_is_used(self):
+        node = NodeFactory()
+        page = WikiPage(page_name='foo', node=node)
+        page.save()
+        version = page.update(user=UserFactory(), content='hello')
+        WikiVersion.objects.filter(id=version.id).update(rendered_html='<p>stored</p>', rendered_text='stored')
+        version.refresh_from_db()
+        assert version.html(node) == '<p>stored</p>'
+        assert version.raw_text(node) == 'stored'
+
+    def test_rendered_when_first_used(self):
+        node = NodeFactory()
+        page = WikiPage(page_name='foo', node=node)
+        page.save()
+        version = page.update(user=UserFactory(), content='hello')
+        WikiVersion.objects.filter(id=version.id).update(rendered_html=None, rendered_text=None)
+        version.refresh_from_db()
+        assert version.raw_text(node) == 'hello'
+        version.refresh_from_db()
+        assert version.rendered_html == '<p>hello</p>'
+        assert version.rendered_text == 'hello'
+
+    def test_rendered_for_other_node(self):
+        node = NodeFactory()
+        other = NodeFactory()
+        page = WikiPage(page_name='foo', node=node)
+        page.save()
+        version = page.update(user=UserFactory(), content='[[bar]]')
+        assert '/{}/wiki/bar/'.format(other._id) in version.html(other)
+        assert '/{}/wiki/bar/'.format(node._id) in version.html(node)
+
+    def test_clones_rendered_when_first_used(self):
+        node = NodeFactory()
+        copy = NodeFactory()
+        user = UserFactory()
+        page = WikiPage(page_name='foo', node=node)
+        page.save()
+        page.update(user=user, content='[[bar]]')
+        WikiPage.clone_wiki_pages(node, copy, user)
+        clone = WikiVersion.objects.get(wiki_page__node=copy)
+        assert clone.rendered_html is None
+        assert clone.rendered_text is None
+        assert '/{}/wiki/bar/'.format(copy._id) in clone.html(copy)
+        clone.refresh_from_db()
+        assert '/{}/wiki/bar/'.format(copy._id) in clone.rendered_html
+
 
 class TestWikiPage(OsfTestCase):
 
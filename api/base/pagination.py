@@ -1,3 +1,6 @@
+import base64
+import json
+
 from django.utils import six
 from collections import OrderedDict
 from django.urls import reverse
@@ -10,13 +13,23 @@ from rest_framework.response import Response
 from rest_framework.utils.urls import (
     replace_query_param, remove_query_param,
 )
+from api.base.exceptions import InvalidQueryStringError
 from api.base.serializers import is_anonymized
 from api.base.settings import MAX_PAGE_SIZE
 from api.base.utils import absolute_reverse
 
-from osf.models import AbstractNode, Comment, Preprint, Guid, DraftRegistration
+from osf.models import AbstractNode, BaseFileNode, CollectionSubmission, Comment, Preprint, Guid, DraftRegistration
+from osf.models.base import GuidMixin
 from website.search.elastic_search import DOC_TYPE_TO_MODEL
 
+# Relations the serializers of search results use, loaded along with the results
+SEARCH_RESULT_QUERYSETS = {
+    AbstractNode: lambda queryset: queryset.select_related('node_license').include('contributor__user__guids', 'root__guids', limit_includes=10),
+    BaseFileNode: lambda queryset: queryset.prefetch_related('versions', 'tags').include('guids'),
+    CollectionSubmission: lambda queryset: queryset.select_related('guid').include('collection__guids'),
+    Preprint: lambda queryset: queryset.select_related('provider', 'node'),
+}
+
 
 class JSONAPIPagination(pagination.PageNumberPagination):
     """
@@ -173,6 +186,107 @@ class MaxSizePagination(JSONAPIPagination):
     max_page_size = None
     page_size_query_param = None
 
+class SearchAfterPagination(JSONAPIPagination):
+    """
+    Paginates an elasticsearch search with `search_after` rather than by offset, so that deep
+    pages cost as much as the first one. The first page is requested with an empty
+    ``page[cursor]`` and each page links to the next with an opaque cursor.
+
+    The view pages its search with `paginate_search`; its queryset is then the page of results.
+    """
+
+    cursor_query_param = 'page[cursor]'
+
+    total = 0
+    per_page = None
+    next_cursor = None
+
+    @staticmethod
+    def encode_cursor(sort_values):
+        return base64.urlsafe_b64encode(json.dumps(sort_values).encode()).decode()
+
+    @classmethod
+    def decode_cursor(cls, cursor):
+        try:
+            sort_values = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        except ValueError:
+            sort_values = None
+        if not isinstance(sort_values, list):
+            raise InvalidQueryStringError('Invalid cursor.', parameter=cls.cursor_query_param)
+        return sort_values
+
+    def paginate_search(self, search, request):
+        """Return the hits of the page of ``search`` requested. The search must be sorted on
+        fields that tell its hits apart.
+        """
+        self.request = request
+        self.per_page = self.get_page_size(request)
+        search = search.extra(size=self.per_page)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            search = search.extra(search_after=self.decode_cursor(cursor))
+
+        response = search.execute()
+        hits = list(response)
+        self.total = response.hits.total
+        self.next_cursor = self.encode_cursor(list(hits[-1].meta.sort)) if len(hits) == self.per_page else None
+        return hits
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # The queryset already is the page, see paginate_search
+        self.request = request
+        return list(queryset)
+
+    def cursor_query(self, url, cursor):
+        url = remove_query_param(self.request.build_absolute_uri(url), '_')
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_self_real_link(self, url):
+        return remove_query_param(self.request.build_absolute_uri(url), '_')
+
+    def get_first_real_link(self, url):
+        return self.cursor_query(url, '')
+
+    def get_next_real_link(self, url):
+        if not self.next_cursor:
+            return None
+        return self.cursor_query(url, self.next_cursor)
+
+    def get_response_dict_deprecated(self, data, url):
+        return OrderedDict([
+            ('data', data),
+            (
+                'links', OrderedDict([
+                    ('first', self.get_first_real_link(url)),
+                    ('next', self.get_next_real_link(url)),
+                    (
+                        'meta', OrderedDict([
+                            ('total', self.total),
+                            ('per_page', self.per_page),
+                        ]),
+                    ),
+                ]),
+            ),
+        ])
+
+    def get_response_dict(self, data, url):
+        return OrderedDict([
+            ('data', data),
+            (
+                'meta', OrderedDict([
+                    ('total', self.total),
+                    ('per_page', self.per_page),
+                ]),
+            ),
+            (
+                'links', OrderedDict([
+                    ('self', self.get_self_real_link(url)),
+                    ('first', self.get_first_real_link(url)),
+                    ('next', self.get_next_real_link(url)),
+                ]),
+            ),
+        ])
+
 class NoMaxPageSizePagination(JSONAPIPagination):
     max_page_size = None
 
@@ -243,15 +357,49 @@ class DraftRegistrationContributorPagination(NodeContributorPagination):
         return DraftRegistration.load(resource_id)
 
 
+def load_search_results(results, model=None):
+    """Load the objects of search ``results`` with one query per model rather than one per
+    result, in the order of the results. Objects that no longer exist are loaded as None.
+
+    :param list results: Elastic hits, with an `_id` and a `_type`
+    :param model: Model of every result, if they all are of one. Otherwise the model of each
+        result is looked up from its `_type`
+    """
+    models = [model or DOC_TYPE_TO_MODEL[result.get('_type')] for result in results]
+    ids_by_model = OrderedDict()
+    for result_model, result in zip(models, results):
+        ids_by_model.setdefault(result_model, []).append(result.get('_id'))
+
+    loaded = {}
+    for result_model, ids in ids_by_model.items():
+        for _id, obj in _load_by_ids(result_model, ids):
+            loaded[(result_model, _id)] = obj
+    return [loaded.get((result_model, result.get('_id'))) for result_model, result in zip(models, results)]
+
+def _load_by_ids(model, ids):
+    """Yield (_id, object) for the objects of ``model`` with the ids of ``ids``, as `model.load` would find them"""
+    queryset = SEARCH_RESULT_QUERYSETS.get(model, lambda queryset: queryset)(model.objects.all())
+    if issubclass(model, GuidMixin):
+        for obj in queryset.filter(guids___id__in=ids):
+            # An object may be indexed under any of its guids
+            for guid in obj.guids.all():
+                yield guid._id, obj
+    elif issubclass(model, CollectionSubmission):
+        # Indexed as <guid of the collected object>-<guid of the collection>
+        cgm_ids, collection_ids = zip(*(_id.split('-') for _id in ids))
+        for obj in queryset.filter(guid___id__in=cgm_ids, collection__guids___id__in=collection_ids):
+            for guid in obj.collection.guids.all():
+                yield '{}-{}'.format(obj.guid._id, guid._id), obj
+    else:
+        for obj in queryset.filter(_id__in=ids):
+            yield obj._id, obj
+
+
 class SearchPaginator(DjangoPaginator):
 
     def __init__(self, object_list, per_page):
         super(SearchPaginator, self).__init__(object_list, per_page)
 
-    def search_type_to_model(self, obj_id, obj_type):
-        model = DOC_TYPE_TO_MODEL[obj_type]
-        return model.load(obj_id)
-
     def _get_count(self):
         self._count = self.object_list['aggs']['total']
         return self._count
@@ -259,11 +407,7 @@ class SearchPaginator(DjangoPaginator):
 
     def page(self, number):
         number = self.validate_number(number)
-        results = self.object_list['results']
-        items = [
-            self.search_type_to_model(result.get('_id'), result.get('_type'))
-            for result in results
-        ]
+        items = load_search_results(self.object_list['results'])
         return self._get_page(items, number, self)
 
 
@@ -275,11 +419,7 @@ class SearchModelPaginator(SearchPaginator):
 
     def page(self, number):
         number = self.validate_number(number)
-        results = self.object_list['results']
-        items = [
-            self.model.load(result.get('_id'))
-            for result in results
-        ]
+        items = load_search_results(self.object_list['results'], model=self.model)
         return self._get_page(items, number, self)
 
 
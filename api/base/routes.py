@@ -0,0 +1,146 @@
+import re
+
+from django.urls import NoReverseMatch, ResolverMatch, get_resolver, get_script_prefix, resolve, reverse
+from django.urls.resolvers import get_ns_resolver
+
+# Keyword arguments taking these values, which never need quoting, are substituted into route
+# templates. Anything else (and any route whose patterns do not accept a placeholder) goes through
+# Django's reverse
+ROUTE_KWARG_VALUE = re.compile(r'^\w+$', re.ASCII)
+
+# Keyword arguments whose values are part of the route itself rather than substituted into it
+LITERAL_KWARGS = ('version', )
+
+# {(view name, kwarg names, literal kwargs): Route or None}
+_routes = {}
+
+
+def get_patterns(view_name, kwarg_names):
+    """The regexes Django's reverse tries the paths of ``view_name`` with ``kwarg_names``
+    against, in order and without the script prefix, see `django.urls.reverse`
+    """
+    resolver = get_resolver()
+    namespaces = view_name.split(':')
+    view = namespaces.pop()
+    ns_pattern = ''
+    for namespace in namespaces:
+        app_list = resolver.app_dict.get(namespace)
+        if app_list and namespace not in app_list:
+            namespace = app_list[0]
+        try:
+            extra, resolver = resolver.namespace_dict[namespace]
+        except KeyError:
+            raise NoReverseMatch('{} is not a registered namespace'.format(namespace))
+        ns_pattern += extra
+    if ns_pattern:
+        resolver = get_ns_resolver(ns_pattern, resolver)
+    return [
+        re.compile('^' + pattern)
+        for possibility, pattern, defaults in resolver.reverse_dict.getlist(view)
+        for _, params in possibility
+        if set(kwarg_names) | set(defaults) == set(params) | set(defaults)
+    ]
+
+
+class Route(object):
+    """URL template and resolver information for a named view, built by reversing and
+    resolving the view once with placeholder kwargs. Reversing a route afterwards is
+    plain string substitution, checked against the view's own URL pattern, with no
+    traversal of the URL resolvers.
+    """
+
+    def __init__(self, view_name, kwarg_names, literals):
+        self.placeholders = {
+            name: 'routekwarg{}x'.format(i) for i, name in enumerate(kwarg_names)
+        }
+        path = reverse(view_name, kwargs=dict(self.placeholders, **literals))
+        match = resolve(path)
+
+        self.template = path[len(get_script_prefix()):]
+        self.literals = literals
+        # Django reverses to the first pattern accepting the kwargs, substituted values
+        # must select the same pattern as the placeholders
+        self.patterns = get_patterns(view_name, list(kwarg_names) + list(literals))
+        self.pattern = next((pattern for pattern in self.patterns if pattern.search(self.template)), None)
+        if self.pattern is None:
+            raise NoReverseMatch('No pattern of {} accepts its placeholders'.format(view_name))
+        self.func = match.func
+        self.view_class = getattr(match.func, 'view_class', None)
+        self.url_name = match.url_name
+        self.app_names = match.app_names
+        self.namespaces = match.namespaces
+        self.namespace = match.namespace
+
+    def substitute(self, kwargs):
+        """The path reversing the view with ``kwargs`` gives, without the script prefix, and
+        the kwargs resolving it would give. None if ``kwargs`` cannot be substituted into the
+        template, or would not be accepted by the view's pattern.
+        """
+        resolved_kwargs = dict(self.literals)
+        path = self.template
+        for name, placeholder in self.placeholders.items():
+            value = kwargs[name]
+            if not isinstance(value, str):
+                value = str(value)
+            if not ROUTE_KWARG_VALUE.match(value):
+                return None
+            resolved_kwargs[name] = value
+            path = path.replace(placeholder, value)
+        pattern = next((pattern for pattern in self.patterns if pattern.search(path)), None)
+        if pattern is not self.pattern:
+            return None
+        return path, resolved_kwargs
+
+    def reverse(self, kwargs):
+        substituted = self.substitute(kwargs)
+        if substituted is None:
+            return None
+        return get_script_prefix() + substituted[0]
+
+    def resolve(self, kwargs):
+        substituted = self.substitute(kwargs)
+        if substituted is None:
+            return None
+        resolved_kwargs = substituted[1]
+        return ResolverMatch(
+            self.func, (), resolved_kwargs, url_name=self.url_name,
+            app_names=self.app_names, namespaces=self.namespaces,
+        )
+
+
+def get_route(view_name, kwargs=None):
+    """Return the cached Route for ``view_name`` called with ``kwargs``, or None if the
+    view cannot be described by a template.
+    """
+    kwargs = kwargs or {}
+    literals = tuple((name, kwargs[name]) for name in LITERAL_KWARGS if name in kwargs)
+    kwarg_names = tuple(sorted(name for name in kwargs if name not in LITERAL_KWARGS))
+    key = (view_name, kwarg_names, literals)
+    try:
+        return _routes[key]
+    except KeyError:
+        pass
+    try:
+        route = Route(view_name, kwarg_names, dict(literals))
+    except NoReverseMatch:
+        route = None
+    _routes[key] = route
+    return route
+
+
+def reverse_route(view_name, kwargs=None):
+    """Drop-in for django's ``reverse`` using the route template when there is one"""
+    route = get_route(view_name, kwargs)
+    path = route.reverse(kwargs or {}) if route else None
+    if path is None:
+        return reverse(view_name, kwargs=kwargs)
+    return path
+
+
+def resolve_route(view_name, kwargs=None):
+    """Equivalent to ``resolve(reverse(view_name, kwargs=kwargs))``"""
+    route = get_route(view_name, kwargs)
+    match = route.resolve(kwargs or {}) if route else None
+    if match is None:
+        return resolve(reverse(view_name, kwargs=kwargs))
+    return match
@@ -4,7 +4,7 @@ from future.moves.urllib.parse import urlparse
 
 import furl
 import waffle
-from django.core.urlresolvers import resolve, reverse, NoReverseMatch
+from django.core.urlresolvers import resolve, NoReverseMatch
 from django.core.exceptions import ImproperlyConfigured
 from distutils.version import StrictVersion
 
@@ -15,6 +15,7 @@ from rest_framework.fields import get_attribute as get_nested_attributes
 from rest_framework.mixins import RetrieveModelMixin
 
 from api.base import utils
+from api.base.routes import resolve_route
 from osf.utils import permissions as osf_permissions
 from osf.utils import sanitize
 from osf.utils import functional
@@ -628,12 +629,7 @@ class RelationshipField(ser.HyperlinkedIdentityField):
         view = self.view_name
         if callable(self.view_name):
             view = view(getattr(resource, field_name))
-        return resolve(
-            reverse(
-                view,
-                kwargs=kwargs,
-            ),
-        )
+        return resolve_route(view, kwargs=kwargs)
 
     def process_related_counts_parameters(self, params, value):
         """
@@ -740,7 +736,11 @@ class RelationshipField(ser.HyperlinkedIdentityField):
 
     # Overrides HyperlinkedIdentityField
     def get_url(self, obj, view_name, request, format):
+        """The self and related links of the relationship to ``obj``, and the view name and kwargs
+        the related link is reversed with, so that it never has to be resolved again
+        """
         urls = {}
+        related_route = None
         for view_name, view in self.views.items():
             if view is None:
                 urls[view_name] = {}
@@ -754,6 +754,8 @@ class RelationshipField(ser.HyperlinkedIdentityField):
                     if request.parser_context['kwargs'].get('version', False):
                         kwargs.update({'version': request.parser_context['kwargs']['version']})
                     url = self.reverse(view, kwargs=kwargs, request=request, format=format)
+                    if view_name == 'related':
+                        related_route = (view, kwargs)
                     if self.filter:
                         formatted_filters = self.format_filter(obj)
                         if formatted_filters:
@@ -774,7 +776,7 @@ class RelationshipField(ser.HyperlinkedIdentityField):
 
         if not urls['self'] and not urls['related']:
             urls = None
-        return urls
+        return urls, related_route
 
     def to_esi_representation(self, value, envelope='data'):
         relationships = self.to_representation(value)
@@ -841,7 +843,7 @@ class RelationshipField(ser.HyperlinkedIdentityField):
 
         # Return the hyperlink, or error if incorrectly configured.
         try:
-            url = self.get_url(value, self.view_name, request, format)
+            url, related_route = self.get_url(value, self.view_name, request, format)
         except NoReverseMatch:
             msg = (
                 'Could not resolve URL for hyperlinked relationship using '
@@ -867,13 +869,15 @@ class RelationshipField(ser.HyperlinkedIdentityField):
                 return {'data': None}
 
         related_url = url['related']
-        related_path = urlparse(related_url).path if related_url else None
         related_meta = self.get_meta_information(self.related_meta, value)
         self_url = url['self']
         self_meta = self.get_meta_information(self.self_meta, value)
         relationship = format_relationship_links(related_url, self_url, related_meta, self_meta)
         if related_url:
-            resolved_url = resolve(related_path)
+            if related_route:
+                resolved_url = resolve_route(*related_route)
+            else:
+                resolved_url = resolve(urlparse(related_url).path)
             related_class = resolved_url.func.view_class
             if issubclass(related_class, RetrieveModelMixin):
                 try:
@@ -981,14 +985,12 @@ class TargetField(ser.Field):
             return None, None, None
         embed_value = resource.target._id
 
-        return resolve(
-            reverse(
-                view_info['view'],
-                kwargs={
-                    view_info['lookup_kwarg']: embed_value,
-                    'version': request.parser_context['kwargs']['version'],
-                },
-            ),
+        return resolve_route(
+            view_info['view'],
+            kwargs={
+                view_info['lookup_kwarg']: embed_value,
+                'version': request.parser_context['kwargs']['version'],
+            },
         )
 
     def to_esi_representation(self, value, envelope='data'):
@@ -1207,6 +1209,12 @@ class JSONAPIListSerializer(ser.ListSerializer):
                 self.child.to_esi_representation(item, envelope=None) for item in data
             ]
         else:
+            # Compute anything the child needs for the whole page at once rather than per item
+            data = list(data)
+            self.context.update(self.child.get_page_context(data))
+            for embed in self.context.get('embed', {}).values():
+                if hasattr(embed, 'prefetch'):
+                    embed.prefetch(data)
             ret = [
                 self.child.to_representation(item, envelope=envelope) for item in data
             ]
@@ -1516,6 +1524,12 @@ class JSONAPISerializer(BaseAPISerializer):
     def get_meta(self, obj):
         return None
 
+    def get_page_context(self, objs):
+        """Extra serializer context computed once for a whole page of ``objs``
+        when serialized by a list serializer.
+        """
+        return {}
+
     def get_absolute_html_url(self, obj):
         return utils.extend_querystring_if_key_exists(obj.absolute_url, self.context['request'], 'view_only')
 
@@ -183,7 +183,7 @@ REST_FRAMEWORK = {
         'api.base.authentication.drf.OSFCASAuthentication',
     ),
     'DEFAULT_THROTTLE_CLASSES': (
-        'rest_framework.throttling.UserRateThrottle',
+        'api.base.throttling.UserRateThrottle',
         'api.base.throttling.NonCookieAuthThrottle',
         'api.base.throttling.BurstRateThrottle',
     ),
@@ -291,6 +291,14 @@ ADDONS_OAUTH = ADDONS_FOLDER_CONFIGURABLE + ['dataverse', 'github', 'bitbucket',
 
 BYPASS_THROTTLE_TOKEN = 'test-token'
 
+# Counts the requests of API throttles for every API process, see api.base.throttling.
+# The database backend keeps a second database connection open in each API thread that checks a
+# throttle, outside of the request's transaction, so the database must allow a connection for
+# each API thread besides the connections used by requests.
+THROTTLE_BACKEND = 'api.base.throttling.DatabaseThrottleBackend'
+# Seconds the throttle backend's connection is reused for, independently of CONN_MAX_AGE
+THROTTLE_CONN_MAX_AGE = 600
+
 OSF_SHELL_USER_IMPORTS = None
 
 # Settings for use in the admin
@@ -316,10 +324,17 @@ ELASTICSEARCH_DSL = {
 }
 # Store yearly indices for time-series metrics
 ELASTICSEARCH_METRICS_DATE_FORMAT = '%Y'
+# Preprint views and downloads are buffered in each process and sent to elastic in bulk once this
+# many documents are buffered, or once the oldest buffered event is this many seconds old
+METRICS_BUFFER_SIZE = 500
+METRICS_BUFFER_MAX_AGE = 60
 
 WAFFLE_CACHE_NAME = 'waffle_cache'
 STORAGE_USAGE_CACHE_NAME = 'storage_usage'
 STORAGE_USAGE_MAX_ENTRIES = 10000000
+PREPRINT_METRICS_CACHE_NAME = 'preprint_metrics'
+# Seconds preprint view and download counts are cached for
+PREPRINT_METRICS_CACHE_TIMEOUT = 60
 
 
 CACHES = {
@@ -336,6 +351,9 @@ CACHES = {
     WAFFLE_CACHE_NAME: {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     },
+    PREPRINT_METRICS_CACHE_NAME: {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
 }
 
 SLOAN_ID_COOKIE_NAME = 'sloan_id'
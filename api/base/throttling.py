@@ -1,13 +1,147 @@
-from rest_framework import permissions
-from rest_framework.throttling import UserRateThrottle, AnonRateThrottle, SimpleRateThrottle
 import logging
+import threading
+import zlib
+
+from django.conf import settings as django_settings
+from django.core.cache import cache as default_cache
+from django.core import signals
+from django.db import DatabaseError, connections, router
+from django.utils.module_loading import import_string
+from rest_framework import permissions, throttling
 
 from api.base import settings
+from osf.metrics import ThrottleEvent
+from osf.models import ThrottleCounter
 
 logger = logging.getLogger(__name__)
 
+# Count a request against a key, starting a new window when the key's current one has ended
+THROTTLE_HIT_SQL = """
+    INSERT INTO osf_throttlecounter (key, window_end, count)
+    VALUES (%s, %s, 1)
+    ON CONFLICT (key) DO UPDATE SET
+      count = CASE
+        WHEN osf_throttlecounter.window_end = EXCLUDED.window_end THEN osf_throttlecounter.count + 1
+        ELSE 1
+      END,
+      window_end = EXCLUDED.window_end
+    RETURNING count;
+"""
+
+
+class DatabaseThrottleBackend(object):
+    """Counts requests in the unlogged `ThrottleCounter` table, shared by every API process,
+    with a single upsert per check. Counters are updated through a connection of their own in
+    autocommit mode, so that they are neither locked until the transaction of the request ends
+    nor rolled back with it.
+
+    Each thread has one such connection besides its django connection. It persists across
+    requests regardless of CONN_MAX_AGE, and is only closed at the start or end of a request once
+    it is THROTTLE_CONN_MAX_AGE seconds old or errored, see `django.db.close_old_connections`.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        signals.request_started.connect(self.close_old_connection)
+        signals.request_finished.connect(self.close_old_connection)
+
+    def close_old_connection(self, **kwargs):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close_if_unusable_or_obsolete()
+
+    def _get_connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            alias = router.db_for_write(ThrottleCounter)
+            settings_dict = dict(connections[alias].settings_dict, CONN_MAX_AGE=django_settings.THROTTLE_CONN_MAX_AGE)
+            connection = connections[alias].__class__(settings_dict, alias)
+            self._local.connection = connection
+        return connection
+
+    def hit(self, key, now, window_end):
+        """Count a request against ``key`` in the window ending at epoch second ``window_end``
+        and return the number of requests counted in that window.
+        """
+        connection = self._get_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(THROTTLE_HIT_SQL, [key, window_end])
+                return cursor.fetchone()[0]
+        except DatabaseError:
+            # Reconnect on the next check, e.g. after a database restart
+            connection.close()
+            self._local.connection = None
+            raise
+
+
+class CacheThrottleBackend(object):
+    """Counts requests in the django ``default`` cache. Counters are only shared by the processes
+    sharing that cache, a local memory cache by default, so this backend is meant for tests and
+    local development.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache or default_cache
+
+    def hit(self, key, now, window_end):
+        key = '{}:{}'.format(key, window_end)
+        timeout = max(int(window_end - now), 1)
+        if self.cache.add(key, 1, timeout):
+            return 1
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # The counter expired since it was added
+            self.cache.add(key, 1, timeout)
+            return 1
+
+
+_backends = {}
+
+
+def get_throttle_backend():
+    """The throttle backend named by the THROTTLE_BACKEND setting, one per process"""
+    path = django_settings.THROTTLE_BACKEND
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
+
+
+class SharedRateThrottle(throttling.SimpleRateThrottle):
+    """Counts requests in fixed windows of ``duration`` seconds with the throttle backend shared
+    by every API process, rather than keeping the times of recent requests in the cache of this
+    process. Windows are offset by a hash of the key, so that keys do not all reset at once.
+    Each check is recorded as a `ThrottleEvent`.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
 
-class BaseThrottle(SimpleRateThrottle):
+        self.now = self.timer()
+        offset = zlib.crc32(self.key.encode('utf-8')) % self.duration
+        self.window_end = (int(self.now - offset) // self.duration + 1) * self.duration + offset
+        try:
+            count = get_throttle_backend().hit(self.key, self.now, self.window_end)
+        except Exception:
+            # Requests are let through rather than failed while counters are unavailable
+            logger.exception('Could not count request against throttle key {}'.format(self.key))
+            return True
+
+        throttled = count > self.num_requests
+        ThrottleEvent.record_for_throttle(type(self), throttled)
+        return not throttled
+
+    def wait(self):
+        return max(self.window_end - self.now, 0)
+
+
+class BaseThrottle(SharedRateThrottle):
 
     def get_ident(self, request):
         if request.META.get('HTTP_X_THROTTLE_TOKEN'):
@@ -22,26 +156,15 @@ class BaseThrottle(SimpleRateThrottle):
             logger.info('Bypass header (X-Throttle-Token) passed')
             return True
 
-        if self.rate is None:
-            return True
+        return super(BaseThrottle, self).allow_request(request, view)
 
-        self.key = self.get_cache_key(request, view)
-        if self.key is None:
-            return True
-
-        self.history = self.cache.get(self.key, [])
-        self.now = self.timer()
 
-        # Drop any requests from the history which have now passed the throttle duration
-        while self.history and self.history[-1] <= self.now - self.duration:
-            self.history.pop()
+class UserRateThrottle(SharedRateThrottle, throttling.UserRateThrottle):
 
-        if len(self.history) >= self.num_requests:
-            return self.throttle_failure()
-        return self.throttle_success()
+    scope = 'user'
 
 
-class NonCookieAuthThrottle(BaseThrottle, AnonRateThrottle):
+class NonCookieAuthThrottle(BaseThrottle, throttling.AnonRateThrottle):
 
     scope = 'non-cookie-auth'
 
@@ -55,7 +178,7 @@ class NonCookieAuthThrottle(BaseThrottle, AnonRateThrottle):
         return super(NonCookieAuthThrottle, self).allow_request(request, view)
 
 
-class AddContributorThrottle(BaseThrottle, UserRateThrottle):
+class AddContributorThrottle(BaseThrottle, throttling.UserRateThrottle):
 
     scope = 'add-contributor'
 
@@ -69,7 +192,7 @@ class AddContributorThrottle(BaseThrottle, UserRateThrottle):
         return super(AddContributorThrottle, self).allow_request(request, view)
 
 
-class CreateGuidThrottle(BaseThrottle, UserRateThrottle):
+class CreateGuidThrottle(BaseThrottle, throttling.UserRateThrottle):
 
     scope = 'create-guid'
 
@@ -83,22 +206,22 @@ class CreateGuidThrottle(BaseThrottle, UserRateThrottle):
         return super(CreateGuidThrottle, self).allow_request(request, view)
 
 
-class RootAnonThrottle(AnonRateThrottle):
+class RootAnonThrottle(SharedRateThrottle, throttling.AnonRateThrottle):
 
     scope = 'root-anon-throttle'
 
 
-class TestUserRateThrottle(BaseThrottle, UserRateThrottle):
+class TestUserRateThrottle(BaseThrottle, throttling.UserRateThrottle):
 
     scope = 'test-user'
 
 
-class TestAnonRateThrottle(BaseThrottle, AnonRateThrottle):
+class TestAnonRateThrottle(BaseThrottle, throttling.AnonRateThrottle):
 
     scope = 'test-anon'
 
 
-class SendEmailThrottle(BaseThrottle, UserRateThrottle):
+class SendEmailThrottle(BaseThrottle, throttling.UserRateThrottle):
 
     scope = 'send-email'
 
@@ -9,10 +9,10 @@ from django.utils.http import urlquote
 from django.core.exceptions import ObjectDoesNotExist
 from django.db.models import QuerySet, F
 from rest_framework.exceptions import NotFound
-from rest_framework.reverse import reverse
 
 from api.base.authentication.drf import get_session_from_cookie
 from api.base.exceptions import Gone, UserGone
+from api.base.routes import reverse_route
 from api.base.settings import HASHIDS_SALT
 from framework.auth import Auth
 from framework.auth.cas import CasResponse
@@ -75,7 +75,7 @@ def get_user_auth(request):
 
 def absolute_reverse(view_name, query_kwargs=None, args=None, kwargs=None):
     """Like django's `reverse`, except returns an absolute URL. Also add query parameters."""
-    relative_url = reverse(view_name, kwargs=kwargs)
+    relative_url = reverse_route(view_name, kwargs=kwargs)
 
     url = website_util.api_v2_url(relative_url, params=query_kwargs, base_prefix='')
     return url
@@ -241,6 +241,8 @@ class MockQueryset(list):
             self.add_dict_as_item(item)
 
     def __len__(self):
+        if self.search is None:
+            return super().__len__()
         return self.search.count()
 
     def add_dict_as_item(self, dict):
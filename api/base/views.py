@@ -54,10 +54,32 @@ class JSONAPIBaseView(generics.GenericAPIView):
         self.view_fqn = ':'.join([self.view_category, self.view_name])
         super(JSONAPIBaseView, self).__init__(**kwargs)
 
+    def _build_embedded_view(self, v, view_args, view_kwargs, request):
+        """Set up a view ourselves to avoid all the junk DRF throws in.
+        v is a function that hides everything, v.cls is the actual view class.
+        """
+        view_kwargs.update({
+            'request': request,
+            'is_embedded': True,
+        })
+
+        view = v.cls()
+        view.args = view_args
+        view.kwargs = view_kwargs
+        view.request = request
+        view.request.parser_context['kwargs'] = view_kwargs
+        view.format_kwarg = view.get_format_suffix(**view_kwargs)
+        return view
+
     def _get_embed_partial(self, field_name, field):
         """Create a partial function to fetch the values of an embedded field. A basic
         example is to include a Node's children in a single response.
 
+        The partial exposes a ``prefetch`` function which list serializers call with the
+        whole page of items before serializing it. Embedded views that implement
+        ``get_embed_batch_queryset`` (lists) or ``get_embed_batch_parents`` (details) then
+        have their results for every item loaded with a single query for this field.
+
         :param str field_name: Name of field of the view's serializer_class to load
         results for
         :return function object -> dict:
@@ -65,6 +87,47 @@ class JSONAPIBaseView(generics.GenericAPIView):
         if getattr(field, 'field', None):
             field = field.field
 
+        # {view class: {parent pk: [results]}} for list embeds and
+        # {model: {lookup value: object}} for detail embeds, filled in by prefetch
+        prefetched_lists = {}
+        prefetched_parents = {}
+
+        def prefetch_list(v, targets):
+            # Only batch lists that hang off of the embedding item itself, e.g. a node's contributors
+            parents = [item for item, view_args, view_kwargs in targets if item._id in view_kwargs.values()]
+            if not parents:
+                return
+            item, view_args, view_kwargs = targets[0]
+            view = self._build_embedded_view(v, view_args, dict(view_kwargs), EmbeddedRequest(self.request))
+            results = prefetched_lists.setdefault(v.cls, {})
+            for parent in parents:
+                results[parent.pk] = []
+            for obj in view.filter_queryset(view.get_embed_batch_queryset(parents)):
+                results[getattr(obj, view.embed_batch_parent_field)].append(obj)
+
+        def prefetch(items):
+            targets = defaultdict(list)
+            resolved = {}
+            for item in items:
+                try:
+                    v, view_args, view_kwargs = field.resolve(item, field_name, self.request)
+                except Exception:
+                    # Prefetching is best effort, items that cannot be resolved here
+                    # will surface their error when the partial is called
+                    continue
+                if v:
+                    resolved[v.cls] = v
+                    targets[v.cls].append((item, view_args, view_kwargs))
+
+            for view_cls, view_targets in targets.items():
+                if issubclass(view_cls, ListModelMixin):
+                    if hasattr(view_cls, 'get_embed_batch_queryset'):
+                        prefetch_list(resolved[view_cls], view_targets)
+                elif hasattr(view_cls, 'get_embed_batch_parents'):
+                    batch = view_cls.get_embed_batch_parents([view_kwargs for item, view_args, view_kwargs in view_targets])
+                    for model, objects in batch.items():
+                        prefetched_parents.setdefault(model, {}).update(objects)
+
         def partial(item):
             # resolve must be implemented on the field
             v, view_args, view_kwargs = field.resolve(item, field_name, self.request)
@@ -77,21 +140,13 @@ class JSONAPIBaseView(generics.GenericAPIView):
                 request._request._embed_cache = {}
             cache = request._request._embed_cache
 
+            for model, objects in prefetched_parents.items():
+                for value in view_kwargs.values():
+                    if value in objects:
+                        request.parents.setdefault(model, {})[value] = objects[value]
             request.parents.setdefault(type(item), {})[item._id] = item
 
-            view_kwargs.update({
-                'request': request,
-                'is_embedded': True,
-            })
-
-            # Setup a view ourselves to avoid all the junk DRF throws in
-            # v is a function that hides everything v.cls is the actual view class
-            view = v.cls()
-            view.args = view_args
-            view.kwargs = view_kwargs
-            view.request = request
-            view.request.parser_context['kwargs'] = view_kwargs
-            view.format_kwarg = view.get_format_suffix(**view_kwargs)
+            view = self._build_embedded_view(v, view_args, view_kwargs, request)
 
             if not isinstance(view, ListModelMixin):
                 try:
@@ -118,7 +173,11 @@ class JSONAPIBaseView(generics.GenericAPIView):
                 if not isinstance(view, ListModelMixin):
                     ret = ser.to_representation(item)
                 else:
+                    # get_queryset still runs for its permission checks, but the prefetched
+                    # results for this item are used instead of evaluating the queryset
                     queryset = view.filter_queryset(view.get_queryset())
+                    if item.pk in prefetched_lists.get(v.cls, {}):
+                        queryset = prefetched_lists[v.cls][item.pk]
                     page = view.paginate_queryset(getattr(queryset, '_results_cache', None) or queryset)
 
                     ret = ser.to_representation(page or queryset)
@@ -137,6 +196,7 @@ class JSONAPIBaseView(generics.GenericAPIView):
 
             return ret
 
+        partial.prefetch = prefetch
         return partial
 
     def get_serializer_context(self):
@@ -506,12 +566,17 @@ class BaseContributorDetail(JSONAPIBaseView, generics.RetrieveAPIView):
 class BaseContributorList(JSONAPIBaseView, generics.ListAPIView, ListFilterMixin):
 
     ordering = ('-modified',)
+    embed_batch_parent_field = 'node_id'
 
     def get_default_queryset(self):
         node = self.get_node()
 
         return node.contributor_set.all().include('user__guids')
 
+    def get_embed_batch_queryset(self, parents):
+        """Contributors of all of ``parents``, used when contributors are embedded in a list response"""
+        return Contributor.objects.filter(node__in=parents).include('user__guids')
+
     def get_queryset(self):
         queryset = self.get_queryset_from_request()
         # If bulk request, queryset only contains contributors in request
@@ -177,6 +177,12 @@ class DraftContributorsList(NodeContributorsList, DraftRegistrationMixin):
         draft = self.get_draft()
         return draft.draftregistrationcontributor_set.all().include('user__guids')
 
+    # Overrides BaseContributorList
+    embed_batch_parent_field = 'draft_registration_id'
+
+    def get_embed_batch_queryset(self, parents):
+        return DraftRegistrationContributor.objects.filter(draft_registration__in=parents).include('user__guids')
+
     # overrides NodeContributorsList
     def get_serializer_class(self):
         if self.request.method in ('PUT', 'PATCH', 'DELETE'):
@@ -241,6 +247,10 @@ class DraftBibliographicContributorsList(DraftContributorsList):
         draft = self.get_draft()
         return draft.draftregistrationcontributor_set.filter(visible=True).include('user__guids')
 
+    def get_embed_batch_queryset(self, parents):
+        contributors = super().get_embed_batch_queryset(parents)
+        return contributors.filter(visible=True)
+
     # Override to prevent use DraftRegistrationContributorsCreateSerializer, this endpoint is read-only
     def get_serializer_class(self):
         return DraftRegistrationContributorDetailSerializer
@@ -1,3 +1,6 @@
+import csv
+
+from rest_framework_csv.misc import Echo
 from rest_framework_csv.renderers import CSVRenderer
 
 
@@ -15,6 +18,15 @@ class MetricsCSVRenderer(CSVRenderer):
         data = data.get('data')
         return super().render(data, media_type=media_type, renderer_context=renderer_context, writer_opts=writer_opts)
 
+    def render_stream(self, data):
+        """
+        Yields the lines of a CSV of ``data``, an iterable of serialized results, one at a time,
+        for a StreamingHttpResponse. The header is always written, even without results.
+        """
+        writer = csv.writer(Echo(), **(self.writer_opts or {}))
+        for row in self.tablize(iter(data), header=self.header, labels=self.labels):
+            yield writer.writerow(row)
+
 class InstitutionUserMetricsCSVRenderer(MetricsCSVRenderer):
     """
     MetricsCSVRenderer with headers and labels specific to the InstitutionUserMetrics Endpoint
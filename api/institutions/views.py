@@ -1,4 +1,8 @@
+import re
+
 from django.db.models import F
+from django.http import StreamingHttpResponse
+from elasticsearch_dsl import Q
 from rest_framework import generics
 from rest_framework import permissions as drf_permissions
 from rest_framework import exceptions
@@ -18,13 +22,13 @@ from api.base.filters import ListFilterMixin
 from api.base.views import JSONAPIBaseView
 from api.base.serializers import JSONAPISerializer
 from api.base.utils import get_object_or_error, get_user_auth
-from api.base.pagination import JSONAPIPagination, MaxSizePagination
+from api.base.pagination import JSONAPIPagination, MaxSizePagination, SearchAfterPagination
 from api.base.parsers import (
     JSONAPIRelationshipParser,
     JSONAPIRelationshipParserForRegularJSON,
 )
 from api.base.settings import MAX_SIZE_OF_ES_QUERY
-from api.base.exceptions import RelationshipPostMakesNoChanges
+from api.base.exceptions import InvalidFilterOperator, InvalidQueryStringError, RelationshipPostMakesNoChanges
 from api.base.utils import MockQueryset
 from api.base.settings import DEFAULT_ES_NULL_VALUE
 from api.metrics.permissions import IsInstitutionalMetricsUser
@@ -493,6 +497,14 @@ class InstitutionDepartmentList(InstitutionImpactList):
 
 
 class InstitutionUserMetricsList(InstitutionImpactList):
+    """
+    Lists the most recent project counts of each user of the institution.
+
+    Results are paged by number and filtered and sorted after loading all of them, unless
+    ``page[cursor]`` is given: they are then filtered, sorted and paged by elasticsearch, see
+    `SearchAfterPagination`, which keeps deep pages fast for institutions with many users.
+    CSV exports are streamed in pages the same way.
+    """
     view_name = 'institution-user-metrics'
 
     serializer_class = InstitutionUserMetricsSerializer
@@ -500,22 +512,151 @@ class InstitutionUserMetricsList(InstitutionImpactList):
 
     ordering = ('user_name',)
 
+    # The fields of the metric documents the serializer's fields are sorted and filtered on
+    SEARCH_FIELDS = {
+        'id': 'user_id',
+        'user_name': 'user_name',
+        'department': 'department',
+        'public_projects': 'public_project_count',
+        'private_projects': 'private_project_count',
+    }
+    # Number of users loaded at a time for a CSV export
+    CSV_EXPORT_PAGE_SIZE = 1000
+
+    @property
+    def is_cursor_paginated(self):
+        return SearchAfterPagination.cursor_query_param in self.request.query_params
+
+    @property
+    def pagination_class(self):
+        if self.is_cursor_paginated and not self.is_csv_export:
+            return SearchAfterPagination
+        return super().pagination_class
+
     def _format_search(self, search, default_kwargs=None):
-        results = search.execute()
+        return self._format_hits(search.execute(), default_kwargs=default_kwargs)
 
+    def _format_hits(self, hits, default_kwargs=None):
         users = []
-        for user_record in results:
+        for user_record in hits:
             record_dict = {}
             record_dict.update(default_kwargs)
             record_dict.update(user_record.to_dict())
-            user_id = user_record.user_id
-            fullname = OSFUser.objects.get(guids___id=user_id).fullname
-            record_dict['user_name'] = fullname
             users.append(record_dict)
 
+        # Counts recorded before names were recorded with them are named with one query
+        unnamed = {record['user_id'] for record in users if not record.get('user_name')}
+        if unnamed:
+            fullnames = dict(OSFUser.objects.filter(guids___id__in=unnamed).values_list('guids___id', 'fullname'))
+            for record in users:
+                if record['user_id'] in unnamed:
+                    record['user_name'] = fullnames.get(record['user_id'])
+
         return users
 
+    def _search_filter(self, field_name, op, value):
+        field = self.SEARCH_FIELDS[field_name]
+        if op == 'eq':
+            query = Q('term', **{field: value})
+            if field_name == 'department' and value == DEFAULT_ES_NULL_VALUE:
+                query |= ~Q('exists', field=field)
+            return query
+        if op == 'ne':
+            return ~Q('term', **{field: value})
+        if op in ('gt', 'gte', 'lt', 'lte'):
+            return Q('range', **{field: {op: value}})
+        if op in ('contains', 'icontains'):
+            pattern = ''.join(
+                '[{}{}]'.format(char.lower(), char.upper()) if op == 'icontains' and char.lower() != char.upper()
+                else re.sub(r'([.?+*|{}\[\]()"\\#@&<>~])', r'\\\1', char)
+                for char in str(value)
+            )
+            return Q('regexp', **{field: '.*{}.*'.format(pattern)})
+        raise InvalidFilterOperator(value=op, valid_operators=('eq', 'ne', 'lt', 'lte', 'gt', 'gte', 'contains', 'icontains'))
+
+    def _filter_and_sort_search(self, search):
+        """Filter and sort ``search`` as the query params ask, in elasticsearch"""
+        for field_filters in self.parse_query_params(self.request.query_params).values():
+            queries = [
+                self._search_filter(field_name, operation['op'], operation['value'])
+                for field_name, operation in field_filters.items()
+            ]
+            if queries:
+                search = search.filter(Q('bool', should=queries, minimum_should_match=1))
+
+        sort = []
+        for field_name in (self.request.query_params.get('sort') or ','.join(self.ordering)).split(','):
+            field = self.SEARCH_FIELDS.get(field_name.strip().lstrip('-'))
+            if not field:
+                raise InvalidQueryStringError("Cannot sort by '{}'.".format(field_name), parameter='sort')
+            sort.append({
+                field: {
+                    'order': 'desc' if field_name.strip().startswith('-') else 'asc',
+                    'missing': DEFAULT_ES_NULL_VALUE if field == 'department' else '_last',
+                },
+            })
+        # Users have one result each, so sorting by user last makes the order of results total
+        if not any('user_id' in field for field in sort):
+            sort.append({'user_id': {'order': 'asc'}})
+        return search.sort(*sort)
+
+    def _iterate_search(self, search, page_size, default_kwargs=None):
+        """Yield the formatted results of ``search`` a page at a time"""
+        search = search.extra(size=page_size)
+        while True:
+            hits = list(search.execute())
+            if hits:
+                yield self._format_hits(hits, default_kwargs=default_kwargs)
+            if len(hits) < page_size:
+                return
+            search = search.extra(search_after=list(hits[-1].meta.sort))
+
+    def get_default_search(self):
+        institution = self.get_institution()
+        return UserInstitutionProjectCounts.get_current_user_metrics(institution)
+
     def get_default_queryset(self):
         institution = self.get_institution()
-        search = UserInstitutionProjectCounts.get_current_user_metrics(institution)
+        search = self.get_default_search()
         return self._make_elasticsearch_results_filterable(search, id=institution._id, department=DEFAULT_ES_NULL_VALUE)
+
+    # overrides InstitutionImpactList
+    def get_queryset(self):
+        if self.is_cursor_paginated:
+            search = self._filter_and_sort_search(self.get_default_search())
+            hits = self.paginator.paginate_search(search, self.request)
+            items = self._format_hits(hits, default_kwargs={'id': self.get_institution()._id, 'department': DEFAULT_ES_NULL_VALUE})
+            return MockQueryset(items, None)
+        return super().get_queryset()
+
+    # overrides GenericAPIView
+    def filter_queryset(self, queryset):
+        if self.is_cursor_paginated:
+            # Already sorted by elasticsearch
+            return queryset
+        return super().filter_queryset(queryset)
+
+    # overrides ListAPIView
+    def list(self, request, *args, **kwargs):
+        if self.is_csv_export:
+            return self.get_csv_export()
+        return super().list(request, *args, **kwargs)
+
+    def get_csv_export(self):
+        """Stream a CSV of all the results, loading them a page at a time"""
+        search = self._filter_and_sort_search(self.get_default_search())
+        pages = self._iterate_search(
+            search,
+            self.CSV_EXPORT_PAGE_SIZE,
+            default_kwargs={'id': self.get_institution()._id, 'department': DEFAULT_ES_NULL_VALUE},
+        )
+        rows = (
+            row
+            for page in pages
+            for row in self.get_serializer(MockQueryset(page, None), many=True).data
+        )
+        renderer = self.request.accepted_renderer
+        return StreamingHttpResponse(
+            renderer.render_stream(rows),
+            content_type='{}; charset={}'.format(renderer.media_type, renderer.charset or 'utf-8'),
+        )
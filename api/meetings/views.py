@@ -1,7 +1,7 @@
 
 from rest_framework import generics, permissions as drf_permissions
 from rest_framework.exceptions import NotFound
-from django.db.models import Q, Count, Subquery, OuterRef, Case, When, Value, CharField, F
+from django.db.models import Q, Count, Subquery, OuterRef, Case, When, Value, CharField, F, Sum, ExpressionWrapper, IntegerField
 from django.db.models.functions import Coalesce
 from django.contrib.contenttypes.models import ContentType
 
@@ -193,13 +193,19 @@ class MeetingSubmissionList(BaseMeetingSubmission, generics.ListAPIView, ListFil
 
     def annotate_queryset_with_download_count(self, queryset):
         """
-        Annotates queryset with download count of first osfstorage file
+        Annotates queryset with download count of first osfstorage file, including downloads
+        that have not been flushed to its page counter yet
         """
         pages = PageCounter.objects.filter(
             action='download',
             resource_id=OuterRef('guids__id'),
             file_id=OuterRef('file_id'),
             version=None,
+        ).annotate(
+            download_total=ExpressionWrapper(
+                F('total') + Coalesce(Sum('increments__total'), 0),
+                output_field=IntegerField(),
+            ),
         )
 
         file_subqs = OsfStorageFile.objects.filter(
@@ -208,7 +214,7 @@ class MeetingSubmissionList(BaseMeetingSubmission, generics.ListAPIView, ListFil
         ).order_by('created')
 
         queryset = queryset.annotate(file_id=Subquery(file_subqs.values('id')[:1])).annotate(
-            download_count=Coalesce(Subquery(pages.values('total')[:1]), Value(0)),
+            download_count=Coalesce(Subquery(pages.values('download_total')[:1]), Value(0)),
         )
         return queryset
 
@@ -19,8 +19,9 @@ from api.base.serializers import (
 from api.base.settings import ADDONS_FOLDER_CONFIGURABLE
 from api.base.utils import (
     absolute_reverse, get_object_or_error,
-    get_user_auth, is_truthy,
+    get_user_auth, is_truthy, is_falsy,
 )
+from api.nodes.utils import NodeRelatedCounts
 from api.base.versioning import get_kebab_snake_case_field
 from api.taxonomies.serializers import TaxonomizableSerializerMixin
 from django.apps import apps
@@ -42,6 +43,7 @@ from osf.models import (
 from website.project import new_private_link
 from website.project.model import NodeUpdateError
 from osf.utils import permissions as osf_permissions
+from osf.utils.permission_resolver import NodePermissionResolver
 
 
 class RegistrationProviderRelationshipField(RelationshipField):
@@ -571,7 +573,7 @@ class NodeSerializer(TaxonomizableSerializerMixin, JSONAPISerializer):
             user_perms = obj.get_permissions(user)[::-1]
 
         user_perms = user_perms or default_perm
-        if not user_perms and user in obj.parent_admin_users:
+        if not user_perms and obj.is_admin_parent(user):
             user_perms = [osf_permissions.READ]
         return user_perms
 
@@ -624,29 +626,64 @@ class NodeSerializer(TaxonomizableSerializerMixin, JSONAPISerializer):
     def get_absolute_url(self, obj):
         return obj.get_absolute_url()
 
+    def get_page_context(self, objs):
+        user = self.context['request'].user
+        if not user.is_anonymous:
+            # Resolve the permissions used while serializing the page up front
+            NodePermissionResolver.get_current().resolve([user], objs)
+        methods = self.get_requested_count_methods()
+        if not methods:
+            return {}
+        return {'related_counts': NodeRelatedCounts(self.context['request']).get_counts(objs, methods)}
+
+    def get_requested_count_methods(self):
+        """Names of the serializer methods providing the counts requested with ``related_counts``"""
+        request = self.context['request']
+        if request.parser_context.get('kwargs', {}).get('is_embedded'):
+            return set()
+        show_related_counts = request.query_params.get('related_counts', False)
+        if is_falsy(show_related_counts):
+            return set()
+        requested = None if is_truthy(show_related_counts) else show_related_counts.split(',')
+
+        methods = set()
+        for field_name, field in self.fields.items():
+            if requested is not None and field_name not in requested:
+                continue
+            field = getattr(field, 'field', field)
+            for meta in (getattr(field, 'related_meta', None), getattr(field, 'self_meta', None)):
+                for key, method in (meta or {}).items():
+                    if key in ('count', 'unread') and isinstance(method, str):
+                        methods.add(method)
+        return methods
+
+    def get_page_count(self, method, obj):
+        """Count computed for the whole page by NodeRelatedCounts, or None if there isn't one"""
+        return self.context.get('related_counts', {}).get(method, {}).get(obj.id)
+
     # TODO: See if we can get the count filters into the filter rather than the serializer.
 
     def get_logs_count(self, obj):
-        return obj.logs.count()
+        count = self.get_page_count('get_logs_count', obj)
+        return obj.logs.count() if count is None else count
 
     def get_node_count(self, obj):
         """
         Returns the count of a node's direct children that the user has permission to view.
         Implict admin and group membership are factored in when determining perms.
         """
+        count = self.get_page_count('get_node_count', obj)
+        if count is not None:
+            return count
         auth = get_user_auth(self.context['request'])
         user_id = getattr(auth.user, 'id', None)
         with connection.cursor() as cursor:
             cursor.execute(
                 """
-                WITH RECURSIVE parents AS (
-                  SELECT parent_id, child_id
-                  FROM osf_noderelation
-                  WHERE child_id = %s AND is_node_link IS FALSE
-                UNION ALL
-                  SELECT osf_noderelation.parent_id, parents.parent_id AS child_id
-                  FROM parents JOIN osf_noderelation ON parents.PARENT_ID = osf_noderelation.child_id
-                  WHERE osf_noderelation.is_node_link IS FALSE
+                WITH parents AS (
+                  SELECT ancestor_id AS parent_id
+                  FROM osf_nodeclosure
+                  WHERE descendant_id = %s
                 ), has_admin AS (SELECT EXISTS(
                     SELECT P.codename
                     FROM auth_permission AS P
@@ -688,11 +725,15 @@ class NodeSerializer(TaxonomizableSerializerMixin, JSONAPISerializer):
             return int(cursor.fetchone()[0])
 
     def get_contrib_count(self, obj):
-        return len(obj.contributors)
+        count = self.get_page_count('get_contrib_count', obj)
+        return len(obj.contributors) if count is None else count
 
     def get_registration_count(self, obj):
         auth = get_user_auth(self.context['request'])
-        registrations = [node for node in obj.registrations_all if node.can_view(auth)]
+        registrations = list(obj.registrations_all)
+        if auth.user:
+            NodePermissionResolver.get_current().resolve([auth.user], registrations)
+        registrations = [node for node in registrations if node.can_view(auth)]
         return len(registrations)
 
     def get_draft_registration_count(self, obj):
@@ -701,33 +742,52 @@ class NodeSerializer(TaxonomizableSerializerMixin, JSONAPISerializer):
             return obj.draft_registrations_active.count()
 
     def get_pointers_count(self, obj):
-        return obj.linked_nodes.count()
+        count = self.get_page_count('get_pointers_count', obj)
+        return obj.linked_nodes.count() if count is None else count
 
     def get_wiki_page_count(self, obj):
-        return obj.wikis.filter(deleted__isnull=True).count()
+        count = self.get_page_count('get_wiki_page_count', obj)
+        return obj.wikis.filter(deleted__isnull=True).count() if count is None else count
 
     def get_node_links_count(self, obj):
+        count = self.get_page_count('get_node_links_count', obj)
+        if count is not None:
+            return count
         auth = get_user_auth(self.context['request'])
         linked_nodes = obj.linked_nodes.filter(is_deleted=False).exclude(type='osf.collection').exclude(type='osf.registration')
         return linked_nodes.can_view(auth.user, auth.private_link).count()
 
     def get_registration_links_count(self, obj):
+        count = self.get_page_count('get_registration_links_count', obj)
+        if count is not None:
+            return count
         auth = get_user_auth(self.context['request'])
         linked_registrations = obj.linked_nodes.filter(is_deleted=False, type='osf.registration').exclude(type='osf.collection')
         return linked_registrations.can_view(auth.user, auth.private_link).count()
 
     def get_linked_by_nodes_count(self, obj):
+        count = self.get_page_count('get_linked_by_nodes_count', obj)
+        if count is not None:
+            return count
         return obj._parents.filter(is_node_link=True, parent__is_deleted=False, parent__type='osf.node').count()
 
     def get_linked_by_registrations_count(self, obj):
+        count = self.get_page_count('get_linked_by_registrations_count', obj)
+        if count is not None:
+            return count
         return obj._parents.filter(is_node_link=True, parent__type='osf.registration', parent__retraction__isnull=True).count()
 
     def get_forks_count(self, obj):
+        count = self.get_page_count('get_forks_count', obj)
+        if count is not None:
+            return count
         return obj.forks.exclude(type='osf.registration').exclude(is_deleted=True).count()
 
     def get_unread_comments_count(self, obj):
-        user = get_user_auth(self.context['request']).user
-        node_comments = Comment.find_n_unread(user=user, node=obj, page='node')
+        node_comments = self.get_page_count('get_unread_comments_count', obj)
+        if node_comments is None:
+            user = get_user_auth(self.context['request']).user
+            node_comments = Comment.find_n_unread(user=user, node=obj, page='node')
 
         return {
             'node': node_comments,
@@ -1,7 +1,9 @@
 # -*- coding: utf-8 -*-
 from distutils.version import StrictVersion
+import pytz
 from django.apps import apps
-from django.db.models import Q, OuterRef, Exists, Subquery, CharField, Value, BooleanField
+from django.db import connection
+from django.db.models import Q, OuterRef, Exists, Subquery, CharField, Value, BooleanField, Count
 from django.contrib.auth.models import Permission
 from django.contrib.contenttypes.models import ContentType
 from rest_framework.exceptions import PermissionDenied, NotFound
@@ -9,8 +11,8 @@ from rest_framework.status import is_server_error
 import requests
 
 from addons.osfstorage.models import OsfStorageFile, OsfStorageFolder, NodeSettings, Region
-from addons.wiki.models import NodeSettings as WikiNodeSettings
-from osf.models import AbstractNode, Preprint, Guid, NodeRelation, Contributor
+from addons.wiki.models import NodeSettings as WikiNodeSettings, WikiPage
+from osf.models import AbstractNode, Preprint, Guid, NodeRelation, Contributor, Comment, NodeLog
 from osf.models.node import NodeGroupObjectPermission
 from osf.utils import permissions
 
@@ -111,3 +113,169 @@ class NodeOptimizationMixin(object):
             has_admin_scope=Value(admin_scope, output_field=BooleanField()),
             region=Subquery(node_settings.values('region_abbrev')[:1]),
         )
+
+
+class NodeRelatedCounts(object):
+    """Computes the ``related_counts`` of NodeSerializer for a whole page of nodes at once,
+    with one grouped query per count instead of one query per count per node.
+
+    Counts are returned as {serializer method name: {node id: count}} and are picked up by
+    the serializer methods through the ``related_counts`` serializer context. Methods that
+    are not listed in ``count_methods`` keep computing their counts per node.
+    """
+    count_methods = {
+        'get_logs_count': 'get_logs_counts',
+        'get_node_count': 'get_node_counts',
+        'get_contrib_count': 'get_contrib_counts',
+        'get_pointers_count': 'get_pointers_counts',
+        'get_wiki_page_count': 'get_wiki_page_counts',
+        'get_node_links_count': 'get_node_links_counts',
+        'get_registration_links_count': 'get_registration_links_counts',
+        'get_linked_by_nodes_count': 'get_linked_by_nodes_counts',
+        'get_linked_by_registrations_count': 'get_linked_by_registrations_counts',
+        'get_forks_count': 'get_forks_counts',
+        'get_unread_comments_count': 'get_unread_comments_counts',
+    }
+
+    def __init__(self, request):
+        self.auth = get_user_auth(request)
+
+    def get_counts(self, nodes, methods):
+        node_ids = [node.id for node in nodes]
+        counts = {}
+        if not node_ids:
+            return counts
+        for method in methods:
+            if method in self.count_methods:
+                computed = getattr(self, self.count_methods[method])(nodes, node_ids)
+                counts[method] = {node_id: computed.get(node_id, 0) for node_id in node_ids}
+        return counts
+
+    def _grouped_counts(self, queryset, group_by, count_field='id'):
+        return dict(
+            queryset.order_by().values(group_by).annotate(count=Count(count_field, distinct=True)).values_list(group_by, 'count'),
+        )
+
+    def get_logs_counts(self, nodes, node_ids):
+        return self._grouped_counts(NodeLog.objects.filter(node_id__in=node_ids), 'node_id')
+
+    def get_contrib_counts(self, nodes, node_ids):
+        return self._grouped_counts(Contributor.objects.filter(node_id__in=node_ids), 'node_id')
+
+    def get_pointers_counts(self, nodes, node_ids):
+        return self._grouped_counts(NodeRelation.objects.filter(parent_id__in=node_ids, is_node_link=True), 'parent_id', 'child_id')
+
+    def get_wiki_page_counts(self, nodes, node_ids):
+        return self._grouped_counts(WikiPage.objects.filter(node_id__in=node_ids, deleted__isnull=True), 'node_id')
+
+    def _get_linked_counts(self, node_ids, linked_nodes):
+        linked_ids = NodeRelation.objects.filter(parent_id__in=node_ids, is_node_link=True).values('child_id')
+        viewable = linked_nodes.filter(id__in=linked_ids, is_deleted=False).can_view(self.auth.user, self.auth.private_link)
+        return self._grouped_counts(
+            NodeRelation.objects.filter(parent_id__in=node_ids, is_node_link=True, child_id__in=viewable.values('id')),
+            'parent_id', 'child_id',
+        )
+
+    def get_node_links_counts(self, nodes, node_ids):
+        linked_nodes = AbstractNode.objects.exclude(type='osf.collection').exclude(type='osf.registration')
+        return self._get_linked_counts(node_ids, linked_nodes)
+
+    def get_registration_links_counts(self, nodes, node_ids):
+        return self._get_linked_counts(node_ids, AbstractNode.objects.filter(type='osf.registration'))
+
+    def get_linked_by_nodes_counts(self, nodes, node_ids):
+        return self._grouped_counts(
+            NodeRelation.objects.filter(child_id__in=node_ids, is_node_link=True, parent__is_deleted=False, parent__type='osf.node'),
+            'child_id',
+        )
+
+    def get_linked_by_registrations_counts(self, nodes, node_ids):
+        return self._grouped_counts(
+            NodeRelation.objects.filter(child_id__in=node_ids, is_node_link=True, parent__type='osf.registration', parent__retraction__isnull=True),
+            'child_id',
+        )
+
+    def get_forks_counts(self, nodes, node_ids):
+        return self._grouped_counts(
+            AbstractNode.objects.filter(forked_from_id__in=node_ids).exclude(type='osf.registration').exclude(is_deleted=True),
+            'forked_from_id',
+        )
+
+    def get_unread_comments_counts(self, nodes, node_ids):
+        user = self.auth.user
+        if not user:
+            return {}
+        member_ids = set(
+            AbstractNode.objects.get_nodes_for_user(user, permissions.READ_NODE, base_queryset=AbstractNode.objects.filter(id__in=node_ids)).values_list('id', flat=True),
+        )
+        unread = Q()
+        for node in nodes:
+            if node.id not in member_ids:
+                continue
+            view_timestamp = user.get_node_comment_timestamps(target_id=node._id)
+            if not view_timestamp.tzinfo:
+                view_timestamp = view_timestamp.replace(tzinfo=pytz.utc)
+            unread |= (
+                Q(node_id=node.id, root_target___id=node._id) &
+                (Q(created__gt=view_timestamp) | Q(modified__gt=view_timestamp))
+            )
+        if not unread:
+            return {}
+        return self._grouped_counts(Comment.objects.filter(unread, is_deleted=False).exclude(user=user), 'node_id')
+
+    def get_node_counts(self, nodes, node_ids):
+        """Same as NodeSerializer.get_node_count, with a single lookup of the ancestors
+        of every node on the page.
+        """
+        user_id = getattr(self.auth.user, 'id', None)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                WITH parents AS (
+                  SELECT descendant_id AS node_id, ancestor_id AS parent_id
+                  FROM osf_nodeclosure
+                  WHERE descendant_id = ANY(%s)
+                ), has_admin AS (
+                  SELECT page.node_id
+                  FROM unnest(%s) AS page(node_id)
+                  WHERE EXISTS(
+                    SELECT P.codename
+                    FROM auth_permission AS P
+                    INNER JOIN osf_nodegroupobjectpermission AS G ON (P.id = G.permission_id)
+                    INNER JOIN osf_osfuser_groups AS UG ON (G.group_id = UG.group_id)
+                    WHERE (P.codename = 'admin_node'
+                           AND (G.content_object_id IN (
+                                SELECT parent_id
+                                FROM parents
+                                WHERE parents.node_id = page.node_id
+                           ) OR G.content_object_id = page.node_id)
+                           AND UG.osfuser_id = %s)
+                  )
+                )
+                SELECT parent_id, COUNT(DISTINCT child_id)
+                FROM
+                  osf_noderelation
+                JOIN osf_abstractnode ON osf_noderelation.child_id = osf_abstractnode.id
+                LEFT JOIN osf_privatelink_nodes ON osf_abstractnode.id = osf_privatelink_nodes.abstractnode_id
+                LEFT JOIN osf_privatelink ON osf_privatelink_nodes.privatelink_id = osf_privatelink.id
+                WHERE parent_id = ANY(%s) AND is_node_link IS FALSE
+                AND osf_abstractnode.is_deleted IS FALSE
+                AND (
+                  osf_abstractnode.is_public
+                  OR parent_id IN (SELECT node_id FROM has_admin)
+                  OR (SELECT EXISTS(
+                      SELECT P.codename
+                      FROM auth_permission AS P
+                      INNER JOIN osf_nodegroupobjectpermission AS G ON (P.id = G.permission_id)
+                      INNER JOIN osf_osfuser_groups AS UG ON (G.group_id = UG.group_id)
+                      WHERE (P.codename = 'read_node'
+                             AND G.content_object_id = osf_abstractnode.id
+                             AND UG.osfuser_id = %s)
+                      )
+                  )
+                  OR (osf_privatelink.key = %s AND osf_privatelink.is_deleted = FALSE)
+                )
+                GROUP BY parent_id;
+            """, [node_ids, node_ids, user_id, node_ids, user_id, self.auth.private_key],
+            )
+            return {parent_id: int(count) for parent_id, count in cursor.fetchall()}
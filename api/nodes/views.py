@@ -159,6 +159,15 @@ class NodeMixin(object):
     serializer_class = NodeSerializer
     node_lookup_url_kwarg = 'node_id'
 
+    @classmethod
+    def get_embed_batch_parents(cls, view_kwargs_list):
+        """Load the nodes for a page of embedded requests in one query. get_node picks them up
+        from the request's parents so the usual checks still apply to each of them.
+        """
+        node_ids = {kwargs[cls.node_lookup_url_kwarg] for kwargs in view_kwargs_list if kwargs.get(cls.node_lookup_url_kwarg)}
+        nodes = Node.objects.filter(guids___id__in=node_ids).annotate(region=F('addons_osfstorage_node_settings__region___id')).exclude(region=None)
+        return {Node: {node._id: node for node in nodes}}
+
     def get_node(self, check_object_permissions=True, node_id=None):
         node = None
 
@@ -608,6 +617,10 @@ class NodeBibliographicContributorsList(BaseContributorList, NodeMixin):
         contributors = super(NodeBibliographicContributorsList, self).get_default_queryset()
         return contributors.filter(visible=True)
 
+    def get_embed_batch_queryset(self, parents):
+        contributors = super(NodeBibliographicContributorsList, self).get_embed_batch_queryset(parents)
+        return contributors.filter(visible=True)
+
 
 class NodeDraftRegistrationsList(JSONAPIBaseView, generics.ListCreateAPIView, NodeMixin):
     """
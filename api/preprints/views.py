@@ -357,6 +357,12 @@ class PreprintContributorsList(NodeContributorsList, PreprintMixin):
         preprint = self.get_preprint()
         return preprint.preprintcontributor_set.all().include('user__guids')
 
+    # Overrides BaseContributorList
+    embed_batch_parent_field = 'preprint_id'
+
+    def get_embed_batch_queryset(self, parents):
+        return PreprintContributor.objects.filter(preprint__in=parents).include('user__guids')
+
     # overrides NodeContributorsList
     def get_serializer_class(self):
         """
@@ -433,6 +439,10 @@ class PreprintBibliographicContributorsList(PreprintContributorsList):
         contributors = super().get_default_queryset()
         return contributors.filter(visible=True)
 
+    def get_embed_batch_queryset(self, parents):
+        contributors = super().get_embed_batch_queryset(parents)
+        return contributors.filter(visible=True)
+
     def post(self, request, *args, **kwargs):
         raise MethodNotAllowed(method=request.method)
 
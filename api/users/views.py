@@ -3,7 +3,6 @@ import pytz
 from django.apps import apps
 from django.db.models import F
 from guardian.shortcuts import get_objects_for_user
-from rest_framework.throttling import UserRateThrottle
 
 from api.addons.views import AddonSettingsMixin
 from api.base import permissions as base_permissions
@@ -25,7 +24,7 @@ from api.base.utils import (
     is_truthy,
 )
 from api.base.views import JSONAPIBaseView, WaterButlerMixin
-from api.base.throttling import SendEmailThrottle, SendEmailDeactivationThrottle, NonCookieAuthThrottle, BurstRateThrottle
+from api.base.throttling import SendEmailThrottle, SendEmailDeactivationThrottle, NonCookieAuthThrottle, BurstRateThrottle, UserRateThrottle
 from api.institutions.serializers import InstitutionSerializer
 from api.nodes.filters import NodesFilterMixin, UserNodesFilterMixin
 from api.nodes.serializers import DraftRegistrationLegacySerializer
@@ -5,7 +5,8 @@ from osf_tests import factories
 from tests.base import ApiTestCase
 
 from api.base import settings
-from api.base.pagination import MaxSizePagination
+from api.base.pagination import MaxSizePagination, SearchModelPaginator, SearchPaginator
+from osf.models import AbstractNode, OSFUser
 
 
 class TestMaxPagination(ApiTestCase):
@@ -54,3 +55,43 @@ class TestJSONAPIPagination(ApiTestCase):
         assert_not_in('meta', links)
         assert_in('total', meta)
         assert_in('per_page', meta)
+
+
+class TestSearchPaginator(ApiTestCase):
+
+    def setUp(self):
+        super(TestSearchPaginator, self).setUp()
+        self.user = factories.UserFactory()
+        self.projects = [factories.ProjectFactory(creator=self.user) for _ in range(3)]
+        self.file = factories.NodeFactory(creator=self.user).get_addon('osfstorage').get_root().append_file('Bowie.txt')
+
+    def search_results(self, hits):
+        return {'results': hits, 'aggs': {'total': len(hits)}}
+
+    def test_results_loaded_in_order(self):
+        hits = [
+            {'_id': self.projects[2]._id, '_type': 'project'},
+            {'_id': self.user._id, '_type': 'user'},
+            {'_id': self.file._id, '_type': 'file'},
+            {'_id': self.projects[0]._id, '_type': 'project'},
+        ]
+        page = SearchPaginator(self.search_results(hits), 10).page(1)
+        assert_equal(list(page), [self.projects[2], self.user, self.file, self.projects[0]])
+
+    def test_one_query_per_model(self):
+        hits = [{'_id': project._id, '_type': 'project'} for project in self.projects]
+        hits.append({'_id': self.user._id, '_type': 'user'})
+        with self.assertNumQueries(2):
+            page = SearchPaginator(self.search_results(hits), 10).page(1)
+            # Guids are loaded along with the results
+            assert_equal([obj._id for obj in page], [hit['_id'] for hit in hits])
+
+    def test_missing_objects_are_none(self):
+        hits = [{'_id': 'abcde', '_type': 'project'}, {'_id': self.projects[1]._id, '_type': 'project'}]
+        page = SearchModelPaginator(self.search_results(hits), 10, AbstractNode).page(1)
+        assert_equal(list(page), [None, self.projects[1]])
+
+    def test_model_paginator(self):
+        hits = [{'_id': self.user._id, '_type': 'user'}]
+        page = SearchModelPaginator(self.search_results(hits), 10, OSFUser).page(1)
+        assert_equal(list(page), [self.user])
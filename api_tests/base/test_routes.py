@@ -0,0 +1,45 @@
+import pytest
+from django.urls import NoReverseMatch, resolve, reverse
+
+from api.base import routes
+
+
+class TestRoutes:
+
+    @pytest.mark.parametrize('view_name, kwargs', [
+        ('nodes:node-detail', {'node_id': 'abc12', 'version': 'v2'}),
+        ('nodes:node-contributor-detail', {'node_id': 'abc12', 'user_id': 'def34', 'version': 'v2'}),
+        ('users:user-detail', {'user_id': 'me', 'version': 'v2'}),
+        ('licenses:license-detail', {'license_id': 'abcdef0123456789', 'version': 'v2'}),
+    ])
+    def test_route_matches_django(self, view_name, kwargs):
+        path = reverse(view_name, kwargs=kwargs)
+        assert routes.reverse_route(view_name, kwargs=kwargs) == path
+
+        expected = resolve(path)
+        match = routes.resolve_route(view_name, kwargs=kwargs)
+        assert match.func.view_class == expected.func.view_class
+        assert match.namespace == expected.namespace
+        assert match.kwargs == expected.kwargs
+
+    def test_route_is_cached(self):
+        kwargs = {'node_id': 'abc12', 'version': 'v2'}
+        route = routes.get_route('nodes:node-detail', kwargs)
+        assert route is routes.get_route('nodes:node-detail', {'node_id': 'xyz98', 'version': 'v2'})
+
+    def test_values_outside_template_use_django_reverse(self):
+        kwargs = {'node_id': 'ab-12', 'version': 'v2'}
+        route = routes.get_route('nodes:node-detail', kwargs)
+        assert route.reverse(kwargs) is None
+        with pytest.raises(NoReverseMatch):
+            routes.reverse_route('nodes:node-detail', kwargs=kwargs)
+
+    def test_values_rejected_by_pattern_use_django_reverse(self):
+        # scope_id only takes [a-z0-9._]
+        kwargs = {'scope_id': 'ABC', 'version': 'v2'}
+        route = routes.get_route('scopes:scope-detail', kwargs)
+        assert route.reverse({'scope_id': 'abc', 'version': 'v2'}) == reverse('scopes:scope-detail', kwargs={'scope_id': 'abc', 'version': 'v2'})
+        assert route.reverse(kwargs) is None
+        assert route.resolve(kwargs) is None
+        with pytest.raises(NoReverseMatch):
+            routes.reverse_route('scopes:scope-detail', kwargs=kwargs)
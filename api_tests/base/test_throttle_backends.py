@@ -0,0 +1,131 @@
+import mock
+import pytest
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import throttling
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.base.throttling import (
+    CacheThrottleBackend,
+    DatabaseThrottleBackend,
+    SharedRateThrottle,
+)
+from osf.models import ThrottleCounter
+
+
+class TwoPerMinuteThrottle(SharedRateThrottle, throttling.AnonRateThrottle):
+
+    rate = '2/minute'
+
+
+@pytest.fixture()
+def request_from():
+    def request_from(address):
+        return Request(APIRequestFactory().get('/', REMOTE_ADDR=address))
+    return request_from
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+@pytest.fixture()
+def mock_buffer():
+    with mock.patch('osf.metrics.metrics_buffer') as mock_buffer:
+        yield mock_buffer
+
+
+class TestCacheThrottleBackend:
+
+    def test_counts_requests_per_window(self):
+        backend = CacheThrottleBackend()
+        assert backend.hit('key', 10, 60) == 1
+        assert backend.hit('key', 20, 60) == 2
+        assert backend.hit('other', 20, 60) == 1
+        assert backend.hit('key', 70, 120) == 1
+
+
+@pytest.mark.django_db(transaction=True)
+class TestDatabaseThrottleBackend:
+
+    @pytest.fixture()
+    def backend(self):
+        backend = DatabaseThrottleBackend()
+        yield backend
+        backend._get_connection().close()
+
+    def test_counts_requests_per_window(self, backend):
+        assert backend.hit('key', 10, 60) == 1
+        assert backend.hit('key', 20, 60) == 2
+        assert backend.hit('other', 20, 60) == 1
+        assert backend.hit('key', 70, 120) == 1
+        assert ThrottleCounter.objects.get(key='key').count == 1
+
+    def test_counts_outside_of_request_transaction(self, backend):
+        with pytest.raises(ValueError):
+            with transaction.atomic():
+                backend.hit('key', 10, 60)
+                raise ValueError
+        assert ThrottleCounter.objects.get(key='key').count == 1
+
+    def test_connection_kept_after_request(self, backend):
+        backend.hit('key', 10, 60)
+        connection = backend._get_connection()
+        assert connection.settings_dict['CONN_MAX_AGE'] == settings.THROTTLE_CONN_MAX_AGE
+        backend.close_old_connection()
+        assert connection.connection is not None
+        assert backend._get_connection() is connection
+
+    def test_connection_closed_after_request(self, backend):
+        backend.hit('key', 10, 60)
+        connection = backend._get_connection()
+        assert connection.connection is not None
+        # As at the end of a request once THROTTLE_CONN_MAX_AGE is reached
+        connection.close_at = 0
+        backend.close_old_connection()
+        assert connection.connection is None
+        assert backend.hit('key', 20, 60) == 2
+
+    def test_delete_expired(self, backend):
+        backend.hit('expired', 10, 60)
+        backend.hit('current', 70, 120)
+        assert ThrottleCounter.delete_expired(90) == 1
+        assert list(ThrottleCounter.objects.values_list('key', flat=True)) == ['current']
+
+
+class TestSharedRateThrottle:
+
+    def test_rejects_requests_over_rate(self, request_from, mock_buffer):
+        with mock.patch.object(TwoPerMinuteThrottle, 'timer', return_value=1000.0):
+            results = [TwoPerMinuteThrottle().allow_request(request_from('10.0.0.1'), None) for _ in range(3)]
+            assert results == [True, True, False]
+            assert TwoPerMinuteThrottle().allow_request(request_from('10.0.0.2'), None)
+
+    def test_allows_requests_in_next_window(self, request_from, mock_buffer):
+        throttle = TwoPerMinuteThrottle()
+        with mock.patch.object(TwoPerMinuteThrottle, 'timer', return_value=1000.0):
+            for _ in range(3):
+                throttle.allow_request(request_from('10.0.0.1'), None)
+            assert 0 < throttle.wait() <= 60
+            wait = throttle.wait()
+        with mock.patch.object(TwoPerMinuteThrottle, 'timer', return_value=1000.0 + wait):
+            assert throttle.allow_request(request_from('10.0.0.1'), None)
+
+    def test_records_events(self, request_from, mock_buffer):
+        with mock.patch.object(TwoPerMinuteThrottle, 'timer', return_value=1000.0):
+            for _ in range(3):
+                TwoPerMinuteThrottle().allow_request(request_from('10.0.0.1'), None)
+        calls = mock_buffer.add.call_args_list
+        assert [call[1] for call in calls] == [
+            {'throttle': 'TwoPerMinuteThrottle', 'throttled': False},
+            {'throttle': 'TwoPerMinuteThrottle', 'throttled': False},
+            {'throttle': 'TwoPerMinuteThrottle', 'throttled': True},
+        ]
+
+    def test_allows_requests_when_backend_fails(self, request_from, mock_buffer):
+        with mock.patch.object(CacheThrottleBackend, 'hit', side_effect=Exception):
+            assert TwoPerMinuteThrottle().allow_request(request_from('10.0.0.1'), None)
+        assert not mock_buffer.add.called
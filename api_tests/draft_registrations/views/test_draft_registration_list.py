@@ -30,6 +30,17 @@ class TestDraftRegistrationListNewWorkflow(TestDraftRegistrationList):
         # DraftRegistration endpoints permissions are not calculated from the node
         return
 
+    def test_embed_bibliographic_contributors_excludes_hidden(
+            self, app, user, draft_registration, url_draft_registrations):
+        hidden = AuthUserFactory()
+        draft_registration.add_contributor(hidden, visible=False, auth=Auth(user), save=True)
+
+        res = app.get('{}embed=bibliographic_contributors'.format(url_draft_registrations), auth=user.auth)
+        assert res.status_code == 200
+        data = {each['id']: each for each in res.json['data']}
+        contributors = data[draft_registration._id]['embeds']['bibliographic_contributors']['data']
+        assert [each['id'].split('-')[-1] for each in contributors] == [user._id]
+
     # Overrides TestDraftRegistrationList
     def test_cannot_view_draft_list(
             self, app, user_write_contrib, project_public,
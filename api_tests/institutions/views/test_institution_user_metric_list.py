@@ -66,6 +66,7 @@ class TestInstitutionUserMetricList:
             user_id=user._id,
             institution_id=institution._id,
             department='Biology dept',
+            user_name=user.fullname,
             public_project_count=6,
             private_project_count=5,
         ).save()
@@ -74,6 +75,7 @@ class TestInstitutionUserMetricList:
             user_id=user2._id,
             institution_id=institution._id,
             department='Psychology dept',
+            user_name=user2.fullname,
             public_project_count=3,
             private_project_count=2,
         ).save()
@@ -93,6 +95,7 @@ class TestInstitutionUserMetricList:
                 user_id=test_user._id,
                 institution_id=institution._id,
                 department='Psychology dept',
+                user_name=test_user.fullname,
                 public_project_count=int(10 * random()),
                 private_project_count=int(10 * random()),
             ).save()
@@ -101,6 +104,7 @@ class TestInstitutionUserMetricList:
             user_id=user3._id,
             institution_id=institution._id,
             department='Psychology dept',
+            user_name=user3.fullname,
             public_project_count=int(10 * random()),
             private_project_count=int(10 * random()),
         ).save()
@@ -265,3 +269,61 @@ class TestInstitutionUserMetricList:
         assert data[0]['attributes']['department'] == 'Biology dept'
         assert data[1]['attributes']['department'] == 'N/A'
         assert data[2]['attributes']['department'] == 'Psychology dept'
+
+    @pytest.mark.skipif(settings.TRAVIS_ENV, reason='Non-deterministic fails on travis')
+    def test_cursor_pagination(self, app, url, user3, admin, populate_counts, populate_more_counts):
+        resp = app.get(f'{url}?sort=user_name&page[cursor]=&page[size]=4', auth=admin.auth)
+        assert resp.status_code == 200
+        assert resp.json['meta']['total'] == 11
+        assert resp.json['meta']['per_page'] == 4
+        names = [result['attributes']['user_name'] for result in resp.json['data']]
+
+        next_link = resp.json['links']['next']
+        while next_link:
+            resp = app.get(next_link, auth=admin.auth)
+            assert resp.status_code == 200
+            names.extend(result['attributes']['user_name'] for result in resp.json['data'])
+            next_link = resp.json['links']['next']
+
+        assert len(names) == 11
+        assert names == sorted(names)
+        assert names[-1] == 'Zedd'
+
+        resp = app.get(f'{url}?sort=-user_name&page[cursor]=', auth=admin.auth)
+        assert resp.json['data'][0]['attributes']['user_name'] == 'Zedd'
+        assert resp.json['links']['next'] is None
+
+    @pytest.mark.skipif(settings.TRAVIS_ENV, reason='Non-deterministic fails on travis')
+    def test_cursor_pagination_filters(self, app, url, user4, admin, populate_counts, populate_more_counts, populate_na_department):
+        resp = app.get(f'{url}?filter[department]=Psychology dept&page[cursor]=', auth=admin.auth)
+        assert resp.json['meta']['total'] == 10
+        assert {result['attributes']['department'] for result in resp.json['data']} == {'Psychology dept'}
+
+        resp = app.get(f'{url}?filter[user_name]=zed&page[cursor]=', auth=admin.auth)
+        assert [result['attributes']['user_name'] for result in resp.json['data']] == ['Zedd']
+
+        # Counts recorded without a name or a department
+        resp = app.get(f'{url}?filter[department]={DEFAULT_ES_NULL_VALUE}&page[cursor]=', auth=admin.auth)
+        data = resp.json['data']
+        assert len(data) == 1
+        assert data[0]['id'] == user4._id
+        assert data[0]['attributes']['user_name'] == user4.fullname
+
+    def test_invalid_cursor(self, app, url, admin):
+        resp = app.get(f'{url}?page[cursor]=notacursor', auth=admin.auth, expect_errors=True)
+        assert resp.status_code == 400
+
+        resp = app.get(f'{url}?page[cursor]=&sort=user', auth=admin.auth, expect_errors=True)
+        assert resp.status_code == 400
+
+    @pytest.mark.skipif(settings.TRAVIS_ENV, reason='Non-deterministic fails on travis')
+    def test_csv_export_streams_all_results(self, app, url, admin, populate_counts, populate_more_counts, populate_na_department):
+        resp = app.get(url, auth=admin.auth, headers={'accept': 'text/csv'})
+        assert resp.status_code == 200
+        assert resp.headers['Content-Type'] == 'text/csv; charset=utf-8'
+
+        with StringIO(resp.text) as csv_file:
+            rows = list(csv.reader(csv_file, delimiter=','))
+        assert rows[0] == ['id', 'user_name', 'public_projects', 'private_projects', 'type']
+        assert len(rows) == 13
+        assert rows[-2][1] == 'Zedd'
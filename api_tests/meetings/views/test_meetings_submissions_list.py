@@ -1,9 +1,10 @@
 import pytest
+from django.utils import timezone
 
 from api_tests import utils as api_utils
 
 from framework.auth.core import Auth
-from osf.models import PageCounter
+from osf.models import PageCounter, PageCounterIncrement
 from osf_tests.factories import ConferenceFactory, ProjectFactory, AuthUserFactory
 
 
@@ -258,3 +259,18 @@ class TestMeetingSubmissionsList:
         assert len(data) == 3
         assert [first, second, third] == [meeting['id'] for meeting in data]
         assert [2, 1, 0] == [meeting['attributes']['download_count'] for meeting in data]
+
+    def test_meeting_submissions_download_count_includes_pending_increments(
+            self, app, url_meeting_two, meeting_two_submission, file,
+            meeting_two_third_submission, file_three):
+        pc = self.mock_download(meeting_two_third_submission, file_three, 1)
+        PageCounterIncrement.objects.create(page_counter=pc, date=timezone.now().date(), total=1, unique=1)
+        PageCounterIncrement.objects.create(page_counter=pc, date=timezone.now().date(), total=1, unique=1)
+
+        res = app.get(url_meeting_two + '?sort=-download_count')
+        assert res.status_code == 200
+        data = res.json['data']
+        assert data[0]['id'] == meeting_two_third_submission._id
+        assert data[0]['attributes']['download_count'] == 3
+        assert data[1]['id'] == meeting_two_submission._id
+        assert data[1]['attributes']['download_count'] == 2
@@ -156,3 +156,39 @@ class TestNodeEmbeds:
         res = app.get(url, auth=write_contrib_one.auth)
         assert res.status_code == 200
         assert res.json['data']['embeds']['contributors']['meta']['total_bibliographic'] == 3
+
+    def test_node_list_embeds(
+            self, app, user, write_contrib_one,
+            write_contribs, subchild, root_node,
+            child_one, child_two):
+
+        #   test_embed_contributors_and_parent_on_list
+        url = '/{}nodes/?embed=contributors&embed=parent'.format(API_BASE)
+
+        res = app.get(url, auth=user.auth)
+        assert res.status_code == 200
+        data = {node['id']: node for node in res.json['data']}
+
+        root_contrib_ids = {
+            '{}-{}'.format(root_node._id, contrib._id)
+            for contrib in write_contribs + [user]
+        }
+        assert {
+            contrib['id'] for contrib in data[root_node._id]['embeds']['contributors']['data']
+        } == root_contrib_ids
+        assert data[root_node._id]['embeds']['contributors']['links']['meta']['total'] == 3
+        assert 'parent' not in data[root_node._id]['embeds']
+
+        assert {
+            contrib['id'] for contrib in data[child_two._id]['embeds']['contributors']['data']
+        } == {'{}-{}'.format(child_two._id, user._id)}
+        assert data[child_one._id]['embeds']['parent']['data']['id'] == root_node._id
+        assert data[child_two._id]['embeds']['parent']['data']['id'] == root_node._id
+
+    #   test_embed_parent_on_list_unauthorized
+        res = app.get(url, auth=write_contrib_one.auth)
+        assert res.status_code == 200
+        data = {node['id']: node for node in res.json['data']}
+        assert child_two._id not in data
+        assert data[subchild._id]['embeds']['parent']['errors'][0]['detail'] == exceptions.PermissionDenied.default_detail
+        assert data[child_one._id]['embeds']['parent']['data']['id'] == root_node._id
@@ -323,6 +323,34 @@ class TestNodeList:
         assert res.json['data'][0]['attributes']['current_user_is_contributor'] is False
         assert res.json['data'][0]['attributes']['current_user_is_contributor_or_group_member'] is False
 
+    def test_node_list_related_counts_match_detail(self, app, user, public_project, private_project):
+        NodeFactory(parent=public_project, creator=user, is_public=True)
+        NodeFactory(parent=private_project, creator=user)
+        NodeFactory(parent=private_project, is_public=False)
+        public_project.add_pointer(private_project, auth=Auth(user))
+        ProjectFactory(is_public=True, creator=user).add_pointer(public_project, auth=Auth(user))
+        public_project.fork_node(auth=Auth(user))
+
+        url = '/{}nodes/?related_counts=true&page[size]=100'.format(API_BASE)
+        res = app.get(url, auth=user.auth)
+        assert res.status_code == 200
+        assert len(res.json['data']) > 1
+        for node in res.json['data']:
+            detail_url = '/{}nodes/{}/?related_counts=true'.format(API_BASE, node['id'])
+            detail = app.get(detail_url, auth=user.auth).json['data']
+            for name, relationship in node['relationships'].items():
+                links = relationship.get('links', {})
+                for link in ('related', 'self'):
+                    if 'meta' in links.get(link, {}):
+                        assert links[link]['meta'] == detail['relationships'][name]['links'][link]['meta']
+
+        # Only the requested counts are included
+        url = '/{}nodes/?related_counts=children'.format(API_BASE)
+        res = app.get(url, auth=user.auth)
+        node = [each for each in res.json['data'] if each['id'] == public_project._id][0]
+        assert node['relationships']['children']['links']['related']['meta']['count'] == 1
+        assert 'count' not in node['relationships']['logs']['links']['related']['meta']
+
 
 @pytest.mark.django_db
 @pytest.mark.enable_quickfiles_creation
@@ -8,6 +8,7 @@ from waffle.testutils import override_switch
 
 from addons.github.models import GithubFile
 from api.base.settings.defaults import API_BASE
+from framework.auth.core import Auth
 from api_tests import utils as test_utils
 from api_tests.subjects.mixins import SubjectsFilterMixin
 from api_tests.preprints.filters.test_filters import PreprintsListFilteringMixin
@@ -255,6 +256,17 @@ class TestPreprintList(ApiTestCase):
         assert pp._id not in user_res_ids
         assert pp._id in mod_res_ids
 
+    def test_embed_bibliographic_contributors_excludes_hidden(self):
+        hidden = AuthUserFactory()
+        self.preprint.add_contributor(hidden, visible=False, auth=Auth(self.user), save=True)
+        PreprintFactory(creator=self.user)
+
+        res = self.app.get('{}?embed=bibliographic_contributors'.format(self.url))
+        assert_equal(res.status_code, 200)
+        data = {each['id']: each for each in res.json['data']}
+        contributors = data[self.preprint._id]['embeds']['bibliographic_contributors']['data']
+        assert_equal([each['id'].split('-')[-1] for each in contributors], [self.user._id])
+
 
 class TestPreprintsListFiltering(PreprintsListFilteringMixin):
 
@@ -76,6 +76,7 @@ class TestSloanMetrics(OsfTestCase):
             preprint=self.preprint,
             user=None,
             version='1',
+            buffered=True,
             sloan_coi=1,
             sloan_data=0,
             sloan_id=sloan_cookie_value,
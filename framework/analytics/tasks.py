@@ -0,0 +1,28 @@
+# encoding: utf-8
+
+import logging
+
+from framework.celery_tasks import app
+
+logger = logging.getLogger(__name__)
+
+
+@app.task(name='framework.analytics.tasks.flush_page_counters', ignore_results=True)
+def flush_page_counters():
+    """Apply buffered page counter increments, see PageCounter.flush_increments"""
+    from osf.models import PageCounter
+    flushed = PageCounter.flush_increments()
+    logger.info('Flushed {} page counter increments'.format(flushed))
+    return flushed
+
+
+@app.task(bind=True, name='framework.analytics.tasks.send_buffered_metrics', max_retries=5, default_retry_delay=60, ignore_results=True)
+def send_buffered_metrics(self, documents):
+    """Index buffered metric documents in bulk, see osf.metrics.MetricsBuffer"""
+    from osf.metrics import send_metric_documents
+    try:
+        return send_metric_documents(documents)
+    except Exception as exc:
+        if self.request.called_directly:
+            raise
+        self.retry(exc=exc)
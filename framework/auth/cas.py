@@ -2,7 +2,11 @@
 
 import furl
 from rest_framework import status as http_status
+from collections import OrderedDict
+import hashlib
 import json
+import threading
+import time
 from future.moves.urllib.parse import quote
 
 from lxml import etree
@@ -53,6 +57,81 @@ class CasResponse(object):
         self.attributes = attributes or {}
 
 
+class TokenCache(object):
+    """A size-bounded, expiring, thread-safe cache of CAS profile lookups, keyed by a hash of the
+    access token. Holds either the profile (user guid and attributes, including scopes) or the
+    error CAS rejected the token with. The least recently used entries are evicted first.
+
+    The cache is kept by each process. Revocations are recorded as `CasTokenRevocation` rows, which
+    every process checks before serving a cached profile.
+    """
+
+    def __init__(self, max_size=None, ttl=None, negative_ttl=None):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._negative_ttl = negative_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def max_size(self):
+        return self._max_size if self._max_size is not None else settings.CAS_TOKEN_CACHE_MAX_SIZE
+
+    @property
+    def ttl(self):
+        return self._ttl if self._ttl is not None else settings.CAS_TOKEN_CACHE_TTL
+
+    @property
+    def negative_ttl(self):
+        return self._negative_ttl if self._negative_ttl is not None else settings.CAS_TOKEN_CACHE_NEGATIVE_TTL
+
+    @staticmethod
+    def _key(access_token):
+        return hashlib.sha256(access_token.encode('utf-8')).hexdigest()
+
+    def get(self, access_token):
+        return self.get_entry(access_token)[0]
+
+    def get_entry(self, access_token):
+        """Return the cached value for ``access_token`` and the time it was cached at, or
+        (None, None)
+        """
+        key = self._key(access_token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, None
+            expires, cached_at, value = entry
+            if expires <= time.time():
+                del self._entries[key]
+                return None, None
+            self._entries.move_to_end(key)
+            return value, cached_at
+
+    def set(self, access_token, value, negative=False):
+        ttl = self.negative_ttl if negative else self.ttl
+        if not ttl or not self.max_size:
+            return
+        key = self._key(access_token)
+        with self._lock:
+            now = time.time()
+            self._entries[key] = (now + ttl, now, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, access_token):
+        with self._lock:
+            self._entries.pop(self._key(access_token), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache()
+
+
 class CasClient(object):
     """HTTP client for the CAS server."""
 
@@ -129,15 +208,44 @@ class CasClient(object):
         :raises: CasError if an unexpected response is returned.
         """
 
+        cached, cached_at = token_cache.get_entry(access_token)
+        if isinstance(cached, CasHTTPError):
+            raise CasHTTPError(cached.code, cached.message, cached.headers, cached.content)
+        if cached is not None:
+            if not self._is_revoked(access_token, cached_at):
+                user, attributes = cached
+                return self._make_profile_response(user, attributes)
+            token_cache.invalidate(access_token)
+
         url = self.get_profile_url()
         headers = {
             'Authorization': 'Bearer {}'.format(access_token),
         }
         resp = requests.get(url, headers=headers)
         if resp.status_code == 200:
-            return self._parse_profile(resp.content, access_token)
-        else:
+            cas_resp = self._parse_profile(resp.content, access_token)
+            token_cache.set(access_token, (cas_resp.user, cas_resp.attributes))
+            return self._make_profile_response(cas_resp.user, cas_resp.attributes)
+        try:
             self._handle_error(resp)
+        except CasHTTPError as err:
+            # Remember rejected tokens, but not server errors, which may go away on retry
+            if 400 <= err.code < 500 and err.code != http_status.HTTP_429_TOO_MANY_REQUESTS:
+                token_cache.set(access_token, err, negative=True)
+            raise
+
+    @staticmethod
+    def _is_revoked(access_token, since):
+        """Whether any process revoked ``access_token`` since epoch time ``since``"""
+        from osf.models import CasTokenRevocation
+        return CasTokenRevocation.is_revoked(TokenCache._key(access_token), since)
+
+    @staticmethod
+    def _make_profile_response(user, attributes):
+        """Build a response from a cached profile, copying what callers might mutate"""
+        resp = CasResponse(authenticated=True, user=user, attributes=dict(attributes))
+        resp.attributes['accessTokenScope'] = set(attributes['accessTokenScope'])
+        return resp
 
     def _handle_error(self, response, message='Unexpected response from CAS server'):
         """Handle an error response from CAS."""
@@ -180,9 +288,20 @@ class CasClient(object):
 
     def revoke_tokens(self, payload):
         """Revoke a tokens based on payload"""
+        from osf.models import CasTokenRevocation
+
         url = self.get_auth_token_revocation_url()
 
         resp = requests.post(url, data=payload)
+        # Recorded once CAS answered, so that profiles cached while the revocation was in flight
+        # are dropped too
+        if 'token' in payload:
+            token_cache.invalidate(payload['token'])
+            CasTokenRevocation.revoke(TokenCache._key(payload['token']), time.time())
+        else:
+            # All of an application's tokens, which are not known here
+            token_cache.clear()
+            CasTokenRevocation.revoke(CasTokenRevocation.ALL_TOKENS, time.time())
         if resp.status_code == 204:
             return True
         else:
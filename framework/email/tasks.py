@@ -2,6 +2,8 @@ import smtplib
 import logging
 from email.mime.text import MIMEText
 
+from celery.exceptions import MaxRetriesExceededError
+
 from framework.celery_tasks import app
 from framework import sentry
 from website import settings
@@ -58,18 +60,103 @@ def send_email(from_addr, to_addr, subject, message, ttls=True, login=True,
         )
 
 
-def _send_with_smtp(from_addr, to_addr, subject, message, ttls=True, login=True, username=None, password=None):
+@app.task(bind=True, max_retries=3, default_retry_delay=5 * 60)
+def send_emails(self, from_addr, messages, ttls=True, login=True, username=None, password=None, categories=None):
+    """Send many emails over a single connection to the mail server, or a single SendGrid
+    client, rather than one per email.
+
+    An email that fails to send is logged and does not stop the others. Emails that failed with
+    an error, rather than being refused, are retried by the task up to ``max_retries`` times.
+
+    :param from_addr: A string, the sender email
+    :param list messages: dicts with the ``to_addr``, ``subject`` and ``message`` of each email
+    :param tuple categories: SendGrid categories of all the emails, see `send_email`
+    :return: The number of emails sent
+    """
+    if not settings.USE_EMAIL:
+        return
+    if settings.SENDGRID_API_KEY:
+        sent, failed = _send_all_with_sendgrid(from_addr, messages, categories=categories)
+    else:
+        sent, failed = _send_all_with_smtp(
+            from_addr, messages, ttls=ttls, login=login, username=username, password=password,
+        )
+
+    if failed and not self.request.called_directly:
+        try:
+            self.retry(kwargs=dict(
+                from_addr=from_addr, messages=failed, ttls=ttls, login=login,
+                username=username, password=password, categories=categories,
+            ))
+        except MaxRetriesExceededError:
+            logger.error('Gave up sending {} emails'.format(len(failed)))
+    return sent
+
+
+def _send_all_with_sendgrid(from_addr, messages, categories=None):
+    """Send ``messages`` with one SendGrid client and return the number sent and the messages
+    that failed with an error
+    """
+    client = sendgrid.SendGridClient(settings.SENDGRID_API_KEY)
+    sent = 0
+    failed = []
+    for message in messages:
+        try:
+            sent += bool(_send_with_sendgrid(from_addr=from_addr, categories=categories, client=client, **message))
+        except Exception:
+            logger.exception('Could not send email to {}'.format(message['to_addr']))
+            failed.append(message)
+    return sent, failed
+
+
+def _send_all_with_smtp(from_addr, messages, **connection_kwargs):
+    """Send ``messages`` over one connection to the mail server and return the number sent and
+    the messages that failed with an error. The connection is reopened after an error.
+    """
+    smtp = None
+    sent = 0
+    failed = []
+    for i, message in enumerate(messages):
+        if smtp is None:
+            try:
+                smtp = _smtp_connection(**connection_kwargs)
+            except (smtplib.SMTPException, OSError):
+                logger.exception('Could not connect to the mail server')
+                failed.extend(messages[i:])
+                break
+            if smtp is None:
+                break
+        try:
+            _send_with_smtp(from_addr=from_addr, connection=smtp, **message)
+        except smtplib.SMTPRecipientsRefused:
+            logger.exception('Mail server refused recipient {}'.format(message['to_addr']))
+        except Exception:
+            logger.exception('Could not send email to {}'.format(message['to_addr']))
+            failed.append(message)
+            _close_smtp_connection(smtp)
+            smtp = None
+        else:
+            sent += 1
+    if smtp is not None:
+        _close_smtp_connection(smtp)
+    return sent, failed
+
+
+def _close_smtp_connection(smtp):
+    try:
+        smtp.quit()
+    except (smtplib.SMTPException, OSError):
+        smtp.close()
+
+
+def _smtp_connection(ttls=True, login=True, username=None, password=None):
+    """An open connection to the mail server, or None if its credentials are not set"""
     username = username or settings.MAIL_USERNAME
     password = password or settings.MAIL_PASSWORD
 
     if login and (username is None or password is None):
         logger.error('Mail username and password not set; skipping send.')
-        return
-
-    msg = MIMEText(message, 'html', _charset='utf-8')
-    msg['Subject'] = subject
-    msg['From'] = from_addr
-    msg['To'] = to_addr
+        return None
 
     s = smtplib.SMTP(settings.MAIL_SERVER)
     s.ehlo()
@@ -78,12 +165,26 @@ def _send_with_smtp(from_addr, to_addr, subject, message, ttls=True, login=True,
         s.ehlo()
     if login:
         s.login(username, password)
+    return s
+
+
+def _send_with_smtp(from_addr, to_addr, subject, message, ttls=True, login=True, username=None, password=None, connection=None):
+    s = connection or _smtp_connection(ttls=ttls, login=login, username=username, password=password)
+    if s is None:
+        return
+
+    msg = MIMEText(message, 'html', _charset='utf-8')
+    msg['Subject'] = subject
+    msg['From'] = from_addr
+    msg['To'] = to_addr
+
     s.sendmail(
         from_addr=from_addr,
         to_addrs=[to_addr],
         msg=msg.as_string()
     )
-    s.quit()
+    if connection is None:
+        s.quit()
     return True
 
 
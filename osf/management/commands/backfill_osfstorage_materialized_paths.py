@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from addons.osfstorage.models import OsfStorageFolder
+
+logger = logging.getLogger(__name__)
+
+
+def backfill_materialized_paths(page_size=1000, dry_run=False):
+    """Store the materialized path of every osfstorage file node that was saved before paths were
+    persisted, one root folder (and its whole file tree) at a time.
+    """
+    roots = OsfStorageFolder.objects.filter(is_root=True).exclude(_materialized_path__endswith='/')
+    total = 0
+    with transaction.atomic():
+        for root in roots.order_by('id')[:page_size]:
+            # Saving the root stores its path and rewrites the paths of everything under it
+            root.save()
+            total += 1
+        logger.info('Backfilled materialized paths under {} root folders'.format(total))
+        if dry_run:
+            raise RuntimeError('Dry run, transaction rolled back.')
+    return total
+
+
+class Command(BaseCommand):
+    help = '''Stores materialized paths for osfstorage files and folders created before they were persisted.
+    Run repeatedly until no root folders are left to backfill.'''
+
+    def add_arguments(self, parser):
+        super(Command, self).add_arguments(parser)
+        parser.add_argument(
+            '--dry',
+            action='store_true',
+            dest='dry_run',
+            help='Run migration and roll back changes to db',
+        )
+        parser.add_argument(
+            '--page_size',
+            type=int,
+            default=1000,
+            help='How many root folders to process at a time',
+        )
+
+    def handle(self, *args, **options):
+        backfill_materialized_paths(page_size=options['page_size'], dry_run=options['dry_run'])
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from addons.wiki.models import WikiVersion
+
+logger = logging.getLogger(__name__)
+
+
+def backfill_wiki_rendered_text(page_size=1000, dry_run=False):
+    """Store the rendered HTML and text of wiki versions that were saved before they were persisted,
+    most recent versions first, since those are the ones viewed and indexed.
+    """
+    versions = WikiVersion.objects.filter(
+        rendered_html__isnull=True, wiki_page__node__isnull=False
+    ).select_related('wiki_page__node').order_by('-id')
+    total = 0
+    with transaction.atomic():
+        for version in versions[:page_size]:
+            version.render()
+            total += 1
+        logger.info('Rendered {} wiki versions'.format(total))
+        if dry_run:
+            raise RuntimeError('Dry run, transaction rolled back.')
+    return total
+
+
+class Command(BaseCommand):
+    help = '''Stores the rendered HTML and text of wiki versions saved before they were persisted.
+    Run repeatedly until no versions are left to backfill.'''
+
+    def add_arguments(self, parser):
+        super(Command, self).add_arguments(parser)
+        parser.add_argument(
+            '--dry',
+            action='store_true',
+            dest='dry_run',
+            help='Run migration and roll back changes to db',
+        )
+        parser.add_argument(
+            '--page_size',
+            type=int,
+            default=1000,
+            help='How many wiki versions to render at a time',
+        )
+
+    def handle(self, *args, **options):
+        backfill_wiki_rendered_text(page_size=options['page_size'], dry_run=options['dry_run'])
@@ -0,0 +1,23 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from framework.celery_tasks import app as celery_app
+from osf.models import ThrottleCounter
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name='management.commands.delete_expired_throttle_counters')
+def delete_expired_throttle_counters():
+    """Delete the API throttle counters of keys that made no request since their window ended"""
+    deleted = ThrottleCounter.delete_expired(int(time.time()))
+    logger.info('Deleted {} expired throttle counters'.format(deleted))
+    return deleted
+
+
+class Command(BaseCommand):
+
+    def handle(self, *args, **options):
+        delete_expired_throttle_counters()
@@ -0,0 +1,59 @@
+"""
+Add the fields of ES metrics classes to the mappings of their existing indices
+"""
+import logging
+
+from django.core.management.base import BaseCommand
+from elasticsearch.exceptions import RequestError
+from elasticsearch_dsl import connections
+from elasticsearch_metrics.registry import registry
+
+logger = logging.getLogger(__name__)
+
+
+def put_metric_mappings(dry_run=False):
+    """`sync_metrics` only updates index templates, which apply to indices created afterwards, so
+    fields added to a metric class are mapped dynamically in the current year's index until it rolls
+    over. Put the mappings of every metric class on its existing indices instead. New fields can be
+    added this way, changed ones cannot and need `reindex_es6`.
+
+    :return list: Names of the metric classes whose mappings could not be updated
+    """
+    client = connections.get_connection()
+    failed = []
+    for app_label, app_metrics in registry.all_metrics.items():
+        for model_name, metric_class in app_metrics.items():
+            # Indices are named {app_label}_{model_name}_{date}, see reindex_es6
+            pattern = '{}_{}_*'.format(app_label, model_name)
+            for doc_type, mapping in metric_class._index.to_dict()['mappings'].items():
+                if dry_run:
+                    logger.info('[DRY RUN] Would put the {} mapping on {}'.format(metric_class.__name__, pattern))
+                    continue
+                try:
+                    client.indices.put_mapping(
+                        doc_type=doc_type,
+                        body=mapping,
+                        index=pattern,
+                        allow_no_indices=True,
+                        ignore_unavailable=True,
+                    )
+                except RequestError as e:
+                    logger.error('Could not put the {} mapping, reindex its indices: {}'.format(metric_class.__name__, e))
+                    failed.append(metric_class.__name__)
+                else:
+                    logger.info('Put the {} mapping on {}'.format(metric_class.__name__, pattern))
+    return failed
+
+
+class Command(BaseCommand):
+    def add_arguments(self, parser):
+        super(Command, self).add_arguments(parser)
+        parser.add_argument(
+            '--dry',
+            action='store_true',
+            dest='dry_run',
+            help='Log the mappings that would be updated',
+        )
+
+    def handle(self, *args, **options):
+        put_metric_mappings(dry_run=options.get('dry_run', False))
@@ -21,6 +21,8 @@ class Command(BaseCommand):
         ]
         if waffle.switch_is_active(features.ELASTICSEARCH_METRICS):
             COMMANDS.append(['sync_metrics'])
+            # Templates only apply to new indices, add new fields to the existing ones
+            COMMANDS.append(['put_metric_mappings'])
 
         for check in COMMANDS:
             call_command(*check)
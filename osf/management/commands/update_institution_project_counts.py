@@ -1,52 +1,123 @@
 import datetime as dt
+import logging
+import multiprocessing
 
+from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import connection, connections as db_connections
+from elasticsearch_dsl import connections as es_connections
 
+from api.base.settings import DEFAULT_ES_NULL_VALUE
 from framework.celery_tasks import app as celery_app
 from osf.metrics import InstitutionProjectCounts, UserInstitutionProjectCounts
-from osf.models import Institution, Node
+from osf.models import Institution
 
+logger = logging.getLogger(__name__)
 
-@celery_app.task(name='management.commands.update_institution_project_counts')
-def update_institution_project_counts():
-    now = dt.datetime.now()
+# Public and private top level projects affiliated with an institution that each user of the
+# institution can read, through contributorship or group membership
+USER_PROJECT_COUNTS_SQL = """
+    SELECT
+      UI.osfuser_id,
+      COUNT(DISTINCT N.id) FILTER (WHERE N.is_public),
+      COUNT(DISTINCT N.id) FILTER (WHERE NOT N.is_public)
+    FROM osf_osfuser_affiliated_institutions AS UI
+      JOIN osf_osfuser_groups AS UG ON UG.osfuser_id = UI.osfuser_id
+      JOIN osf_nodegroupobjectpermission AS G ON G.group_id = UG.group_id
+      JOIN auth_permission AS P ON P.id = G.permission_id
+      JOIN osf_abstractnode_affiliated_institutions AS NI
+        ON NI.abstractnode_id = G.content_object_id AND NI.institution_id = UI.institution_id
+      JOIN osf_abstractnode AS N ON N.id = NI.abstractnode_id
+    WHERE UI.institution_id = %s
+      AND P.codename = 'read_node'
+      AND N.type = 'osf.node'
+      AND N.is_deleted = FALSE
+      AND NOT EXISTS (SELECT 1 FROM osf_noderelation AS R WHERE R.child_id = N.id)
+    GROUP BY UI.osfuser_id;
+"""
+
+
+def get_user_project_counts(institution):
+    """Return a dict mapping the id of each user of ``institution`` that can read any of its
+    projects to the (public, private) numbers of those projects.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(USER_PROJECT_COUNTS_SQL, [institution.id])
+        return {user_id: (public, private) for user_id, public, private in cursor.fetchall()}
 
-    for institution in Institution.objects.all():
 
-        institution_public_projects_qs = institution.nodes.filter(type='osf.node', parent_nodes=None, is_public=True, is_deleted=False)
-        institution_private_projects_qs = institution.nodes.filter(type='osf.node', parent_nodes=None, is_public=False, is_deleted=False)
+def update_project_counts_for_institution(institution_id, now):
+    institution = Institution.objects.get(id=institution_id)
+    institution_projects_qs = institution.nodes.filter(type='osf.node', parent_nodes=None, is_deleted=False)
 
-        institution_public_projects_count = institution_public_projects_qs.count()
-        institution_private_projects_count = institution_private_projects_qs.count()
+    InstitutionProjectCounts.record_institution_project_counts(
+        institution=institution,
+        public_project_count=institution_projects_qs.filter(is_public=True).count(),
+        private_project_count=institution_projects_qs.filter(is_public=False).count(),
+        timestamp=now
+    )
 
-        InstitutionProjectCounts.record_institution_project_counts(
-            institution=institution,
-            public_project_count=institution_public_projects_count,
-            private_project_count=institution_private_projects_count,
-            timestamp=now
+    user_project_counts = get_user_project_counts(institution)
+    indexed = UserInstitutionProjectCounts.bulk_record(
+        dict(
+            user_id=user._id,
+            institution_id=institution._id,
+            department=getattr(user, 'department', DEFAULT_ES_NULL_VALUE),
+            user_name=user.fullname,
+            public_project_count=user_project_counts.get(user.id, (0, 0))[0],
+            private_project_count=user_project_counts.get(user.id, (0, 0))[1],
+            timestamp=now,
         )
+        for user in institution.osfuser_set.all()
+    )
+    logger.info('Recorded project counts of {} users of {}'.format(indexed, institution._id))
+    return indexed
 
-        for user in institution.osfuser_set.all():
-            user_public_project_count = Node.objects.get_nodes_for_user(
-                user=user,
-                base_queryset=institution_public_projects_qs
-            ).count()
 
-            user_private_project_count = Node.objects.get_nodes_for_user(
-                user=user,
-                base_queryset=institution_private_projects_qs
-            ).count()
+def _init_worker():
+    # Each worker process opens its own database and elastic connections
+    db_connections.close_all()
+    es_connections.create_connection(**settings.ELASTICSEARCH_DSL['default'])
 
-            UserInstitutionProjectCounts.record_user_institution_project_counts(
-                user=user,
-                institution=institution,
-                public_project_count=user_public_project_count,
-                private_project_count=user_private_project_count,
-                timestamp=now
-            )
+
+def _update_project_counts_for_institution(args):
+    return update_project_counts_for_institution(*args)
+
+
+@celery_app.task(name='management.commands.update_institution_project_counts')
+def update_institution_project_counts(workers=1):
+    """Record the project counts of every institution and of each of their users.
+
+    :param int workers: Number of processes recording institutions in parallel. Celery workers
+        cannot start processes, so the scheduled task records them one at a time.
+    """
+    now = dt.datetime.now()
+    tasks = [(institution_id, now) for institution_id in Institution.objects.values_list('id', flat=True)]
+
+    if workers > 1:
+        db_connections.close_all()
+        pool = multiprocessing.Pool(workers, initializer=_init_worker)
+        try:
+            for _ in pool.imap_unordered(_update_project_counts_for_institution, tasks):
+                pass
+        finally:
+            pool.terminate()
+            pool.join()
+    else:
+        for task in tasks:
+            _update_project_counts_for_institution(task)
 
 
 class Command(BaseCommand):
 
+    def add_arguments(self, parser):
+        super(Command, self).add_arguments(parser)
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of processes recording institutions in parallel',
+        )
+
     def handle(self, *args, **options):
-        update_institution_project_counts()
+        update_institution_project_counts(workers=options['workers'])
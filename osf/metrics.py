@@ -1,7 +1,17 @@
+import atexit
 import datetime as dt
+import logging
+import threading
+import uuid
+from collections import OrderedDict
 
 from elasticsearch.exceptions import NotFoundError
+from elasticsearch.helpers import bulk
+from elasticsearch_dsl import connections
+from elasticsearch_dsl.exceptions import ValidationException
 from elasticsearch_metrics import metrics
+from django.conf import settings
+from django.core.cache import caches
 from django.db import models
 from django.utils import timezone
 from osf.utils.workflows import RegistrationModerationTriggers, RegistrationModerationStates
@@ -10,6 +20,8 @@ import pytz
 
 from api.base.settings import MAX_SIZE_OF_ES_QUERY, DEFAULT_ES_NULL_VALUE
 
+logger = logging.getLogger(__name__)
+
 
 class MetricMixin(object):
 
@@ -25,11 +37,14 @@ class MetricMixin(object):
         ]
 
     @classmethod
-    def _get_id_to_count(cls, size, metric_field, count_field, after=None):
+    def _get_id_to_count(cls, size, metric_field, count_field, after=None, ids=None):
         """Performs the elasticsearch aggregation for get_top_by_count. Return a
         dict mapping ids to summed counts. If there's no data in the ES index, return None.
+        If ``ids`` are given, only those ids are counted.
         """
         search = cls.search(after=after)
+        if ids is not None:
+            search = search.filter('terms', **{metric_field: list(ids)})
         if after:
             search = search.filter('range', timestamp={'gte': after})
         search.aggs.\
@@ -54,6 +69,23 @@ class MetricMixin(object):
             for bucket in buckets
         }
 
+    @classmethod
+    def bulk_action(cls, **fields):
+        """The bulk API action indexing a document with ``fields``, as `record` would index it"""
+        document = cls(**fields)
+        document.timestamp = document.timestamp or timezone.now()
+        document.full_clean()
+        document.meta.index = cls.get_index_name(document.timestamp)
+        return document.to_dict(include_meta=True)
+
+    @classmethod
+    def bulk_record(cls, documents):
+        """Index a document for each dict of fields in ``documents`` with the bulk API, rather
+        than with one request each like `record`. Return the number of indexed documents.
+        """
+        indexed, _ = bulk(connections.get_connection(), (cls.bulk_action(**fields) for fields in documents))
+        return indexed
+
     # Overrides Document.search to only search relevant
     # indices, determined from `after`
     @classmethod
@@ -148,35 +180,62 @@ class BasePreprintMetric(MetricMixin, metrics.Metric):
         source = metrics.MetaField(enabled=True)
 
     @classmethod
-    def record_for_preprint(cls, preprint, user=None, **kwargs):
+    def record_for_preprint(cls, preprint, user=None, buffered=False, **kwargs):
+        """Record a view or download of ``preprint``. If ``buffered``, the event is added to the
+        metrics buffer of the process instead of being sent to elastic right away, and None is
+        returned, see `MetricsBuffer`.
+        """
         count = kwargs.pop('count', 1)
-        return cls.record(
+        fields = dict(
             count=count,
             preprint_id=preprint._id,
             user_id=getattr(user, '_id', None),
             provider_id=preprint.provider._id,
             **kwargs
         )
+        if buffered:
+            metrics_buffer.add(cls, **fields)
+            return None
+        return cls.record(**fields)
 
     @classmethod
     def get_count_for_preprint(cls, preprint, after=None):
-        search = cls.search(after=after).filter('match', preprint_id=preprint._id)
+        return cls.get_counts_for_preprints([preprint._id], after=after)[preprint._id]
+
+    @classmethod
+    def get_counts_for_preprints(cls, preprint_ids, after=None):
+        """Return a dict mapping each of ``preprint_ids`` to its summed count since ``after``,
+        counting uncached preprints with a single aggregation.
+
+        Counts are cached for PREPRINT_METRICS_CACHE_TIMEOUT seconds. ``after`` is rounded down
+        to the minute, so that windows requested within the same minute share cached counts.
+        """
         if after:
-            search = search.filter('range', timestamp={'gte': after})
-        search.aggs.metric('sum_count', 'sum', field='count')
-        # Optimization: set size to 0 so that hits aren't returned (we only care about the aggregation)
-        search = search.extra(size=0)
-        try:
-            response = search.execute()
-        except NotFoundError:
-            # _get_relevant_indices returned 1 or more indices
-            # that doesn't exist. Fall back to unoptimized query
-            search = search.index().index(cls._default_index())
-            response = search.execute()
-        # No indexed data
-        if not hasattr(response.aggregations, 'sum_count'):
-            return 0
-        return int(response.aggregations.sum_count.value)
+            after = after.replace(second=0, microsecond=0)
+        cache = caches[settings.PREPRINT_METRICS_CACHE_NAME]
+        keys = {
+            preprint_id: 'preprint_metrics:{}:{}:{}'.format(cls.__name__, preprint_id, after.isoformat() if after else 'total')
+            for preprint_id in preprint_ids
+        }
+        cached = cache.get_many(list(keys.values()))
+        counts = {preprint_id: cached[key] for preprint_id, key in keys.items() if key in cached}
+
+        missing = [preprint_id for preprint_id in keys if preprint_id not in counts]
+        if missing:
+            id_to_count = cls._get_id_to_count(
+                size=len(missing),
+                metric_field='preprint_id',
+                count_field='count',
+                after=after,
+                ids=missing,
+            ) or {}
+            fetched = {preprint_id: id_to_count.get(preprint_id, 0) for preprint_id in missing}
+            cache.set_many(
+                {keys[preprint_id]: count for preprint_id, count in fetched.items()},
+                timeout=settings.PREPRINT_METRICS_CACHE_TIMEOUT,
+            )
+            counts.update(fetched)
+        return counts
 
 
 class PreprintView(BasePreprintMetric):
@@ -187,10 +246,137 @@ class PreprintDownload(BasePreprintMetric):
     pass
 
 
+class ThrottleEvent(MetricMixin, metrics.Metric):
+    """Requests checked by an API throttle class, summed per day by the metrics buffer.
+    ``throttled`` is whether the requests were rejected.
+    """
+    count = metrics.Integer(doc_values=True, index=True, required=True)
+    throttle = metrics.Keyword(index=True, doc_values=True, required=True)
+    throttled = metrics.Boolean(index=True, doc_values=True, required=True)
+
+    class Index:
+        settings = {
+            'number_of_shards': 1,
+            'number_of_replicas': 1,
+            'refresh_interval': '1s',
+        }
+
+    class Meta:
+        source = metrics.MetaField(enabled=True)
+
+    @classmethod
+    def record_for_throttle(cls, throttle_class, throttled):
+        metrics_buffer.add(cls, throttle=throttle_class.__name__, throttled=throttled)
+
+
+class MetricsBuffer(object):
+    """Metric events recorded by this process that are waiting to be sent to elastic in bulk.
+
+    Events of a metric with the same fields on the same day are summed into one document with
+    the total `count`. The buffer is sent once it holds ``METRICS_BUFFER_SIZE`` documents, by a
+    timer ``METRICS_BUFFER_MAX_AGE`` seconds after its oldest event was added, and when the
+    process exits. Buffers are sent by a celery task, so that requests do not wait on elastic,
+    or right away when celery is not used. Each document is given an id when the buffer is sent,
+    so that a retried task overwrites the documents it already indexed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._documents = OrderedDict()
+        self._timer = None
+
+    def __len__(self):
+        return len(self._documents)
+
+    def add(self, metric_class, **fields):
+        count = fields.pop('count', 1)
+        timestamp = fields.pop('timestamp', None) or timezone.now()
+        key = (metric_class.__name__, timestamp.date(), tuple(sorted(fields.items())))
+        with self._lock:
+            if key in self._documents:
+                self._documents[key]['count'] += count
+            else:
+                self._documents[key] = dict(
+                    fields,
+                    metric=metric_class.__name__,
+                    count=count,
+                    timestamp=timestamp.isoformat(),
+                )
+            # A timer started before the process was forked is not running in the child
+            if self._timer is None or not self._timer.is_alive():
+                self._timer = threading.Timer(settings.METRICS_BUFFER_MAX_AGE, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+            full = len(self._documents) >= settings.METRICS_BUFFER_SIZE
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Send the buffered documents to elastic and empty the buffer"""
+        with self._lock:
+            documents = [
+                dict(document, id=uuid.uuid4().hex)
+                for document in self._documents.values()
+            ]
+            self._documents = OrderedDict()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not documents:
+            return
+        from framework.analytics.tasks import send_buffered_metrics
+        from website import settings as website_settings
+        try:
+            if website_settings.USE_CELERY:
+                send_buffered_metrics.delay(documents)
+            else:
+                send_buffered_metrics(documents)
+        except Exception:
+            logger.exception('Could not send {} buffered metric documents'.format(len(documents)))
+
+
+def send_metric_documents(documents):
+    """Index documents of buffered metric events in bulk, see `MetricsBuffer`
+
+    Invalid documents are logged and skipped, so that they do not keep the others from being sent.
+
+    :param list documents: Dicts of the fields of each document, with its id and the name of its metric
+    :return int: Number of indexed documents
+    """
+    actions = []
+    for fields in documents:
+        fields = dict(fields)
+        document_id = fields.pop('id')
+        metric_class = BUFFERED_METRICS[fields.pop('metric')]
+        try:
+            action = metric_class.bulk_action(**fields)
+        except ValidationException:
+            logger.exception('Invalid buffered metric document {}: {}'.format(document_id, fields))
+            continue
+        action['_id'] = document_id
+        actions.append(action)
+    if not actions:
+        return 0
+    indexed, _ = bulk(connections.get_connection(), actions)
+    return indexed
+
+
+BUFFERED_METRICS = {
+    metric_class.__name__: metric_class
+    for metric_class in (PreprintView, PreprintDownload, ThrottleEvent)
+}
+
+metrics_buffer = MetricsBuffer()
+atexit.register(metrics_buffer.flush)
+
+
 class UserInstitutionProjectCounts(MetricMixin, metrics.Metric):
     user_id = metrics.Keyword(index=True, doc_values=True, required=True)
     institution_id = metrics.Keyword(index=True, doc_values=True, required=True)
     department = metrics.Keyword(index=True, doc_values=True, required=False)
+    # The user's name when the counts were recorded, so that results can be sorted by name in
+    # elasticsearch and listed without loading the users
+    user_name = metrics.Keyword(index=True, doc_values=True, required=False)
     public_project_count = metrics.Integer(index=True, doc_values=True, required=True)
     private_project_count = metrics.Integer(index=True, doc_values=True, required=True)
 
@@ -265,6 +451,7 @@ class UserInstitutionProjectCounts(MetricMixin, metrics.Metric):
             user_id=user._id,
             institution_id=institution._id,
             department=getattr(user, 'department', DEFAULT_ES_NULL_VALUE),
+            user_name=user.fullname,
             public_project_count=public_project_count,
             private_project_count=private_project_count,
             **kwargs
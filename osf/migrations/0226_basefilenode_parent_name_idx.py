@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    atomic = False  # CREATE INDEX CONCURRENTLY cannot be run in a txn
+
+    dependencies = [
+        ('osf', '0225_auto_20201119_2027'),
+    ]
+
+    operations = [
+        migrations.RunSQL([
+            'CREATE INDEX CONCURRENTLY basefilenode_parent_name_idx ON osf_basefilenode (parent_id, name, id);',
+        ], [
+            'DROP INDEX IF EXISTS basefilenode_parent_name_idx, RESTRICT;'
+        ])
+    ]
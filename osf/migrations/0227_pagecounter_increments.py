@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django_extensions.db.fields
+import osf.models.base
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('osf', '0226_basefilenode_parent_name_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyPageCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', django_extensions.db.fields.CreationDateTimeField(auto_now_add=True, verbose_name='created')),
+                ('modified', django_extensions.db.fields.ModificationDateTimeField(auto_now=True, verbose_name='modified')),
+                ('date', models.DateField()),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('unique', models.PositiveIntegerField(default=0)),
+                ('page_counter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_counters', to='osf.PageCounter')),
+            ],
+            bases=(models.Model, osf.models.base.QuerySetExplainMixin),
+        ),
+        migrations.CreateModel(
+            name='PageCounterIncrement',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', django_extensions.db.fields.CreationDateTimeField(auto_now_add=True, verbose_name='created')),
+                ('modified', django_extensions.db.fields.ModificationDateTimeField(auto_now=True, verbose_name='modified')),
+                ('date', models.DateField()),
+                ('total', models.PositiveSmallIntegerField(default=0)),
+                ('unique', models.PositiveSmallIntegerField(default=0)),
+                ('date_total', models.PositiveSmallIntegerField(default=0)),
+                ('date_unique', models.PositiveSmallIntegerField(default=0)),
+                ('page_counter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='increments', to='osf.PageCounter')),
+            ],
+            options={
+                'abstract': False,
+            },
+            bases=(models.Model, osf.models.base.QuerySetExplainMixin),
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailypagecounter',
+            unique_together=set([('page_counter', 'date')]),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django_extensions.db.fields
+import osf.models.base
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('osf', '0228_nodeclosure'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchQueueEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', django_extensions.db.fields.CreationDateTimeField(auto_now_add=True, verbose_name='created')),
+                ('modified', django_extensions.db.fields.ModificationDateTimeField(auto_now=True, verbose_name='modified')),
+                ('doc_type', models.CharField(choices=[('node', 'node'), ('node_files', 'node_files'), ('preprint', 'preprint'), ('user', 'user'), ('group', 'group')], max_length=16)),
+                ('object_id', models.PositiveIntegerField()),
+            ],
+            options={
+                'abstract': False,
+            },
+            bases=(models.Model, osf.models.base.QuerySetExplainMixin),
+        ),
+        migrations.AlterUniqueTogether(
+            name='searchqueueentry',
+            unique_together=set([('doc_type', 'object_id')]),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django_extensions.db.fields
+import osf.models.base
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('osf', '0229_searchqueueentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchReindexCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', django_extensions.db.fields.CreationDateTimeField(auto_now_add=True, verbose_name='created')),
+                ('modified', django_extensions.db.fields.ModificationDateTimeField(auto_now=True, verbose_name='modified')),
+                ('index', models.CharField(max_length=255)),
+                ('name', models.CharField(max_length=64)),
+                ('page_start', models.PositiveIntegerField()),
+                ('page_end', models.PositiveIntegerField()),
+                ('documents', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'abstract': False,
+            },
+            bases=(models.Model, osf.models.base.QuerySetExplainMixin),
+        ),
+        migrations.AlterUniqueTogether(
+            name='searchreindexcheckpoint',
+            unique_together=set([('index', 'name', 'page_start')]),
+        ),
+    ]
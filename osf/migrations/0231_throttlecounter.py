@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('osf', '0230_searchreindexcheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThrottleCounter',
+            fields=[
+                ('key', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('window_end', models.BigIntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        # Counters are rewritten on every API request and can be lost without harm
+        migrations.RunSQL(
+            'ALTER TABLE osf_throttlecounter SET UNLOGGED;',
+            'ALTER TABLE osf_throttlecounter SET LOGGED;',
+        ),
+    ]
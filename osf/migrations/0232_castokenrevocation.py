@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('osf', '0231_throttlecounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CasTokenRevocation',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('revoked_at', models.FloatField()),
+            ],
+        ),
+    ]
@@ -18,7 +18,7 @@ from osf.models.citation import CitationStyle  # noqa
 from osf.models.archive import ArchiveJob, ArchiveTarget  # noqa
 from osf.models.queued_mail import QueuedMail  # noqa
 from osf.models.external import ExternalAccount, ExternalProvider  # noqa
-from osf.models.oauth import ApiOAuth2Application, ApiOAuth2PersonalToken, ApiOAuth2Scope  # noqa
+from osf.models.oauth import ApiOAuth2Application, ApiOAuth2PersonalToken, ApiOAuth2Scope, CasTokenRevocation  # noqa
 from osf.models.osf_group import OSFGroup  # noqa
 from osf.models.osf_grouplog import OSFGroupLog  # noqa
 from osf.models.licenses import NodeLicense, NodeLicenseRecord  # noqa
@@ -37,8 +37,11 @@ from osf.models.files import (  # noqa
     FileVersion, TrashedFile, TrashedFileNode, TrashedFolder, FileVersionUserMetadata,  # noqa
 )  # noqa
 from osf.models.metadata import FileMetadataRecord  # noqa
-from osf.models.node_relation import NodeRelation  # noqa
-from osf.models.analytics import UserActivityCounter, PageCounter  # noqa
+from osf.models.node_relation import NodeRelation, NodeClosure  # noqa
+from osf.models.analytics import UserActivityCounter, PageCounter, PageCounterIncrement, DailyPageCounter  # noqa
+from osf.models.search_queue import SearchQueueEntry  # noqa
+from osf.models.search_reindex import SearchReindexCheckpoint  # noqa
+from osf.models.throttle import ThrottleCounter  # noqa
 from osf.models.admin_profile import AdminProfile  # noqa
 from osf.models.admin_log_entry import AdminLogEntry  # noqa
 from osf.models.maintenance_state import MaintenanceState  # noqa
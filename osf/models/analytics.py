@@ -1,8 +1,9 @@
 import logging
 
 from dateutil import parser
-from django.db import models, transaction
+from django.db import connection, models, transaction
 from django.db.models import Sum
+from django.db.models.functions import Coalesce
 from django.db.models.expressions import RawSQL
 from django.utils import timezone
 
@@ -86,7 +87,14 @@ class PageCounter(BaseModel):
         # aggregating the sum.
         daily_total = page_counters.annotate(daily_total=RawSQL("((date->%s->>'total')::int)", (formatted_date,))).aggregate(sum=Sum('daily_total'))['sum']
 
-        return daily_total
+        # Downloads counted since daily counts moved out of the date dict, flushed or still pending
+        download_counts = dict(page_counter__version__isnull=True, page_counter__action='download', date=date)
+        flushed_total = DailyPageCounter.objects.filter(**download_counts).aggregate(sum=Sum('total'))['sum']
+        pending_total = PageCounterIncrement.objects.filter(**download_counts).aggregate(sum=Sum('date_total'))['sum']
+
+        if daily_total is None and flushed_total is None and pending_total is None:
+            return None
+        return (daily_total or 0) + (flushed_total or 0) + (pending_total or 0)
 
     @staticmethod
     def clean_page(page):
@@ -98,6 +106,9 @@ class PageCounter(BaseModel):
 
     @classmethod
     def update_counter(cls, resource, file, version, action, node_info):
+        """Count a hit on a page. Hits are buffered as PageCounterIncrements, which are cheap inserts that
+        never wait on a lock, and added to the page counter by `flush_increments`.
+        """
         if version is not None:
             page = '{0}:{1}:{2}:{3}'.format(action, resource._id, file._id, version)
         else:
@@ -107,76 +118,133 @@ class PageCounter(BaseModel):
         date = timezone.now()
         date_string = date.strftime('%Y/%m/%d')
         visited_by_date = session.data.get('visited_by_date', {'date': date_string, 'pages': []})
-        with transaction.atomic():
-            # Temporary backwards compat - when creating new PageCounters, temporarily keep writing to _id field.
-            # After we're sure this is stable, we can stop writing to the _id field, and query on
-            # resource/file/action/version
-            model_instance, created = cls.objects.select_for_update().get_or_create(
-                _id=cleaned_page,
-                resource=resource,
-                file=file,
-                action=action,
-                version=version
-            )
-
-            # if they visited something today
-            if date_string == visited_by_date['date']:
-                # if they haven't visited this page today
-                if cleaned_page not in visited_by_date['pages']:
-                    # if the model_instance has today in it
-                    if date_string in model_instance.date.keys():
-                        # increment the number of unique visitors for today
-                        model_instance.date[date_string]['unique'] += 1
-                    else:
-                        # set the number of unique visitors for today to 1
-                        model_instance.date[date_string] = dict(unique=1)
-            # if they haven't visited something today
-            else:
-                # set their visited by date to blank
-                visited_by_date['date'] = date_string
-                visited_by_date['pages'] = []
-                # if the model_instance has today in it
-                if date_string in model_instance.date.keys():
-                    # increment the number of unique visitors for today
-                    model_instance.date[date_string]['unique'] += 1
-                else:
-                    # set the number of unique visitors to 1
-                    model_instance.date[date_string] = dict(unique=1)
 
-            # update their sessions
+        # Temporary backwards compat - when creating new PageCounters, temporarily keep writing to _id field.
+        # After we're sure this is stable, we can stop writing to the _id field, and query on
+        # resource/file/action/version
+        model_instance, created = cls.objects.get_or_create(
+            _id=cleaned_page,
+            resource=resource,
+            file=file,
+            action=action,
+            version=version
+        )
+        increment = PageCounterIncrement(page_counter=model_instance, date=date.date(), date_total=1)
+
+        # if they haven't visited something today, set their visited by date to blank
+        if date_string != visited_by_date['date']:
+            visited_by_date['date'] = date_string
+            visited_by_date['pages'] = []
+        # if they haven't visited this page today, they are a unique visitor for today
+        if cleaned_page not in visited_by_date['pages']:
+            increment.date_unique = 1
             visited_by_date['pages'].append(cleaned_page)
-            session.data['visited_by_date'] = visited_by_date
 
-            if date_string in model_instance.date.keys():
-                if 'total' not in model_instance.date[date_string].keys():
-                    model_instance.date[date_string].update(total=0)
-                model_instance.date[date_string]['total'] += 1
-            else:
-                model_instance.date[date_string] = dict(total=1)
+        # update their sessions
+        session.data['visited_by_date'] = visited_by_date
+
+        # if a download counter is being updated, only perform the update
+        # if the user who is downloading isn't a contributor to the project
+        page_type = cleaned_page.split(':')[0]
+        if page_type in ('download', 'view') and node_info:
+            if node_info['contributors'].filter(guids___id__isnull=False, guids___id=session.data.get('auth_user_id')).exists():
+                increment.save()
+                return
 
-            # if a download counter is being updated, only perform the update
-            # if the user who is downloading isn't a contributor to the project
-            page_type = cleaned_page.split(':')[0]
-            if page_type in ('download', 'view') and node_info:
-                if node_info['contributors'].filter(guids___id__isnull=False, guids___id=session.data.get('auth_user_id')).exists():
-                    model_instance.save()
-                    return
+        visited = session.data.get('visited', [])
+        if page not in visited:
+            increment.unique = 1
+            visited.append(page)
+            session.data['visited'] = visited
 
-            visited = session.data.get('visited', [])
-            if page not in visited:
-                model_instance.unique += 1
-                visited.append(page)
-                session.data['visited'] = visited
+        session.save()
+        increment.total = 1
 
-            session.save()
-            model_instance.total += 1
+        increment.save()
 
-            model_instance.save()
+    @classmethod
+    def flush_increments(cls, batch_size=10000):
+        """Add pending PageCounterIncrements to their PageCounters and DailyPageCounters with one bulk
+        update and upsert per batch, deleting them as they are applied. Increments locked by a
+        concurrent flush are skipped. Returns the number of increments flushed.
+        """
+        sql = """
+            WITH flushed AS (
+              DELETE FROM osf_pagecounterincrement
+              WHERE id IN (
+                SELECT id FROM osf_pagecounterincrement
+                ORDER BY id
+                LIMIT %(batch_size)s
+                FOR UPDATE SKIP LOCKED
+              )
+              RETURNING page_counter_id, date, total, "unique", date_total, date_unique
+            ), daily AS (
+              INSERT INTO osf_dailypagecounter (created, modified, page_counter_id, date, total, "unique")
+              SELECT now(), now(), page_counter_id, date, SUM(date_total), SUM(date_unique)
+              FROM flushed
+              GROUP BY page_counter_id, date
+              ON CONFLICT (page_counter_id, date) DO UPDATE
+              SET total = osf_dailypagecounter.total + EXCLUDED.total,
+                "unique" = osf_dailypagecounter."unique" + EXCLUDED."unique",
+                modified = EXCLUDED.modified
+            ), totals AS (
+              UPDATE osf_pagecounter AS PC
+              SET total = PC.total + F.total, "unique" = PC."unique" + F."unique", modified = now()
+              FROM (
+                SELECT page_counter_id, SUM(total) AS total, SUM("unique") AS "unique"
+                FROM flushed
+                GROUP BY page_counter_id
+              ) AS F
+              WHERE PC.id = F.page_counter_id
+              AND (F.total > 0 OR F."unique" > 0)
+            )
+            SELECT COUNT(*) FROM flushed;
+        """
+        flushed = 0
+        while True:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(sql, {'batch_size': batch_size})
+                count = cursor.fetchone()[0]
+            flushed += count
+            if count < batch_size:
+                return flushed
 
     @classmethod
     def get_basic_counters(cls, resource, file, version, action):
-        try:
-            counter = cls.objects.get(resource=resource, file=file, version=version, action=action)
-            return (counter.unique, counter.total)
-        except cls.DoesNotExist:
+        """Return (unique, total) for a page, including increments that have not been flushed yet"""
+        counter = cls.objects.filter(
+            resource=resource, file=file, version=version, action=action
+        ).annotate(
+            pending_unique=Coalesce(Sum('increments__unique'), 0),
+            pending_total=Coalesce(Sum('increments__total'), 0),
+        ).values_list('unique', 'total', 'pending_unique', 'pending_total').first()
+        if counter is None:
             return (None, None)
+        unique, total, pending_unique, pending_total = counter
+        return (unique + pending_unique, total + pending_total)
+
+
+class PageCounterIncrement(BaseModel):
+    """A single counted hit on a page, waiting to be added to its PageCounter"""
+    page_counter = models.ForeignKey(PageCounter, related_name='increments', on_delete=models.CASCADE)
+    date = models.DateField()
+
+    # Added to the page counter's totals
+    total = models.PositiveSmallIntegerField(default=0)
+    unique = models.PositiveSmallIntegerField(default=0)
+
+    # Added to the page counter's daily counts, which include contributors' hits
+    date_total = models.PositiveSmallIntegerField(default=0)
+    date_unique = models.PositiveSmallIntegerField(default=0)
+
+
+class DailyPageCounter(BaseModel):
+    """Hits on a page on one day. Replaces PageCounter.date, which holds counts from before these were kept."""
+    page_counter = models.ForeignKey(PageCounter, related_name='daily_counters', on_delete=models.CASCADE)
+    date = models.DateField()
+
+    total = models.PositiveIntegerField(default=0)
+    unique = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('page_counter', 'date')
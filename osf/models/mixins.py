@@ -42,6 +42,7 @@ from osf.utils.machines import (
     PreprintRequestMachine,
 )
 
+from osf.utils.permission_resolver import NodePermissionResolver
 from osf.utils.permissions import ADMIN, REVIEW_GROUPS, READ, WRITE
 from osf.utils.registrations import flatten_registration_metadata, expand_registration_responses
 from osf.utils.workflows import (
@@ -1874,13 +1875,13 @@ class ContributorMixin(models.Model):
         if not user or user.is_anonymous:
             return False
         perm = '{}_{}'.format(permission, object_type)
+        if object_type == 'node':
+            # Resolved along with implicit admin permissions from parents, and shared by
+            # every permission check on the node during the request
+            return NodePermissionResolver.get_current().has_permission(user, self, permission, check_parent=check_parent)
         # Using get_group_perms to get permissions that are inferred through
         # group membership - not inherited from superuser status
-        has_permission = perm in get_group_perms(user, self)
-        if object_type == 'node':
-            if not has_permission and permission == READ and check_parent:
-                return self.is_admin_parent(user)
-        return has_permission
+        return perm in get_group_perms(user, self)
 
     # TODO: Remove save parameter
     def add_permission(self, user, permission, save=False):
@@ -1905,7 +1906,11 @@ class ContributorMixin(models.Model):
             return []
         # If base_perms not on model, will error
         perms = self.base_perms
-        user_perms = sorted(set(get_group_perms(user, self)).intersection(perms), key=perms.index)
+        if self.guardian_object_type == 'node':
+            group_perms = NodePermissionResolver.get_current().get(user, self).perms
+        else:
+            group_perms = get_group_perms(user, self)
+        user_perms = sorted(set(group_perms).intersection(perms), key=perms.index)
         return [perm.split('_')[0] for perm in user_perms]
 
     def set_permissions(self, user, permissions, validate=True, save=False):
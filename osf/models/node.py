@@ -17,12 +17,11 @@ from django.contrib.contenttypes.fields import GenericRelation
 from django.core.paginator import Paginator
 from django.urls import reverse
 from django.db import models, connection
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 from django.utils import timezone
 from django.utils.functional import cached_property
 from keen import scoped_keys
-from psycopg2._psycopg import AsIs
 from typedmodels.models import TypedModel, TypedModelManager
 from include import IncludeManager
 from guardian.models import (
@@ -46,7 +45,7 @@ from osf.models.licenses import NodeLicenseRecord
 from osf.models.mixins import (AddonModelMixin, CommentableMixin, Loggable, GuardianMixin,
                                NodeLinkMixin, SpamOverrideMixin, RegistrationResponseMixin,
                                EditableFieldsMixin)
-from osf.models.node_relation import NodeRelation
+from osf.models.node_relation import NodeClosure, NodeRelation
 from osf.models.nodelog import NodeLog
 from osf.models.private_link import PrivateLink
 from osf.models.tag import Tag
@@ -55,6 +54,7 @@ from osf.models.validators import validate_title, validate_doi
 from framework.auth.core import Auth
 from osf.utils.datetime_aware_jsonfield import DateTimeAwareJSONField
 from osf.utils.fields import NonNaiveDateTimeField
+from osf.utils.permission_resolver import NodePermissionResolver
 from osf.utils.requests import get_request_and_user_id, string_type_request_headers
 from osf.utils import sanitize
 from website import language, settings
@@ -100,46 +100,13 @@ class AbstractNodeQuerySet(GuidMixinQuerySet):
                 query = query.filter(is_deleted=False)
             return query
         else:
-            sql = """
-                WITH RECURSIVE descendants AS (
-                SELECT
-                    parent_id,
-                    child_id,
-                    1 AS LEVEL,
-                    ARRAY[parent_id] as pids
-                FROM %s
-                %s
-                WHERE is_node_link IS FALSE AND parent_id = %s %s
-                UNION ALL
-                SELECT
-                    d.parent_id,
-                    s.child_id,
-                    d.level + 1,
-                    d.pids || s.parent_id
-                FROM descendants AS d
-                    JOIN %s AS s
-                    ON d.child_id = s.parent_id
-                WHERE s.is_node_link IS FALSE AND %s = ANY(pids)
-                ) SELECT array_agg(DISTINCT child_id)
-                FROM descendants
-                WHERE parent_id = %s;
-            """
-            with connection.cursor() as cursor:
-                node_relation_table = AsIs(NodeRelation._meta.db_table)
-                cursor.execute(sql, [
-                    node_relation_table,
-                    AsIs('LEFT JOIN osf_abstractnode ON {}.child_id = osf_abstractnode.id'.format(node_relation_table) if active else ''),
-                    root.pk,
-                    AsIs('AND osf_abstractnode.is_deleted IS FALSE' if active else ''),
-                    node_relation_table,
-                    root.pk,
-                    root.pk])
-                row = cursor.fetchone()[0]
-                if not row:
-                    return AbstractNode.objects.filter(id=root.pk) if include_root else AbstractNode.objects.none()
-                if include_root:
-                    row.append(root.pk)
-                return AbstractNode.objects.filter(id__in=row)
+            descendant_ids = NodeClosure.objects.filter(ancestor_id=root.pk).values('descendant_id')
+            query = AbstractNode.objects.filter(id__in=descendant_ids)
+            if include_root:
+                query = AbstractNode.objects.filter(Q(id__in=descendant_ids) | Q(id=root.pk))
+            if active:
+                query = query.filter(is_deleted=False)
+            return query
 
     def can_view(self, user=None, private_link=None):
         qs = self.filter(is_public=True)
@@ -157,23 +124,26 @@ class AbstractNodeQuerySet(GuidMixinQuerySet):
             qs |= read_user_query
             qs |= self.extra(where=["""
                 "osf_abstractnode".id in (
-                    WITH RECURSIVE implicit_read AS (
-                        SELECT N.id as node_id
-                        FROM osf_abstractnode as N, auth_permission as P, osf_nodegroupobjectpermission as G, osf_osfuser_groups as UG
-                        WHERE P.codename = 'admin_node'
-                        AND G.permission_id = P.id
-                        AND UG.osfuser_id = %s
-                        AND G.group_id = UG.group_id
-                        AND G.content_object_id = N.id
-                        AND N.type = 'osf.node'
-                    UNION ALL
-                        SELECT "osf_noderelation"."child_id"
-                        FROM "implicit_read"
-                        LEFT JOIN "osf_noderelation" ON "osf_noderelation"."parent_id" = "implicit_read"."node_id"
-                        WHERE "osf_noderelation"."is_node_link" IS FALSE
-                    ) SELECT * FROM implicit_read
+                    SELECT N.id
+                    FROM osf_abstractnode as N, auth_permission as P, osf_nodegroupobjectpermission as G, osf_osfuser_groups as UG
+                    WHERE P.codename = 'admin_node'
+                    AND G.permission_id = P.id
+                    AND UG.osfuser_id = %s
+                    AND G.group_id = UG.group_id
+                    AND G.content_object_id = N.id
+                    AND N.type = 'osf.node'
+                UNION ALL
+                    SELECT C.descendant_id
+                    FROM osf_abstractnode as N, auth_permission as P, osf_nodegroupobjectpermission as G, osf_osfuser_groups as UG, osf_nodeclosure as C
+                    WHERE P.codename = 'admin_node'
+                    AND G.permission_id = P.id
+                    AND UG.osfuser_id = %s
+                    AND G.group_id = UG.group_id
+                    AND G.content_object_id = N.id
+                    AND N.type = 'osf.node'
+                    AND C.ancestor_id = N.id
                 )
-            """], params=(user.id, ))
+            """], params=(user.id, user.id))
         return qs.filter(is_deleted=False)
 
 
@@ -285,25 +255,16 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
     PRIVATE = 'private'
     PUBLIC = 'public'
 
-    LICENSE_QUERY = re.sub(r'\s+', ' ', """WITH RECURSIVE ascendants AS (
-            SELECT
-                N.node_license_id,
-                R.parent_id
-            FROM "{noderelation}" AS R
-                JOIN "{abstractnode}" AS N ON N.id = R.parent_id
-            WHERE R.is_node_link IS FALSE
-                AND R.child_id = %s
-        UNION ALL
-            SELECT
-                N.node_license_id,
-                R.parent_id
-            FROM ascendants AS D
-                JOIN "{noderelation}" AS R ON D.parent_id = R.child_id
-                JOIN "{abstractnode}" AS N ON N.id = R.parent_id
-            WHERE R.is_node_link IS FALSE
-            AND D.node_license_id IS NULL
-    ) SELECT {fields} FROM "{nodelicenserecord}"
-    WHERE id = (SELECT node_license_id FROM ascendants WHERE node_license_id IS NOT NULL) LIMIT 1;""")
+    LICENSE_QUERY = re.sub(r'\s+', ' ', """SELECT {fields} FROM "{nodelicenserecord}"
+    WHERE id = (
+        SELECT N.node_license_id
+        FROM "{nodeclosure}" AS C
+            JOIN "{abstractnode}" AS N ON N.id = C.ancestor_id
+        WHERE C.descendant_id = %s
+            AND N.node_license_id IS NOT NULL
+        ORDER BY C.depth
+        LIMIT 1
+    ) LIMIT 1;""")
 
     # Dictionary field mapping user id to a list of nodes in node.nodes which the user has subscriptions for
     # {<User.id>: [<Node._id>, <Node2._id>, ...] }
@@ -718,11 +679,11 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
             logger.exception(e)
             log_exception()
 
-    def update_search(self):
+    def update_search(self, saved_fields=None):
         from website import search
 
         try:
-            search.search.update_node(self, bulk=False, async_update=True)
+            search.search.update_node(self, bulk=False, async_update=True, saved_fields=saved_fields)
             if self.is_collected and self.is_public:
                 search.search.update_collected_metadata(self._id)
         except search.exceptions.SearchUnavailableError as e:
@@ -852,6 +813,10 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
                                     Useful for checking parent permissions for non-group actions like registrations.
         :return: bool Does the user have admin permissions on this object or its parents?
         """
+        if include_group_admin:
+            if not user or user.is_anonymous:
+                return False
+            return NodePermissionResolver.get_current().get(user, self).is_admin_parent
         if self.has_permission(user, ADMIN, check_parent=False):
             ret = True
             if not include_group_admin and not self.is_contributor(user):
@@ -879,9 +844,12 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
 
     @property
     def parents(self):
-        if self.parent_node:
-            return [self.parent_node] + self.parent_node.parents
-        return []
+        """Ancestor components, nearest first"""
+        ancestor_ids = list(
+            NodeClosure.objects.filter(descendant_id=self.id).order_by('depth').values_list('ancestor_id', flat=True)
+        )
+        ancestors = AbstractNode.objects.in_bulk(ancestor_ids)
+        return [ancestors[pk] for pk in ancestor_ids]
 
     def get_users_with_perm(self, permission):
         # Returns queryset of all User objects with a specific permission for the given node
@@ -936,14 +904,15 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
         return self._get_admin_user_ids()
 
     def _get_admin_user_ids(self, include_self=False):
-        def get_admin_user_ids(node):
-            return node.get_users_with_perm(ADMIN).values_list('guids___id', flat=True)
-
         contributor_ids = set(self.get_users_with_perm(READ).values_list('guids___id', flat=True))
-        admin_ids = set(get_admin_user_ids(self)) if include_self else set()
-        for parent in self.parents:
-            admins = get_admin_user_ids(parent)
-            admin_ids.update(set(admins).difference(contributor_ids))
+        admin_ids = set(self.get_users_with_perm(ADMIN).values_list('guids___id', flat=True)) if include_self else set()
+        # Admins on any ancestor, with a single query
+        parent_admin_groups = NodeGroupObjectPermission.objects.filter(
+            permission__codename=ADMIN_NODE,
+            content_object_id__in=NodeClosure.objects.filter(descendant_id=self.id).values('ancestor_id'),
+        ).values('group_id')
+        parent_admin_ids = OSFUser.objects.filter(groups__id__in=parent_admin_groups).values_list('guids___id', flat=True)
+        admin_ids.update(set(parent_admin_ids).difference(contributor_ids))
         return admin_ids
 
     @property
@@ -999,7 +968,7 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
         with connection.cursor() as cursor:
             cursor.execute(self.LICENSE_QUERY.format(
                 abstractnode=AbstractNode._meta.db_table,
-                noderelation=NodeRelation._meta.db_table,
+                nodeclosure=NodeClosure._meta.db_table,
                 nodelicenserecord=NodeLicenseRecord._meta.db_table,
                 fields=', '.join('"{}"."{}"'.format(NodeLicenseRecord._meta.db_table, f.column) for f in NodeLicenseRecord._meta.concrete_fields)
             ), [self.id])
@@ -1293,39 +1262,10 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
         return self.private_links.filter(is_deleted=True).values_list('key', flat=True)
 
     def get_root(self):
-        sql = """
-            WITH RECURSIVE ascendants AS (
-              SELECT
-                parent_id,
-                child_id,
-                1 AS LEVEL,
-                ARRAY[child_id] as cids
-              FROM %s
-              WHERE is_node_link IS FALSE and child_id = %s
-              UNION ALL
-              SELECT
-                S.parent_id,
-                D.child_id,
-                D.level + 1,
-                D.cids || S.child_id
-              FROM ascendants AS D
-                JOIN %s AS S
-                  ON D.parent_id = S.child_id
-              WHERE S.is_node_link IS FALSE
-                AND %s = ANY(cids)
-            ) SELECT parent_id
-              FROM ascendants
-              WHERE child_id = %s
-              ORDER BY level DESC
-              LIMIT 1;
-        """
-        with connection.cursor() as cursor:
-            node_relation_table = AsIs(NodeRelation._meta.db_table)
-            cursor.execute(sql, [node_relation_table, self.pk, node_relation_table, self.pk, self.pk])
-            res = cursor.fetchone()
-            if res:
-                return AbstractNode.objects.get(pk=res[0])
-            return self
+        root_id = NodeClosure.objects.filter(descendant_id=self.pk).order_by('-depth').values_list('ancestor_id', flat=True).first()
+        if root_id:
+            return AbstractNode.objects.get(pk=root_id)
+        return self
 
     def find_readable_antecedent(self, auth):
         """ Returns first antecendant node readable by <user>.
@@ -2486,3 +2426,13 @@ def set_parent_and_root(sender, instance, created, *args, **kwargs):
     if not instance.root:
         instance.root = instance.get_root()
         instance.save()
+
+
+@receiver(post_save, sender=NodeGroupObjectPermission)
+@receiver(post_delete, sender=NodeGroupObjectPermission)
+@receiver(post_save, sender=NodeRelation)
+@receiver(post_delete, sender=NodeRelation)
+@receiver(m2m_changed, sender=OSFUser.groups.through)
+def clear_node_permission_resolver(sender, *args, **kwargs):
+    """Forget node permissions resolved during this request once they may have changed"""
+    NodePermissionResolver.clear_current()
@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
 from .base import BaseModel, ObjectIDMixin
 
@@ -25,3 +27,70 @@ class NodeRelation(ObjectIDMixin, BaseModel):
         index_together = (
             ('is_node_link', 'child', 'parent'),
         )
+
+
+class NodeClosure(models.Model):
+    """Every (ancestor, descendant) pair of the component hierarchy, i.e. NodeRelations that are
+    not node links, with the number of levels between them. Lets ancestors and descendants be
+    read without walking osf_noderelation recursively.
+
+    Kept up to date with NodeRelations by `update_node_closure` and `remove_from_node_closure`.
+    """
+    ancestor = models.ForeignKey('AbstractNode', related_name='+', on_delete=models.CASCADE)
+    descendant = models.ForeignKey('AbstractNode', related_name='+', on_delete=models.CASCADE)
+    depth = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('ancestor', 'descendant')
+        index_together = (
+            ('descendant', 'depth'),
+        )
+
+    @classmethod
+    def relink(cls, node_id):
+        """Make the closure of the subtree rooted at ``node_id`` match its current parent: pairs
+        between the subtree and its previous ancestors are removed, pairs with the ancestors
+        through its parent component (if any) are added.
+        """
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("""
+                WITH subtree AS (
+                  SELECT %(node_id)s AS id
+                  UNION
+                  SELECT descendant_id FROM osf_nodeclosure WHERE ancestor_id = %(node_id)s
+                )
+                DELETE FROM osf_nodeclosure
+                WHERE descendant_id IN (SELECT id FROM subtree)
+                AND ancestor_id NOT IN (SELECT id FROM subtree);
+            """, {'node_id': node_id})
+            cursor.execute("""
+                INSERT INTO osf_nodeclosure (ancestor_id, descendant_id, depth)
+                SELECT A.ancestor_id, D.descendant_id, A.depth + D.depth + 1
+                FROM osf_noderelation AS R
+                  CROSS JOIN LATERAL (
+                    SELECT ancestor_id, depth FROM osf_nodeclosure WHERE descendant_id = R.parent_id
+                    UNION ALL
+                    SELECT R.parent_id, 0
+                  ) AS A
+                  CROSS JOIN LATERAL (
+                    SELECT descendant_id, depth FROM osf_nodeclosure WHERE ancestor_id = R.child_id
+                    UNION ALL
+                    SELECT R.child_id, 0
+                  ) AS D
+                WHERE R.child_id = %(node_id)s
+                AND R.is_node_link IS FALSE
+                ON CONFLICT (ancestor_id, descendant_id) DO NOTHING;
+            """, {'node_id': node_id})
+
+
+@receiver(post_save, sender=NodeRelation)
+def update_node_closure(sender, instance, created, **kwargs):
+    # Node links are not part of the hierarchy, but an existing relation may have just become one
+    if not (created and instance.is_node_link):
+        NodeClosure.relink(instance.child_id)
+
+
+@receiver(post_delete, sender=NodeRelation)
+def remove_from_node_closure(sender, instance, **kwargs):
+    if not instance.is_node_link:
+        NodeClosure.relink(instance.child_id)
@@ -174,3 +174,27 @@ class ApiOAuth2PersonalToken(base.ObjectIDMixin, base.BaseModel):
     # used by django and DRF
     def get_absolute_url(self):
         return self.absolute_api_v2_url
+
+
+class CasTokenRevocation(models.Model):
+    """When an access token, or every access token, was last revoked, so that all processes drop
+    CAS profiles they cached for it before then, see `framework.auth.cas.TokenCache`. Rows are only
+    needed for as long as profiles are cached.
+    """
+    # Revocations of all of an application's tokens, whose hashes are not known here
+    ALL_TOKENS = '*'
+
+    # SHA-256 hash of the access token, or ALL_TOKENS
+    key = models.CharField(max_length=64, primary_key=True)
+    # Epoch time of the revocation
+    revoked_at = models.FloatField()
+
+    @classmethod
+    def revoke(cls, key, now):
+        cls.objects.update_or_create(key=key, defaults={'revoked_at': now})
+        cls.objects.filter(revoked_at__lt=now - settings.CAS_TOKEN_CACHE_TTL).exclude(key=cls.ALL_TOKENS).delete()
+
+    @classmethod
+    def is_revoked(cls, key, since):
+        """Whether the token with hash ``key`` was revoked at or after epoch time ``since``"""
+        return cls.objects.filter(key__in=[key, cls.ALL_TOKENS], revoked_at__gte=since).exists()
@@ -0,0 +1,64 @@
+from django.db import connection, models
+
+from osf.models.base import BaseModel
+
+
+class SearchQueueEntry(BaseModel):
+    """An object whose search documents are out of date. Queuing an object that is already
+    queued is a no-op, so the many updates an object may go through before the queue is
+    drained lead to a single reindex, see `website.search.elastic_search.drain_search_queue`.
+    """
+    NODE = 'node'
+    # The files of a node, rather than the node itself
+    NODE_FILES = 'node_files'
+    PREPRINT = 'preprint'
+    USER = 'user'
+    GROUP = 'group'
+    DOC_TYPES = (
+        (NODE, NODE),
+        (NODE_FILES, NODE_FILES),
+        (PREPRINT, PREPRINT),
+        (USER, USER),
+        (GROUP, GROUP),
+    )
+
+    doc_type = models.CharField(max_length=16, choices=DOC_TYPES)
+    object_id = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('doc_type', 'object_id')
+
+    @classmethod
+    def enqueue(cls, doc_type, object_ids):
+        """Queue the objects of ``doc_type`` with ids ``object_ids``, unless they already are"""
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO osf_searchqueueentry (doc_type, object_id, created, modified)
+                SELECT %s, object_id, now(), now()
+                FROM unnest(%s::integer[]) AS object_id
+                ON CONFLICT (doc_type, object_id) DO NOTHING;
+            """, [doc_type, list(object_ids)])
+
+    @classmethod
+    def pop(cls, delay, limit):
+        """Remove up to ``limit`` entries that have been queued for at least ``delay`` seconds
+        and return them as (doc_type, object_id) tuples. Entries locked by another transaction
+        are skipped. Should be called in a transaction, so that the entries are queued again if
+        indexing them fails.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                WITH due AS (
+                  SELECT id
+                  FROM osf_searchqueueentry
+                  WHERE created <= now() - make_interval(secs => %s)
+                  ORDER BY id
+                  LIMIT %s
+                  FOR UPDATE SKIP LOCKED
+                )
+                DELETE FROM osf_searchqueueentry AS E
+                USING due
+                WHERE E.id = due.id
+                RETURNING E.doc_type, E.object_id;
+            """, [delay, limit])
+            return cursor.fetchall()
@@ -0,0 +1,21 @@
+from django.db import models
+
+from osf.models.base import BaseModel
+
+
+class SearchReindexCheckpoint(BaseModel):
+    """A page of objects that was reindexed into a search index by
+    `website.search_migration.migrate.sql_migrate`, so that an interrupted reindex can be
+    resumed without reindexing it again.
+    """
+    # The versioned index, e.g. website_v3
+    index = models.CharField(max_length=255)
+    # What was reindexed, e.g. nodes or deleted_nodes
+    name = models.CharField(max_length=64)
+    page_start = models.PositiveIntegerField()
+    page_end = models.PositiveIntegerField()
+    # Number of bulk actions sent for the page
+    documents = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('index', 'name', 'page_start')
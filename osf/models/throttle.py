@@ -0,0 +1,17 @@
+from django.db import models
+
+
+class ThrottleCounter(models.Model):
+    """The number of requests counted against an API throttle key in its current fixed window,
+    shared by every API process, see `api.base.throttling.DatabaseThrottleBackend`. The table is
+    unlogged, so a database crash only resets rate limits.
+    """
+    key = models.CharField(max_length=255, primary_key=True)
+    # Epoch second at which the current window ends
+    window_end = models.BigIntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    @classmethod
+    def delete_expired(cls, now):
+        """Delete the counters whose window ended before epoch second ``now``"""
+        return cls.objects.filter(window_end__lte=now).delete()[0]
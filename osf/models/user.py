@@ -22,7 +22,7 @@ from django.contrib.auth.base_user import AbstractBaseUser, BaseUserManager
 from django.contrib.auth.hashers import check_password
 from django.contrib.auth.models import PermissionsMixin
 from django.dispatch import receiver
-from django.db import models
+from django.db import connection, models
 from django.db.models import Count
 from django.db.models.signals import post_save
 from django.utils import timezone
@@ -1591,6 +1591,37 @@ class OSFUser(DirtyFieldsMixin, GuidMixin, BaseModel, AbstractBaseUser, Permissi
         """Returns number of "shared projects" (projects that both users are contributors or group members for)"""
         return self._projects_in_common_query(other_user).count()
 
+    def n_projects_in_common_by_user(self, other_users):
+        """Like `n_projects_in_common`, for many users with a single query.
+
+        :param list other_users: Users to count shared projects with
+        :returns dict: Number of shared projects by user id, for users that share any
+        """
+        user_ids = [user.id for user in other_users]
+        if not user_ids:
+            return {}
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                WITH shared AS (
+                  SELECT DISTINCT G.content_object_id AS node_id, G.permission_id
+                  FROM osf_osfuser_groups AS UG
+                    JOIN osf_nodegroupobjectpermission AS G ON G.group_id = UG.group_id
+                    JOIN auth_permission AS P ON P.id = G.permission_id
+                    JOIN osf_abstractnode AS N ON N.id = G.content_object_id
+                  WHERE UG.osfuser_id = %s
+                    AND P.codename = 'read_node'
+                    AND N.is_deleted = FALSE
+                    AND N.type IN ('osf.node', 'osf.registration')
+                )
+                SELECT UG.osfuser_id, COUNT(DISTINCT S.node_id)
+                FROM shared AS S
+                  JOIN osf_nodegroupobjectpermission AS G ON G.content_object_id = S.node_id AND G.permission_id = S.permission_id
+                  JOIN osf_osfuser_groups AS UG ON UG.group_id = G.group_id
+                WHERE UG.osfuser_id = ANY(%s)
+                GROUP BY UG.osfuser_id;
+            """, [self.id, user_ids])
+            return dict(cursor.fetchall())
+
     def add_unclaimed_record(self, claim_origin, referrer, given_name, email=None):
         """Add a new project entry in the unclaimed records dictionary.
 
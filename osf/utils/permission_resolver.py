@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+from django.db import connection
+
+from osf.utils.permissions import ADMIN_NODE, READ
+from osf.utils.requests import get_current_request, DummyRequest
+
+# Permissions of users on nodes through contributorship or OSF group membership, with a flag
+# for each (user, node) pair telling whether the permission was granted on the node itself or
+# on one of its ancestors.
+NODE_PERMISSIONS_SQL = """
+    WITH ancestors(node_id, ancestor_id) AS (
+      SELECT N.id, N.id
+      FROM osf_abstractnode AS N
+      WHERE N.id = ANY(%(node_ids)s)
+      UNION ALL
+      SELECT C.descendant_id, C.ancestor_id
+      FROM osf_nodeclosure AS C
+      WHERE C.descendant_id = ANY(%(node_ids)s)
+    )
+    SELECT DISTINCT UG.osfuser_id, A.node_id, A.ancestor_id = A.node_id, P.codename
+    FROM ancestors AS A
+      JOIN osf_nodegroupobjectpermission AS G ON G.content_object_id = A.ancestor_id
+      JOIN osf_osfuser_groups AS UG ON UG.group_id = G.group_id
+      JOIN auth_permission AS P ON P.id = G.permission_id
+    WHERE UG.osfuser_id = ANY(%(user_ids)s)
+    AND (A.ancestor_id = A.node_id OR P.codename = %(admin_perm)s);
+"""
+
+
+class NodePermissions(object):
+    """A user's permissions on a node"""
+
+    __slots__ = ('perms', 'is_admin_parent')
+
+    def __init__(self):
+        # Permission codenames granted on the node itself, e.g. 'read_node'
+        self.perms = set()
+        # Whether the user is an admin on the node or any of its ancestors
+        self.is_admin_parent = False
+
+
+class NodePermissionResolver(object):
+    """Resolves the permissions of users on nodes, many nodes or many users at a time, with
+    a single query, and remembers them. The resolver for the current request is shared by
+    everything that checks node permissions while handling it, so listing N nodes with
+    their permissions takes one permission query instead of N.
+
+    Resolved permissions are forgotten whenever permissions or the node hierarchy change,
+    see `osf.models.node.clear_node_permission_resolver`.
+    """
+
+    REQUEST_ATTR = '_node_permission_resolver'
+
+    def __init__(self):
+        # {(user_id, node_id): NodePermissions}
+        self._resolved = {}
+
+    @classmethod
+    def get_current(cls):
+        """The resolver for the current request, or a new one outside of requests"""
+        req = get_current_request()
+        if isinstance(req, DummyRequest):
+            return cls()
+        resolver = getattr(req, cls.REQUEST_ATTR, None)
+        if resolver is None:
+            resolver = cls()
+            setattr(req, cls.REQUEST_ATTR, resolver)
+        return resolver
+
+    @classmethod
+    def clear_current(cls):
+        resolver = getattr(get_current_request(), cls.REQUEST_ATTR, None)
+        if resolver is not None:
+            resolver.clear()
+
+    def clear(self):
+        self._resolved.clear()
+
+    def resolve(self, users, nodes):
+        """Resolve the permissions of every user in ``users`` on every node in ``nodes`` that
+        are not resolved yet.
+        """
+        user_ids = {getattr(user, 'id', user) for user in users if user is not None}
+        node_ids = {getattr(node, 'id', node) for node in nodes if node is not None}
+        missing = {
+            (user_id, node_id) for user_id in user_ids for node_id in node_ids
+            if (user_id, node_id) not in self._resolved
+        }
+        if not missing:
+            return
+        user_ids = list({user_id for user_id, _ in missing})
+        node_ids = list({node_id for _, node_id in missing})
+        resolved = {key: NodePermissions() for key in missing}
+
+        with connection.cursor() as cursor:
+            cursor.execute(NODE_PERMISSIONS_SQL, {
+                'node_ids': node_ids,
+                'user_ids': user_ids,
+                'admin_perm': ADMIN_NODE,
+            })
+            for user_id, node_id, direct, codename in cursor.fetchall():
+                permissions = resolved.get((user_id, node_id))
+                if permissions is None:
+                    continue
+                if direct:
+                    permissions.perms.add(codename)
+                if codename == ADMIN_NODE:
+                    permissions.is_admin_parent = True
+        self._resolved.update(resolved)
+
+    def get(self, user, node):
+        """The NodePermissions of ``user`` on ``node``, either given by id, resolving them if needed"""
+        key = (getattr(user, 'id', user), getattr(node, 'id', node))
+        if key not in self._resolved:
+            self.resolve([user], [node])
+        return self._resolved[key]
+
+    def has_permission(self, user, node, permission, check_parent=True):
+        """Whether ``user`` has ``permission`` (e.g. 'read') on ``node``. Admins on an ancestor can read it."""
+        permissions = self.get(user, node)
+        if '{}_node'.format(permission) in permissions.perms:
+            return True
+        return permission == READ and check_parent and permissions.is_admin_parent
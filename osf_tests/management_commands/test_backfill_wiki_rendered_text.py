@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from addons.wiki.models import WikiVersion
+from addons.wiki.tests.factories import WikiVersionFactory
+from osf.management.commands.backfill_wiki_rendered_text import backfill_wiki_rendered_text
+
+
+@pytest.mark.django_db
+class TestBackfillWikiRenderedText:
+
+    def test_backfill(self):
+        versions = [WikiVersionFactory(content='Version {}'.format(i)) for i in range(3)]
+        WikiVersion.objects.update(rendered_html=None, rendered_text=None)
+
+        assert backfill_wiki_rendered_text(page_size=2) == 2
+        assert backfill_wiki_rendered_text(page_size=2) == 1
+        assert backfill_wiki_rendered_text(page_size=2) == 0
+
+        for i, version in enumerate(versions):
+            version.refresh_from_db()
+            assert version.rendered_html == '<p>Version {}</p>'.format(i)
+            assert version.rendered_text == 'Version {}'.format(i)
+
+    def test_dry_run(self):
+        version = WikiVersionFactory()
+        WikiVersion.objects.update(rendered_html=None, rendered_text=None)
+        with pytest.raises(RuntimeError):
+            backfill_wiki_rendered_text(dry_run=True)
+        version.refresh_from_db()
+        assert version.rendered_html is None
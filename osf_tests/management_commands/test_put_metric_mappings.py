@@ -0,0 +1,29 @@
+import mock
+import pytest
+from elasticsearch.exceptions import RequestError
+
+from osf.management.commands.put_metric_mappings import put_metric_mappings
+
+
+@pytest.fixture()
+def mock_client():
+    with mock.patch('osf.management.commands.put_metric_mappings.connections') as mock_connections:
+        yield mock_connections.get_connection.return_value
+
+
+class TestPutMetricMappings:
+
+    def test_puts_mappings_on_existing_indices(self, mock_client):
+        assert put_metric_mappings() == []
+        calls = {call[1]['index']: call[1] for call in mock_client.indices.put_mapping.call_args_list}
+        call = calls['osf_userinstitutionprojectcounts_*']
+        assert call['body']['properties']['user_name']['type'] == 'keyword'
+        assert call['allow_no_indices']
+
+    def test_conflicting_mappings_are_reported(self, mock_client):
+        mock_client.indices.put_mapping.side_effect = RequestError(400, 'illegal_argument_exception', {})
+        assert 'UserInstitutionProjectCounts' in put_metric_mappings()
+
+    def test_dry_run(self, mock_client):
+        put_metric_mappings(dry_run=True)
+        assert not mock_client.indices.put_mapping.called
@@ -21,3 +21,5 @@ PASSWORD_HASHERS = (
 )
 
 TEST_ENV = True
+
+THROTTLE_BACKEND = 'api.base.throttling.CacheThrottleBackend'
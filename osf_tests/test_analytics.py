@@ -5,6 +5,7 @@ Unit tests for analytics logic in framework/analytics/__init__.py
 
 import mock
 import pytest
+import pytz
 from django.utils import timezone
 from nose.tools import *  # noqa: F403
 
@@ -12,7 +13,7 @@ from datetime import datetime
 
 from addons.osfstorage.models import OsfStorageFile
 from framework import analytics
-from osf.models import PageCounter, OSFGroup
+from osf.models import PageCounter, PageCounterIncrement, OSFGroup
 
 from tests.base import OsfTestCase
 from osf_tests.factories import UserFactory, ProjectFactory
@@ -97,29 +98,37 @@ class TestPageCounter:
         mock_session.data = {}
         resource = project.guids.first()
         PageCounter.update_counter(resource, file_node, version=None, action='download', node_info={})
+        PageCounter.flush_increments()
 
         page_counter = PageCounter.objects.get(resource=resource, file=file_node, version=None, action='download')
         assert page_counter.total == 1
         assert page_counter.unique == 1
 
         PageCounter.update_counter(resource, file_node, version=None, action='download', node_info={})
+        PageCounter.flush_increments()
 
         page_counter.refresh_from_db()
         assert page_counter.total == 2
         assert page_counter.unique == 1
 
+        daily_counter = page_counter.daily_counters.get()
+        assert daily_counter.total == 2
+        assert daily_counter.unique == 1
+
     @mock.patch('osf.models.analytics.session')
     def test_download_update_counter_contributor(self, mock_session, user, project, file_node):
         mock_session.data = {'auth_user_id': user._id}
         resource = project.guids.first()
 
         PageCounter.update_counter(resource, file_node, version=None, action='download', node_info={'contributors': project.contributors})
+        PageCounter.flush_increments()
 
         page_counter = PageCounter.objects.get(resource=resource, file=file_node, version=None, action='download')
         assert page_counter.total == 0
         assert page_counter.unique == 0
 
         PageCounter.update_counter(resource, file_node, version=None, action='download', node_info={'contributors': project.contributors})
+        PageCounter.flush_increments()
 
         page_counter.refresh_from_db()
         assert page_counter.total == 0
@@ -133,6 +142,7 @@ class TestPageCounter:
         PageCounter.update_counter(resource, file_node, version=None, action='download', node_info={
             'contributors': project.contributors_and_group_members}
         )
+        PageCounter.flush_increments()
         page_counter.refresh_from_db()
         assert page_counter.total == 1
         assert page_counter.unique == 1
@@ -144,6 +154,44 @@ class TestPageCounter:
         assert page_counter.total == 1
         assert page_counter.unique == 1
 
+    @mock.patch('osf.models.analytics.session')
+    def test_get_basic_counters_includes_pending_increments(self, mock_session, project, file_node):
+        mock_session.data = {}
+        resource = project.guids.first()
+        PageCounter.update_counter(resource, file_node, version=None, action='download', node_info={})
+        PageCounter.flush_increments()
+        PageCounter.update_counter(resource, file_node, version=None, action='download', node_info={})
+
+        assert PageCounter.objects.get(resource=resource, file=file_node, version=None, action='download').total == 1
+        assert PageCounter.get_basic_counters(resource, file_node, version=None, action='download') == (1, 2)
+
+        assert PageCounter.flush_increments() == 1
+        assert PageCounterIncrement.objects.count() == 0
+        assert PageCounter.get_basic_counters(resource, file_node, version=None, action='download') == (1, 2)
+
+    @mock.patch('osf.models.analytics.session')
+    def test_flush_increments_in_batches(self, mock_session, project, file_node):
+        mock_session.data = {}
+        resource = project.guids.first()
+        for _ in range(5):
+            PageCounter.update_counter(resource, file_node, version=None, action='download', node_info={})
+
+        assert PageCounter.flush_increments(batch_size=2) == 5
+        page_counter = PageCounter.objects.get(resource=resource, file=file_node, version=None, action='download')
+        assert page_counter.total == 5
+        assert page_counter.daily_counters.get().total == 5
+
+    @mock.patch('osf.models.analytics.session')
+    def test_get_all_downloads_on_date_includes_daily_counters(self, mock_session, project, file_node, page_counter2):
+        mock_session.data = {}
+        resource = project.guids.first()
+        with mock.patch('osf.models.analytics.timezone.now', return_value=datetime(2018, 2, 4, tzinfo=pytz.utc)):
+            PageCounter.update_counter(resource, file_node, version=None, action='download', node_info={})
+            PageCounter.flush_increments()
+            PageCounter.update_counter(resource, file_node, version=None, action='download', node_info={})
+
+        assert PageCounter.get_all_downloads_on_date(datetime(2018, 2, 4)) == 6
+
     def test_get_all_downloads_on_date(self, page_counter, page_counter2):
         """
         This method tests that multiple pagecounter objects have their download totals summed properly.
@@ -546,6 +546,7 @@ class TestArchiverTasks(ArchiverTestCase):
         )
         assert(mock_group.called_with(archive_dropbox_signature))
 
+    @mock.patch('website.archiver.tasks.settings.ARCHIVE_OSFSTORAGE_NATIVELY', False)
     @mock.patch('website.archiver.tasks.make_copy_request.delay')
     def test_archive_addon(self, mock_make_copy_request):
         archive_addon('osfstorage', self.archive_job._id)
@@ -571,6 +572,60 @@ class TestArchiverTasks(ArchiverTestCase):
             )
         ))
 
+    @mock.patch('website.archiver.tasks.make_copy_request.delay')
+    @mock.patch('website.archiver.tasks.archive_osfstorage.delay')
+    def test_archive_addon_osfstorage_natively(self, mock_archive_osfstorage, mock_make_copy_request):
+        archive_addon('osfstorage', self.archive_job._id)
+        mock_archive_osfstorage.assert_called_once_with(job_pk=self.archive_job._id, rename='Archive of OSF Storage')
+        assert_false(mock_make_copy_request.called)
+
+    def _create_osfstorage_file(self, parent, name):
+        file_node = parent.append_file(name)
+        file_node.create_version(self.user, {
+            'object': fake.md5(),
+            'service': 'cloud',
+            'bucket': 'osf',
+        }, {
+            'size': 1337,
+            'contentType': 'text/plain',
+        }).save()
+        return file_node
+
+    @mock.patch('website.archiver.tasks.project_signals.archive_callback.send')
+    def test_archive_osfstorage(self, mock_archive_callback):
+        src_root = self.src.get_addon('osfstorage').get_root()
+        src_file = self._create_osfstorage_file(src_root, 'data.csv')
+        folder = src_root.append_folder('results')
+        src_nested_file = self._create_osfstorage_file(folder, 'figure.png')
+
+        archive_osfstorage(job_pk=self.archive_job._id, rename='Archive of OSF Storage')
+
+        dst_root = self.dst.get_addon('osfstorage').get_root()
+        archive_folder = dst_root.children.get(name='Archive of OSF Storage')
+        assert_false(archive_folder.is_root)
+        dst_file = archive_folder.children.get(name='data.csv')
+        dst_nested_file = archive_folder.children.get(name='results').children.get(name='figure.png')
+        # The archived files share the versions, and stored contents, of the node's files
+        assert_equal(list(dst_file.versions.all()), list(src_file.versions.all()))
+        assert_equal(list(dst_nested_file.versions.all()), list(src_nested_file.versions.all()))
+        assert_equal(dst_file.target, self.dst)
+
+        self.archive_job.reload()
+        assert_equal(self.archive_job.get_target('osfstorage').status, ARCHIVER_SUCCESS)
+        mock_archive_callback.assert_called_once_with(self.dst)
+
+    def test_can_archive_natively(self):
+        src_root = self.src.get_addon('osfstorage').get_root()
+        src_file = self._create_osfstorage_file(src_root, 'data.csv')
+        assert_true(archiver_utils.can_archive_natively(self.src, self.dst, 'osfstorage'))
+        assert_false(archiver_utils.can_archive_natively(self.src, self.dst, 'dropbox'))
+
+        # Contents stored in another region are copied by WaterButler
+        version = src_file.versions.get()
+        version.region = factories.RegionFactory()
+        version.save()
+        assert_false(archiver_utils.can_archive_natively(self.src, self.dst, 'osfstorage'))
+
     def test_archive_success(self):
         node = factories.NodeFactory(creator=self.user)
         file_trees, selected_files, node_index = generate_file_tree([node])
@@ -960,21 +1015,31 @@ class TestArchiverUtils(ArchiverTestCase):
                 else:
                     stack = stack + item['children']
 
-    def test_get_file_map_memoization(self):
-        node = factories.NodeFactory()
-        comp1 = factories.NodeFactory(parent=node)
-        factories.NodeFactory(parent=comp1)
-        factories.NodeFactory(parent=node)
+    def test_registration_file_index(self):
+        file_tree = file_tree_factory(3, 3, 3)
+        file_map = archiver_utils._do_get_file_map(file_tree)
+        sha256, file_info = file_map[-1]
+
+        with mock.patch.object(BaseStorageAddon, '_get_file_tree', mock.Mock(return_value=file_tree)) as mock_get_file_tree:
+            file_index = archiver_utils.RegistrationFileIndex(self.dst)
+            assert_false(mock_get_file_tree.called)
 
-        with mock.patch.object(BaseStorageAddon, '_get_file_tree') as mock_get_file_tree:
-            mock_get_file_tree.return_value = file_tree_factory(3, 3, 3)
+            found = archiver_utils.find_registration_file({
+                'sha256': sha256,
+                'nodeId': self.src._id,
+                'selectedFileName': file_info['name'],
+            }, self.dst, file_index=file_index)
+            assert_equal(found, (file_info, self.dst._id))
+
+            not_found = archiver_utils.find_registration_file({
+                'sha256': sha256,
+                'nodeId': self.dst._id,
+                'selectedFileName': file_info['name'],
+            }, self.dst, file_index=file_index)
+            assert_equal(not_found, (None, None))
 
-            # first call
-            archiver_utils.get_file_map(node)
-            call_count = mock_get_file_tree.call_count
-            # second call
-            archiver_utils.get_file_map(node)
-            assert_equal(mock_get_file_tree.call_count, call_count)
+            # Each file tree is fetched once per index
+            assert_equal(mock_get_file_tree.call_count, 1)
 
 
 class TestArchiverListeners(ArchiverTestCase):
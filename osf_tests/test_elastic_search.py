@@ -14,13 +14,16 @@ from framework.auth.core import Auth
 
 from website import settings
 import website.search.search as search
-from website.search import elastic_search
+from website.search import elastic_search, exceptions
 from website.search.util import build_query
-from website.search_migration.migrate import migrate
+from website.search_migration.migrate import migrate, migrate_nodes
 from osf.models import (
+    AbstractNode,
     Retraction,
     NodeLicense,
     OSFGroup,
+    SearchQueueEntry,
+    SearchReindexCheckpoint,
     Tag,
     Preprint,
     QuickFilesNode,
@@ -413,6 +416,91 @@ class TestProject(OsfTestCase):
         assert_equal(len(docs), 1)
 
 
+@pytest.mark.enable_search
+@pytest.mark.enable_enqueue_task
+class TestSearchQueue(OsfTestCase):
+
+    def setUp(self):
+        super(TestSearchQueue, self).setUp()
+        search.delete_index(elastic_search.INDEX)
+        search.create_index(elastic_search.INDEX)
+        self.project = factories.ProjectFactory(title='Bohemian Rhapsody')
+
+    def queued(self):
+        return set(SearchQueueEntry.objects.values_list('doc_type', 'object_id'))
+
+    @mock.patch('website.search.search.settings.USE_CELERY', True)
+    def test_updates_are_coalesced(self):
+        search.update_node(self.project, saved_fields=['description'])
+        assert_equal(self.queued(), {('node', self.project.id)})
+        search.update_node(self.project, saved_fields=['description', 'is_public'])
+        search.update_user(self.project.creator)
+        assert_equal(self.queued(), {
+            ('node', self.project.id),
+            ('node_files', self.project.id),
+            ('user', self.project.creator.id),
+        })
+
+    @mock.patch('website.search.elastic_search.settings.SEARCH_QUEUE_DELAY', 0)
+    def test_drain(self):
+        self.project.get_addon('osfstorage').get_root().append_file('Mercury.mp3')
+        AbstractNode.objects.filter(id=self.project.id).update(is_public=True)
+        assert_equal(len(query(self.project.title)['results']), 0)
+
+        SearchQueueEntry.enqueue('node', [self.project.id])
+        SearchQueueEntry.enqueue('node_files', [self.project.id])
+        assert_equal(elastic_search.drain_search_queue(), 2)
+
+        assert_equal(len(query(self.project.title)['results']), 1)
+        assert_equal(len(query_file('Mercury.mp3')['results']), 1)
+        assert_false(SearchQueueEntry.objects.exists())
+
+    @pytest.mark.enable_quickfiles_creation
+    @mock.patch('website.search.elastic_search.settings.SEARCH_QUEUE_DELAY', 0)
+    def test_drain_removes_quickfiles_of_spam_users(self):
+        user = self.project.creator
+        quickfiles = QuickFilesNode.objects.get(creator=user)
+        quickfiles.get_addon('osfstorage').get_root().append_file('GreenLight.mp3')
+        assert_equal(len(query_file('GreenLight.mp3')['results']), 1)
+
+        with mock.patch('website.search.search.use_search_queue', return_value=True):
+            user.disable_account()
+            user.confirm_spam()
+            user.save()
+        assert_in(('user', user.id), self.queued())
+        assert_equal(len(query_file('GreenLight.mp3')['results']), 1)
+
+        elastic_search.drain_search_queue()
+        assert_equal(len(query_user(user.fullname)['results']), 0)
+        assert_equal(len(query_file('GreenLight.mp3')['results']), 0)
+
+    def test_drain_waits_for_delay(self):
+        SearchQueueEntry.enqueue('node', [self.project.id])
+        assert_equal(elastic_search.drain_search_queue(), 0)
+        assert_true(SearchQueueEntry.objects.exists())
+
+    @mock.patch('website.search.elastic_search.settings.SEARCH_QUEUE_DELAY', 0)
+    @mock.patch('website.search.elastic_search.helpers.bulk')
+    def test_drain_keeps_batch_queued_if_documents_fail(self, mock_bulk):
+        mock_bulk.return_value = (0, [
+            {'delete': {'_id': 'abc12', 'status': 404}},
+            {'index': {'_id': self.project._id, 'status': 429, 'error': {'type': 'es_rejected_execution_exception'}}},
+        ])
+        SearchQueueEntry.enqueue('node', [self.project.id])
+        with assert_raises(exceptions.BulkUpdateError) as e:
+            elastic_search.drain_search_queue()
+        assert_equal(e.exception.args[0], [mock_bulk.return_value[1][1]])
+        assert_equal(self.queued(), {('node', self.project.id)})
+
+    @mock.patch('website.search.elastic_search.settings.SEARCH_QUEUE_DELAY', 0)
+    @mock.patch('website.search.elastic_search.helpers.bulk')
+    def test_drain_ignores_deleting_missing_documents(self, mock_bulk):
+        mock_bulk.return_value = (0, [{'delete': {'_id': 'abc12', 'status': 404}}])
+        SearchQueueEntry.enqueue('node', [self.project.id])
+        assert_equal(elastic_search.drain_search_queue(), 1)
+        assert_false(SearchQueueEntry.objects.exists())
+
+
 @pytest.mark.enable_search
 @pytest.mark.enable_enqueue_task
 class TestOSFGroup(OsfTestCase):
@@ -1413,6 +1501,53 @@ class TestSearchMigration(OsfTestCase):
         res = self.es.search(index=settings.ELASTIC_INDEX, doc_type='collectionSubmission', search_type='count', body=count_query)
         assert res['hits']['total'] == 2
 
+    def test_migration_resumes_from_checkpoints(self):
+        index = settings.ELASTIC_INDEX
+        migrate_nodes(index, delete=False, increment=self.project.id)
+        pages = SearchReindexCheckpoint.objects.filter(index=index, name='nodes')
+        assert pages.exists()
+        assert sum(pages.values_list('documents', flat=True)) >= 1
+
+        # Migrated pages are skipped
+        with mock.patch('website.search_migration.migrate.helpers.streaming_bulk') as mock_bulk:
+            migrate_nodes(index, delete=False, increment=self.project.id)
+        assert not mock_bulk.called
+
+    def test_migration_with_workers(self):
+        class FakePool(object):
+            # Runs pages in this process, in another order than they were submitted
+            terminated = False
+
+            def imap_unordered(self, func, tasks):
+                return (func(task) for task in reversed(list(tasks)))
+
+            def terminate(self):
+                self.terminated = True
+
+            def join(self):
+                pass
+
+        index = settings.ELASTIC_INDEX
+        increment = self.project.id
+        max_id = AbstractNode.objects.last().id
+        pool = FakePool()
+        with mock.patch('website.search_migration.migrate._get_pool', return_value=pool) as mock_get_pool:
+            with mock.patch('website.search_migration.migrate.connections') as mock_connections:
+                migrated = migrate_nodes(index, delete=False, increment=increment, workers=2)
+        mock_get_pool.assert_called_once_with(2)
+        assert mock_connections.close_all.called
+        assert pool.terminated
+
+        pages = SearchReindexCheckpoint.objects.filter(index=index, name='nodes')
+        assert sorted(pages.values_list('page_start', flat=True)) == list(range(0, max_id + increment + 1, increment))
+        assert migrated == sum(pages.values_list('documents', flat=True))
+        assert migrated >= 1
+
+    def test_checkpoints_removed_after_migration(self):
+        migrate(delete=False, index=settings.ELASTIC_INDEX, app=self.app.app)
+        assert not SearchReindexCheckpoint.objects.exists()
+
+
 @pytest.mark.enable_search
 @pytest.mark.enable_enqueue_task
 class TestSearchFiles(OsfTestCase):
@@ -1485,6 +1620,29 @@ class TestSearchFiles(OsfTestCase):
         find = query_file('Try a Little Tenderness.flac')['results']
         assert_equal(len(find), 1)
 
+    def test_update_node_reindexes_files_only_when_inherited_fields_change(self):
+        with mock.patch('website.search.elastic_search.update_files') as mock_update_files:
+            elastic_search.update_node(self.node, index=elastic_search.INDEX, saved_fields=['description'])
+            assert_false(mock_update_files.called)
+            elastic_search.update_node(self.node, index=elastic_search.INDEX, saved_fields=['description', 'is_public'])
+            assert_equal(mock_update_files.call_count, 1)
+            elastic_search.update_node(self.node, index=elastic_search.INDEX)
+            assert_equal(mock_update_files.call_count, 2)
+
+    def test_update_files(self):
+        self.root.append_file('Hard to Handle.mp3')
+        hidden = self.root.append_file('Hidden.mp3')
+        tag = Tag(name='qatest')
+        tag.save()
+        hidden.tags.add(tag)
+        self.node.title = 'Otis Redding'
+        self.node.save()
+        elastic_search.update_files(self.node, index=elastic_search.INDEX)
+        find = query_file('Hard to Handle.mp3')['results']
+        assert_equal(len(find), 1)
+        assert_equal(find[0]['node_title'], 'Otis Redding')
+        assert_equal(len(query_file('Hidden.mp3')['results']), 0)
+
     def test_delete_node(self):
         node = factories.ProjectFactory(is_public=True, title='The Soul Album')
         osf_storage = node.get_addon('osfstorage')
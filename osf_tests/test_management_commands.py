@@ -10,7 +10,10 @@ from django.utils import timezone
 from addons.osfstorage import settings as osfstorage_settings
 from api_tests.utils import create_test_file
 from framework.auth import Auth
-from osf.management.commands.update_institution_project_counts import update_institution_project_counts
+from osf.management.commands.update_institution_project_counts import (
+    get_user_project_counts,
+    update_institution_project_counts,
+)
 from osf.models import QuickFilesNode, RegistrationSchema
 from osf.metrics import InstitutionProjectCounts, UserInstitutionProjectCounts
 from osf_tests.factories import (
@@ -21,6 +24,8 @@ from osf_tests.factories import (
     RegionFactory,
     UserFactory,
     DraftRegistrationFactory,
+    NodeFactory,
+    OSFGroupFactory,
 )
 from tests.base import DbTestCase
 from osf.management.commands.data_storage_usage import (
@@ -392,3 +397,33 @@ class TestInstitutionMetricsUpdate:
 
         assert institution_results['public_project_count'] == 4
         assert institution_results['private_project_count'] == 14
+
+
+@pytest.mark.django_db
+class TestInstitutionUserProjectCounts:
+
+    def test_get_user_project_counts(self):
+        institution = InstitutionFactory()
+        user, member, outsider = AuthUserFactory(), AuthUserFactory(), AuthUserFactory()
+        institution.osfuser_set.add(user, member)
+
+        public = ProjectFactory(creator=user, is_public=True)
+        private = ProjectFactory(creator=user, is_public=False)
+        deleted = ProjectFactory(creator=user, is_public=False)
+        component = NodeFactory(creator=user, parent=public)
+        for node in (public, private, deleted, component):
+            node.affiliated_institutions.add(institution)
+        deleted.is_deleted = True
+        deleted.save()
+        # Not affiliated
+        ProjectFactory(creator=user, is_public=True)
+
+        group = OSFGroupFactory(creator=outsider)
+        group.make_member(member)
+        private.add_osf_group(group)
+        private.add_contributor(outsider, auth=Auth(user), save=True)
+
+        assert get_user_project_counts(institution) == {
+            user.id: (1, 1),
+            member.id: (0, 1),
+        }
@@ -1,10 +1,24 @@
+import datetime as dt
+import json
+
 import mock
 import pytest
+import pytz
+from django.conf import settings
+from django.core.cache import caches
+from django.test import override_settings
 from elasticsearch_metrics import metrics
 
-from osf.metrics import MetricMixin
+from osf.metrics import (
+    MetricMixin,
+    MetricsBuffer,
+    PreprintDownload,
+    PreprintView,
+    ThrottleEvent,
+    send_metric_documents,
+)
 from osf.models import OSFUser
-from osf_tests.factories import UserFactory
+from osf_tests.factories import PreprintFactory, UserFactory
 
 class DummyMetric(MetricMixin, metrics.Metric):
     count = metrics.Integer(doc_values=True, index=True, required=True)
@@ -33,3 +47,204 @@ def test_get_top_by_count(mock_get_id_to_count):
     annotated_user = metric_qs.first()
     assert annotated_user._id == user2._id
     assert annotated_user.dummies == 42
+
+
+@pytest.mark.django_db
+class TestMetricsBuffer:
+
+    @pytest.fixture()
+    def preprint(self):
+        return PreprintFactory()
+
+    @pytest.fixture()
+    def buffer(self):
+        buffer = MetricsBuffer()
+        yield buffer
+        if buffer._timer:
+            buffer._timer.cancel()
+
+    @pytest.fixture()
+    def mock_send(self):
+        with mock.patch('osf.metrics.send_metric_documents') as mock_send:
+            yield mock_send
+
+    def test_identical_events_summed(self, buffer, mock_send):
+        day = dt.datetime(2020, 1, 1, 10)
+        with override_settings(METRICS_BUFFER_SIZE=10, METRICS_BUFFER_MAX_AGE=60):
+            for hour in range(3):
+                buffer.add(PreprintDownload, preprint_id='abcde', user_id='fghij', version=1, timestamp=day.replace(hour=hour))
+            buffer.add(PreprintDownload, preprint_id='abcde', user_id='fghij', version=2, timestamp=day)
+            buffer.add(PreprintDownload, preprint_id='abcde', user_id='fghij', version=1, timestamp=day + dt.timedelta(days=1))
+            buffer.add(PreprintView, preprint_id='abcde', user_id='fghij', version=1, timestamp=day)
+        assert len(buffer) == 4
+        assert not mock_send.called
+
+        buffer.flush()
+        documents = mock_send.call_args[0][0]
+        assert [(document['metric'], document['version'], document['count']) for document in documents] == [
+            ('PreprintDownload', 1, 3),
+            ('PreprintDownload', 2, 1),
+            ('PreprintDownload', 1, 1),
+            ('PreprintView', 1, 1),
+        ]
+        assert documents[0]['timestamp'] == day.replace(hour=0).isoformat()
+        assert len(buffer) == 0
+
+    def test_sent_when_full(self, buffer, mock_send):
+        with override_settings(METRICS_BUFFER_SIZE=2, METRICS_BUFFER_MAX_AGE=60):
+            buffer.add(PreprintDownload, preprint_id='abcde')
+            assert not mock_send.called
+            buffer.add(PreprintDownload, preprint_id='fghij')
+        assert len(mock_send.call_args[0][0]) == 2
+        assert len(buffer) == 0
+
+    def test_sent_when_old(self, buffer, mock_send):
+        with override_settings(METRICS_BUFFER_SIZE=10, METRICS_BUFFER_MAX_AGE=0.01):
+            buffer.add(PreprintDownload, preprint_id='abcde')
+            timer = buffer._timer
+        # Without waiting for another event
+        timer.join(5)
+        assert len(mock_send.call_args[0][0]) == 1
+        assert len(buffer) == 0
+        assert buffer._timer is None
+
+    def test_documents_given_ids(self, buffer, mock_send):
+        buffer.add(PreprintDownload, preprint_id='abcde')
+        buffer.add(PreprintDownload, preprint_id='fghij')
+        buffer.flush()
+        ids = [document['id'] for document in mock_send.call_args[0][0]]
+        assert len(set(ids)) == 2
+
+    def test_send_errors_are_logged(self, buffer, mock_send):
+        mock_send.side_effect = ConnectionError
+        buffer.add(PreprintDownload, preprint_id='abcde')
+        with mock.patch('osf.metrics.logger') as mock_logger:
+            buffer.flush()
+        assert mock_logger.exception.called
+
+    def test_record_for_preprint_buffered(self, preprint):
+        user = UserFactory()
+        with mock.patch('osf.metrics.metrics_buffer') as mock_buffer, mock.patch.object(PreprintDownload, 'record') as mock_record:
+            assert PreprintDownload.record_for_preprint(preprint, user=user, path='/foo', buffered=True) is None
+        assert not mock_record.called
+        mock_buffer.add.assert_called_with(
+            PreprintDownload,
+            count=1,
+            preprint_id=preprint._id,
+            user_id=user._id,
+            provider_id=preprint.provider._id,
+            path='/foo',
+        )
+
+
+class TestSendMetricDocuments:
+
+    def test_bulk_actions(self):
+        timestamp = dt.datetime(2020, 1, 1, 10, tzinfo=pytz.utc)
+        buffer = MetricsBuffer()
+        with mock.patch('osf.metrics.send_metric_documents') as mock_send:
+            buffer.add(PreprintDownload, preprint_id='abcde', provider_id='osf', user_id='fghij', version='1', timestamp=timestamp, count=2)
+            buffer.add(ThrottleEvent, throttle='BurstRateThrottle', throttled=True, timestamp=timestamp)
+            buffer.flush()
+        # As serialized for the celery task
+        documents = json.loads(json.dumps(mock_send.call_args[0][0]))
+
+        with mock.patch('osf.metrics.connections'), mock.patch('osf.metrics.bulk', return_value=(2, [])) as mock_bulk:
+            assert send_metric_documents(documents) == 2
+        download, throttle = mock_bulk.call_args[0][1]
+
+        assert [download['_id'], throttle['_id']] == [document['id'] for document in documents]
+        assert download['_index'] == PreprintDownload.get_index_name(timestamp)
+        assert download['_source'] == {
+            'preprint_id': 'abcde',
+            'provider_id': 'osf',
+            'user_id': 'fghij',
+            'version': '1',
+            'count': 2,
+            'timestamp': timestamp,
+        }
+        assert throttle['_index'] == ThrottleEvent.get_index_name(timestamp)
+        assert throttle['_source'] == {
+            'throttle': 'BurstRateThrottle',
+            'throttled': True,
+            'count': 1,
+            'timestamp': timestamp,
+        }
+
+    def test_invalid_documents_are_skipped(self):
+        documents = [
+            {'id': 'invalid', 'metric': 'PreprintDownload', 'preprint_id': 'abcde', 'count': 1, 'timestamp': '2020-01-01T10:00:00+00:00'},
+            {'id': 'valid', 'metric': 'PreprintDownload', 'preprint_id': 'abcde', 'provider_id': 'osf', 'count': 1, 'timestamp': '2020-01-01T10:00:00+00:00'},
+        ]
+        with mock.patch('osf.metrics.connections'), mock.patch('osf.metrics.bulk', return_value=(1, [])) as mock_bulk:
+            with mock.patch('osf.metrics.logger') as mock_logger:
+                assert send_metric_documents(documents) == 1
+        assert [action['_id'] for action in mock_bulk.call_args[0][1]] == ['valid']
+        assert mock_logger.exception.called
+
+    def test_nothing_sent_without_valid_documents(self):
+        documents = [{'id': 'invalid', 'metric': 'PreprintDownload', 'preprint_id': 'abcde', 'count': 1, 'timestamp': '2020-01-01T10:00:00+00:00'}]
+        with mock.patch('osf.metrics.connections'), mock.patch('osf.metrics.bulk') as mock_bulk:
+            assert send_metric_documents(documents) == 0
+        assert not mock_bulk.called
+
+
+@pytest.mark.django_db
+class TestGetCountsForPreprints:
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        caches[settings.PREPRINT_METRICS_CACHE_NAME].clear()
+
+    @pytest.fixture()
+    def mock_get_id_to_count(self):
+        with mock.patch.object(PreprintDownload, '_get_id_to_count') as mock_get_id_to_count:
+            yield mock_get_id_to_count
+
+    def test_counts_with_one_aggregation(self, mock_get_id_to_count):
+        mock_get_id_to_count.return_value = {'abcde': 41, 'fghij': 42}
+        counts = PreprintDownload.get_counts_for_preprints(['abcde', 'fghij', 'klmno'])
+        assert counts == {'abcde': 41, 'fghij': 42, 'klmno': 0}
+        mock_get_id_to_count.assert_called_once_with(
+            size=3,
+            metric_field='preprint_id',
+            count_field='count',
+            after=None,
+            ids=['abcde', 'fghij', 'klmno'],
+        )
+
+    def test_no_data(self, mock_get_id_to_count):
+        mock_get_id_to_count.return_value = None
+        assert PreprintDownload.get_counts_for_preprints(['abcde']) == {'abcde': 0}
+
+    def test_counts_are_cached(self, mock_get_id_to_count):
+        mock_get_id_to_count.return_value = {'abcde': 41}
+        PreprintDownload.get_counts_for_preprints(['abcde'])
+
+        mock_get_id_to_count.return_value = {'fghij': 42}
+        assert PreprintDownload.get_counts_for_preprints(['abcde', 'fghij']) == {'abcde': 41, 'fghij': 42}
+        assert mock_get_id_to_count.call_args[1]['ids'] == ['fghij']
+
+        # Cached separately for each metric
+        with mock.patch.object(PreprintView, '_get_id_to_count') as mock_view_counts:
+            mock_view_counts.return_value = {'abcde': 7}
+            assert PreprintView.get_counts_for_preprints(['abcde']) == {'abcde': 7}
+
+    def test_windows_cached_by_minute(self, mock_get_id_to_count):
+        after = dt.datetime(2020, 1, 1, 10, 30, 15)
+        mock_get_id_to_count.return_value = {'abcde': 41}
+        PreprintDownload.get_counts_for_preprints(['abcde'], after=after)
+        assert mock_get_id_to_count.call_args[1]['after'] == dt.datetime(2020, 1, 1, 10, 30)
+
+        assert PreprintDownload.get_counts_for_preprints(['abcde'], after=after.replace(second=45)) == {'abcde': 41}
+        assert mock_get_id_to_count.call_count == 1
+
+        mock_get_id_to_count.return_value = {'abcde': 42}
+        assert PreprintDownload.get_counts_for_preprints(['abcde'], after=after.replace(minute=31)) == {'abcde': 42}
+        assert PreprintDownload.get_counts_for_preprints(['abcde']) == {'abcde': 42}
+        assert mock_get_id_to_count.call_count == 3
+
+    def test_get_count_for_preprint(self, mock_get_id_to_count):
+        preprint = PreprintFactory()
+        mock_get_id_to_count.return_value = {preprint._id: 42}
+        assert PreprintDownload.get_count_for_preprint(preprint) == 42
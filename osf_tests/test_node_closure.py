@@ -0,0 +1,64 @@
+import pytest
+
+from framework.auth import Auth
+from osf.models import AbstractNode, NodeClosure, NodeRelation
+from osf_tests.factories import NodeFactory, ProjectFactory
+
+
+def closure(node):
+    return set(
+        NodeClosure.objects.filter(descendant=node).values_list('ancestor_id', 'depth')
+    )
+
+
+@pytest.fixture()
+def project():
+    return ProjectFactory()
+
+@pytest.fixture()
+def component(project):
+    return NodeFactory(parent=project)
+
+@pytest.fixture()
+def subcomponent(component):
+    return NodeFactory(parent=component)
+
+
+@pytest.mark.django_db
+class TestNodeClosure:
+
+    def test_components_are_added(self, project, component, subcomponent):
+        assert closure(project) == set()
+        assert closure(component) == {(project.id, 1)}
+        assert closure(subcomponent) == {(component.id, 1), (project.id, 2)}
+
+    def test_node_links_are_not_added(self, project, component):
+        other = ProjectFactory()
+        other.add_node_link(component, auth=Auth(other.creator), save=True)
+        assert closure(component) == {(project.id, 1)}
+        assert not NodeClosure.objects.filter(ancestor=other).exists()
+
+    def test_removed_with_relation(self, project, component, subcomponent):
+        NodeRelation.objects.get(parent=project, child=component).delete()
+        assert closure(component) == set()
+        assert closure(subcomponent) == {(component.id, 1)}
+
+    def test_relinked_subtree(self, project, component, subcomponent):
+        other = ProjectFactory()
+        relation = NodeRelation.objects.get(parent=project, child=component)
+        relation.parent = other
+        relation.save()
+        assert closure(component) == {(other.id, 1)}
+        assert closure(subcomponent) == {(component.id, 1), (other.id, 2)}
+
+    def test_hierarchy_queries(self, project, component, subcomponent):
+        assert subcomponent.get_root() == project
+        assert component.get_root() == project
+        assert project.get_root() == project
+        assert subcomponent.parents == [component, project]
+        assert list(AbstractNode.objects.get_children(component).order_by('id')) == [subcomponent]
+        assert list(AbstractNode.objects.get_children(component, include_root=True).order_by('id')) == [component, subcomponent]
+
+        subcomponent.is_deleted = True
+        subcomponent.save()
+        assert not AbstractNode.objects.get_children(component, active=True).exists()
@@ -0,0 +1,92 @@
+import pytest
+
+from osf.utils.permission_resolver import NodePermissionResolver
+from osf.utils.permissions import ADMIN, READ, WRITE
+from osf_tests.factories import (
+    NodeFactory,
+    OSFGroupFactory,
+    ProjectFactory,
+    UserFactory,
+)
+
+
+@pytest.fixture()
+def user():
+    return UserFactory()
+
+@pytest.fixture()
+def admin():
+    return UserFactory()
+
+@pytest.fixture()
+def project(admin):
+    return ProjectFactory(creator=admin)
+
+@pytest.fixture()
+def component(project, admin):
+    return NodeFactory(parent=project, creator=admin)
+
+@pytest.fixture()
+def other_project(user):
+    return ProjectFactory(creator=user)
+
+
+@pytest.mark.django_db
+class TestNodePermissionResolver:
+
+    def test_resolves_many_nodes_with_one_query(self, django_assert_num_queries, admin, user, project, component, other_project):
+        resolver = NodePermissionResolver()
+        with django_assert_num_queries(1):
+            resolver.resolve([admin, user], [project, component, other_project])
+
+        with django_assert_num_queries(0):
+            assert resolver.has_permission(admin, project, ADMIN)
+            assert resolver.has_permission(admin, component, ADMIN)
+            assert not resolver.has_permission(admin, other_project, READ)
+            assert resolver.has_permission(user, other_project, ADMIN)
+            assert not resolver.has_permission(user, project, READ)
+
+    def test_implicit_admin_through_parent(self, user, component, admin):
+        component.add_contributor(user, permissions=WRITE, auth=None, save=True)
+        child = NodeFactory(parent=component, creator=user)
+
+        resolver = NodePermissionResolver()
+        assert resolver.get(admin, child).is_admin_parent
+        assert resolver.has_permission(admin, child, READ)
+        assert not resolver.has_permission(admin, child, READ, check_parent=False)
+        assert not resolver.has_permission(admin, child, WRITE)
+        assert not resolver.get(user, component).is_admin_parent
+
+    def test_osf_group_permissions(self, user, project, admin):
+        group = OSFGroupFactory(creator=user)
+        project.add_osf_group(group, WRITE, auth=None)
+
+        resolver = NodePermissionResolver()
+        assert resolver.has_permission(user, project, WRITE)
+        assert not resolver.has_permission(user, project, ADMIN)
+
+    def test_resolver_matches_has_permission(self, user, project, component):
+        component.add_contributor(user, permissions=READ, auth=None, save=True)
+        resolver = NodePermissionResolver()
+        resolver.resolve([user], [project, component])
+        for node in (project, component):
+            for permission in (READ, WRITE, ADMIN):
+                assert resolver.has_permission(user, node, permission) == node.has_permission(user, permission)
+
+    def test_shared_within_request(self, request_context, django_assert_num_queries, user, project):
+        NodePermissionResolver.get_current().resolve([user], [project])
+        with django_assert_num_queries(0):
+            assert not project.has_permission(user, READ)
+            assert project.get_permissions(user) == []
+
+    def test_cleared_when_permissions_change(self, request_context, user, project, admin):
+        assert not project.has_permission(user, WRITE)
+        project.add_contributor(user, permissions=WRITE, auth=None, save=True)
+        assert project.has_permission(user, WRITE)
+
+        project.set_permissions(user, READ, save=True)
+        assert not project.has_permission(user, WRITE)
+        assert project.has_permission(user, READ)
+
+    def test_not_shared_outside_requests(self):
+        assert NodePermissionResolver.get_current() is not NodePermissionResolver.get_current()
@@ -878,6 +878,29 @@ class TestProjectsInCommon:
         assert user.n_projects_in_common(user2) == 1
         assert user.n_projects_in_common(user3) == 1
 
+    def test_n_projects_in_common_by_user(self, user, auth):
+        user2 = UserFactory()
+        user3 = UserFactory()
+        stranger = UserFactory()
+        project = NodeFactory(creator=user)
+        project.add_contributor(contributor=user2, auth=auth)
+        project.save()
+        NodeFactory(creator=user2).add_contributor(contributor=user, auth=Auth(user2), save=True)
+
+        group = OSFGroupFactory(name='Platform', creator=user)
+        group.make_member(user3)
+        project.add_osf_group(group)
+        project.save()
+        deleted = NodeFactory(creator=user3)
+        deleted.add_contributor(contributor=user, auth=Auth(user3), save=True)
+        deleted.is_deleted = True
+        deleted.save()
+
+        counts = user.n_projects_in_common_by_user([user2, user3, stranger])
+        assert counts == {user2.id: 2, user3.id: 1}
+        for other in (user2, user3, stranger):
+            assert counts.get(other.id, 0) == user.n_projects_in_common(other)
+
 
 class TestCookieMethods:
 
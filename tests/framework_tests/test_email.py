@@ -6,7 +6,7 @@ import mock
 from nose.tools import *  # noqa: F403
 import sendgrid
 
-from framework.email.tasks import send_email, _send_with_sendgrid
+from framework.email.tasks import send_email, send_emails, _send_with_sendgrid
 from website import settings
 from tests.base import fake
 from osf_tests.factories import fake_email
@@ -74,6 +74,72 @@ class TestEmail(unittest.TestCase):
         )
         assert_false(ret)
 
+    @mock.patch('framework.email.tasks.settings.SENDGRID_API_KEY', None)
+    @mock.patch('framework.email.tasks.settings.USE_EMAIL', True)
+    @mock.patch('framework.email.tasks.smtplib.SMTP')
+    def test_send_emails_reuses_smtp_connection(self, mock_smtp):
+        messages = [
+            {'to_addr': fake_email(), 'subject': fake.bs(), 'message': fake.text()}
+            for _ in range(3)
+        ]
+        sent = send_emails(fake_email(), messages, ttls=False, login=False)
+        assert_equal(sent, 3)
+        assert_equal(mock_smtp.call_count, 1)
+        connection = mock_smtp.return_value
+        assert_equal(connection.sendmail.call_count, 3)
+        assert_equal(
+            [call[1]['to_addrs'] for call in connection.sendmail.call_args_list],
+            [[message['to_addr']] for message in messages]
+        )
+        assert_equal(connection.quit.call_count, 1)
+
+    @mock.patch('framework.email.tasks.settings.SENDGRID_API_KEY', 'key')
+    @mock.patch('framework.email.tasks.settings.SENDGRID_WHITELIST_MODE', False)
+    @mock.patch('framework.email.tasks.settings.USE_EMAIL', True)
+    @mock.patch('framework.email.tasks.sendgrid.SendGridClient')
+    def test_send_emails_reuses_sendgrid_client(self, mock_client_class):
+        mock_client_class.return_value.send.return_value = 200, 'success'
+        messages = [
+            {'to_addr': fake_email(), 'subject': fake.bs(), 'message': fake.text()}
+            for _ in range(3)
+        ]
+        sent = send_emails(fake_email(), messages)
+        assert_equal(sent, 3)
+        assert_equal(mock_client_class.call_count, 1)
+        assert_equal(mock_client_class.return_value.send.call_count, 3)
+
+    @mock.patch('framework.email.tasks.settings.SENDGRID_API_KEY', None)
+    @mock.patch('framework.email.tasks.settings.USE_EMAIL', True)
+    @mock.patch('framework.email.tasks.smtplib.SMTP')
+    def test_send_emails_continues_after_smtp_error(self, mock_smtp):
+        connection = mock_smtp.return_value
+        connection.sendmail.side_effect = [None, smtplib.SMTPServerDisconnected(), None]
+        messages = [
+            {'to_addr': fake_email(), 'subject': fake.bs(), 'message': fake.text()}
+            for _ in range(3)
+        ]
+        sent = send_emails(fake_email(), messages, ttls=False, login=False)
+        assert_equal(sent, 2)
+        assert_equal(connection.sendmail.call_count, 3)
+        # Reconnected after the error
+        assert_equal(mock_smtp.call_count, 2)
+
+    @mock.patch('framework.email.tasks.settings.SENDGRID_API_KEY', 'key')
+    @mock.patch('framework.email.tasks.settings.SENDGRID_WHITELIST_MODE', False)
+    @mock.patch('framework.email.tasks.settings.USE_EMAIL', True)
+    @mock.patch('framework.email.tasks.sendgrid.SendGridClient')
+    def test_send_emails_retries_failed_messages(self, mock_client_class):
+        mock_client_class.return_value.send.side_effect = [(200, 'success'), Exception(), (200, 'success')]
+        messages = [
+            {'to_addr': fake_email(), 'subject': fake.bs(), 'message': fake.text()}
+            for _ in range(3)
+        ]
+        with mock.patch.object(send_emails, 'retry') as mock_retry:
+            result = send_emails.apply(args=(fake_email(), messages))
+        assert_equal(result.get(), 2)
+        assert_equal(mock_client_class.return_value.send.call_count, 3)
+        assert_equal(mock_retry.call_args[1]['kwargs']['messages'], [messages[1]])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,11 +1,14 @@
 # -*- coding: utf-8 -*-
 import furl
+import json
 import responses
+import time
 import mock
 from nose.tools import *  # noqa: F403
 import unittest
 
 from framework.auth import cas
+from osf.models import CasTokenRevocation
 
 from tests.base import OsfTestCase, fake
 from osf_tests.factories import UserFactory
@@ -119,6 +122,7 @@ class TestCASClient(OsfTestCase):
         OsfTestCase.setUp(self)
         self.base_url = 'http://accounts.test.test'
         self.client = cas.CasClient(self.base_url)
+        cas.token_cache.clear()
 
     @responses.activate
     def test_service_validate(self):
@@ -170,6 +174,116 @@ class TestCASClient(OsfTestCase):
         with assert_raises(cas.CasHTTPError):
             self.client.profile('invalid-access-token')
 
+    @responses.activate
+    def test_profile_is_cached(self):
+        user = UserFactory()
+        responses.add(
+            responses.Response(
+                responses.GET,
+                self.client.get_profile_url(),
+                body=json.dumps({'id': user._id, 'scope': ['osf.full_read']}),
+                status=200,
+            )
+        )
+        resp = self.client.profile('access-token')
+        resp.attributes['accessTokenScope'].add('osf.full_write')
+
+        cached_resp = self.client.profile('access-token')
+        assert_equal(len(responses.calls), 1)
+        assert_true(cached_resp.authenticated)
+        assert_equal(cached_resp.user, user._id)
+        assert_equal(cached_resp.attributes['accessTokenScope'], {'osf.full_read'})
+
+    @responses.activate
+    def test_profile_rejected_access_token_is_cached(self):
+        responses.add(
+            responses.Response(
+                responses.GET,
+                self.client.get_profile_url(),
+                status=401,
+            )
+        )
+        for _ in range(2):
+            with assert_raises(cas.CasHTTPError) as e:
+                self.client.profile('invalid-access-token')
+            assert_equal(e.exception.code, 401)
+        assert_equal(len(responses.calls), 1)
+
+    @responses.activate
+    def test_profile_server_error_is_not_cached(self):
+        responses.add(
+            responses.Response(
+                responses.GET,
+                self.client.get_profile_url(),
+                status=500,
+            )
+        )
+        for _ in range(2):
+            with assert_raises(cas.CasHTTPError):
+                self.client.profile('access-token')
+        assert_equal(len(responses.calls), 2)
+
+    @responses.activate
+    def test_token_revocation_invalidates_cached_profile(self):
+        user = UserFactory()
+        responses.add(
+            responses.Response(
+                responses.GET,
+                self.client.get_profile_url(),
+                body=json.dumps({'id': user._id}),
+                status=200,
+            )
+        )
+        responses.add(
+            responses.Response(
+                responses.POST,
+                self.client.get_auth_token_revocation_url(),
+                status=204,
+            )
+        )
+        self.client.profile('access-token')
+        self.client.revoke_tokens({'token': 'access-token'})
+        self.client.profile('access-token')
+        assert_equal(len([call for call in responses.calls if call.request.method == 'GET']), 2)
+
+    @responses.activate
+    def test_token_revocation_by_other_process_invalidates_cached_profile(self):
+        user = UserFactory()
+        responses.add(
+            responses.Response(
+                responses.GET,
+                self.client.get_profile_url(),
+                body=json.dumps({'id': user._id}),
+                status=200,
+            )
+        )
+        self.client.profile('access-token')
+        self.client.profile('other-access-token')
+        # Recorded by another process, whose revocation did not touch this process's cache
+        CasTokenRevocation.revoke(cas.TokenCache._key('access-token'), time.time())
+
+        self.client.profile('access-token')
+        self.client.profile('other-access-token')
+        assert_equal(len(responses.calls), 3)
+        assert_equal(responses.calls[-1].request.headers['Authorization'], 'Bearer access-token')
+
+    @responses.activate
+    def test_application_token_revocation_by_other_process_invalidates_cached_profiles(self):
+        user = UserFactory()
+        responses.add(
+            responses.Response(
+                responses.GET,
+                self.client.get_profile_url(),
+                body=json.dumps({'id': user._id}),
+                status=200,
+            )
+        )
+        self.client.profile('access-token')
+        CasTokenRevocation.revoke(CasTokenRevocation.ALL_TOKENS, time.time())
+
+        self.client.profile('access-token')
+        assert_equal(len(responses.calls), 2)
+
     @responses.activate
     def test_application_token_revocation_succeeds(self):
         url = self.client.get_auth_token_revocation_url()
@@ -219,6 +333,33 @@ class TestCASClient(OsfTestCase):
         assert 0
 
 
+class TestTokenCache(unittest.TestCase):
+
+    def test_least_recently_used_is_evicted(self):
+        cache = cas.TokenCache(max_size=2, ttl=60, negative_ttl=10)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        assert_equal(cache.get('a'), 1)
+        assert_is_none(cache.get('b'))
+        assert_equal(cache.get('c'), 3)
+
+    @mock.patch('framework.auth.cas.time.time')
+    def test_entries_expire(self, mock_time):
+        cache = cas.TokenCache(max_size=2, ttl=60, negative_ttl=10)
+        mock_time.return_value = 1000
+        cache.set('valid', 1)
+        cache.set('invalid', 2, negative=True)
+
+        mock_time.return_value = 1030
+        assert_equal(cache.get('valid'), 1)
+        assert_is_none(cache.get('invalid'))
+
+        mock_time.return_value = 1061
+        assert_is_none(cache.get('valid'))
+
+
 class TestCASTicketAuthentication(OsfTestCase):
 
     def setUp(self):
@@ -2,6 +2,8 @@ import collections
 import mock
 from babel import dates, Locale
 from schema import Schema, And, Use, Or
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from nose.tools import *  # noqa PEP8 asserts
@@ -1282,6 +1284,44 @@ class TestCompileSubscriptions(NotificationTestCase):
         subs = emails.compile_subscriptions(node5, 'file_updated')
         assert_equal(subs, {'email_transactional': [], 'email_digest': [self.user_1._id], 'none': []})
 
+    def test_event_subscription_overrides_node_subscriptions(self):
+        self.base_sub.email_transactional.add(self.user_1, self.user_2)
+        self.base_sub.save()
+        event_sub = factories.NotificationSubscriptionFactory(
+            _id=self.shared_node._id + '_xyz42_file_updated',
+            node=self.shared_node,
+            event_name='xyz42_file_updated'
+        )
+        event_sub.save()
+        event_sub.email_digest.add(self.user_1)
+        event_sub.save()
+        subs = emails.compile_subscriptions(self.shared_node, 'file_updated', 'xyz42_file_updated')
+        assert_equal(subs, {'email_transactional': [self.user_2._id], 'email_digest': [self.user_1._id], 'none': []})
+
+    def test_disabled_users_not_listed(self):
+        self.base_sub.email_transactional.add(self.user_1, self.user_2)
+        self.base_sub.save()
+        self.user_2.date_disabled = timezone.now()
+        self.user_2.save()
+        subs = emails.compile_subscriptions(self.base_project, 'file_updated')
+        assert_equal(subs, {'email_transactional': [self.user_1._id], 'email_digest': [], 'none': []})
+
+    def test_number_of_queries_independent_of_depth(self):
+        self.base_sub.email_transactional.add(self.user_1, self.user_2, self.user_3)
+        self.base_sub.save()
+        node = self.shared_node
+        with CaptureQueriesContext(connection) as ctx:
+            emails.compile_subscriptions(node, 'file_updated')
+        n_queries = len(ctx.captured_queries)
+
+        for _ in range(4):
+            node = factories.NodeFactory(parent=node, creator=self.user_1)
+        with CaptureQueriesContext(connection) as ctx:
+            subs = emails.compile_subscriptions(node, 'file_updated')
+        assert_equal(len(ctx.captured_queries), n_queries)
+        # user_3 cannot read the new components, user_2 is an admin on their parents
+        assert_equal(set(subs['email_transactional']), {self.user_1._id, self.user_2._id})
+
 
 class TestMoveSubscription(NotificationTestCase):
     def setUp(self):
@@ -1817,8 +1857,8 @@ class TestSendDigest(OsfTestCase):
         digest_ids = [d._id, d2._id, d3._id]
         remove_notifications(email_notification_ids=digest_ids)
 
-    @mock.patch('website.mails.send_mail')
-    def test_send_users_email_called_with_correct_args(self, mock_send_mail):
+    @mock.patch('website.mails.send_mail_batch')
+    def test_send_users_email_called_with_correct_args(self, mock_send_mail_batch):
         send_type = 'email_transactional'
         d = factories.NotificationDigestFactory(
             send_type=send_type,
@@ -1830,22 +1870,41 @@ class TestSendDigest(OsfTestCase):
         d.save()
         user_groups = list(get_users_emails(send_type))
         send_users_email(send_type)
-        assert_true(mock_send_mail.called)
-        assert_equals(mock_send_mail.call_count, len(user_groups))
+        assert_equals(mock_send_mail_batch.call_count, 1)
+
+        args, kwargs = mock_send_mail_batch.call_args
+        mail, recipients = args
+        assert_equal(mail, mails.DIGEST)
+        assert_equal(len(recipients), len(user_groups))
 
         last_user_index = len(user_groups) - 1
         user = OSFUser.load(user_groups[last_user_index]['user_id'])
+        to_addr, context = recipients[last_user_index]
 
-        args, kwargs = mock_send_mail.call_args
-
-        assert_equal(kwargs['to_addr'], user.username)
-        assert_equal(kwargs['mail'], mails.DIGEST)
-        assert_equal(kwargs['name'], user.fullname)
-        assert_equal(kwargs['can_change_node_preferences'], True)
+        assert_equal(to_addr, user.username)
+        assert_equal(context['name'], user.fullname)
+        assert_equal(context['can_change_node_preferences'], True)
         message = group_by_node(user_groups[last_user_index]['info'])
-        assert_equal(kwargs['message'], message)
+        assert_equal(context['message'], message)
+        assert_false(NotificationDigest.objects.filter(_id=d._id).exists())
 
-    @mock.patch('website.mails.send_mail')
+    @mock.patch('website.notifications.tasks.DIGEST_BATCH_SIZE', 2)
+    @mock.patch('website.mails.send_mail_batch')
+    def test_send_users_email_in_batches(self, mock_send_mail_batch):
+        send_type = 'email_transactional'
+        for _ in range(3):
+            factories.NotificationDigestFactory(
+                send_type=send_type,
+                event='comment_replies',
+                timestamp=timezone.now(),
+                message='Hello',
+                node_lineage=[factories.ProjectFactory()._id]
+            )
+        send_users_email(send_type)
+        assert_equal([len(call[0][1]) for call in mock_send_mail_batch.call_args_list], [2, 1])
+        assert_false(list(get_users_emails(send_type)))
+
+    @mock.patch('website.mails.send_mail_batch')
     def test_send_users_email_ignores_disabled_users(self, mock_send_mail):
         send_type = 'email_transactional'
         d = factories.NotificationDigestFactory(
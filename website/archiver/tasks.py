@@ -28,6 +28,7 @@ from website.project import signals as project_signals
 from website.project.tasks import update_share
 from website import settings
 from website.app import init_addons
+from website.files.utils import copy_files
 from osf.models import (
     ArchiveJob,
     AbstractNode,
@@ -206,10 +207,37 @@ def archive_addon(addon_short_name, job_pk):
     src_provider = src.get_addon(addon_short_name)
     folder_name = src_provider.archive_folder_name
     rename = '{}{}'.format(folder_name, rename_suffix)
+    if utils.can_archive_natively(src, dst, addon_short_name):
+        archive_osfstorage.delay(job_pk=job_pk, rename=rename)
+        return
     url = waterbutler_api_url_for(src._id, addon_short_name, _internal=True, base_url=src.osfstorage_region.waterbutler_url, **params)
     data = make_waterbutler_payload(dst._id, rename)
     make_copy_request.delay(job_pk=job_pk, url=url, data=data)
 
+@celery_app.task(base=ArchiverTask, ignore_result=False)
+@logged('archive_osfstorage')
+def archive_osfstorage(job_pk, rename):
+    """Archive the OSF Storage files of a node without copying their contents. Stored contents
+    are addressed by their hash, so the registration's copies of the files can share the versions
+    of the node's files, see `utils.can_archive_natively`.
+
+    :param job_pk: primary key of ArchiveJob
+    :param rename: Name of the folder of the archived files
+    :return: None
+    """
+    create_app_context()
+    job = ArchiveJob.load(job_pk)
+    src, dst, user = job.info()
+    logger.info('Archiving OSF Storage of node: {0} into node: {1}'.format(src._id, dst._id))
+    copy_files(
+        src.get_addon('osfstorage').get_root(),
+        dst,
+        parent=dst.get_addon('osfstorage').get_root(),
+        name=rename,
+    )
+    job.update_target('osfstorage', ARCHIVER_SUCCESS)
+    project_signals.archive_callback.send(dst)
+
 @celery_app.task(base=ArchiverTask, ignore_result=False)
 @logged('archive_node')
 def archive_node(stat_results, job_pk):
@@ -290,13 +318,9 @@ def archive_success(dst_pk, job_pk):
 
     :param str dst_pk: primary key of registration Node
 
-    note:: At first glance this task makes redundant calls to utils.get_file_map (which
-    returns a generator yielding  (<sha256>, <file_metadata>) pairs) on the dst Node. Two
-    notes about utils.get_file_map: 1) this function memoizes previous results to reduce
-    overhead and 2) this function returns a generator that lazily fetches the file metadata
-    of child Nodes (it is possible for a selected file to belong to a child Node) using a
-    non-recursive DFS. Combined this allows for a relatively effient implementation with
-    seemingly redundant calls.
+    note:: The files of the dst Node and its components (it is possible for a selected file
+    to belong to a child Node) are indexed once, by a utils.RegistrationFileIndex shared by
+    every schema, and only if a schema has files.
     """
     create_app_context()
     dst = AbstractNode.load(dst_pk)
@@ -309,9 +333,10 @@ def archive_success(dst_pk, job_pk):
     # questions. These files are references to files on the unregistered Node, and
     # consequently we must migrate those file paths after archiver has run. Using
     # sha256 hashes is a convenient way to identify files post-archival.
+    file_index = utils.RegistrationFileIndex(dst)
     for schema in dst.registered_schema.all():
         if schema.has_files:
-            utils.migrate_file_metadata(dst, schema)
+            utils.migrate_file_metadata(dst, schema, file_index=file_index)
     job = ArchiveJob.load(job_pk)
     if not job.sent:
         job.sent = True
@@ -1,4 +1,6 @@
-import functools
+import collections
+
+from django.contrib.contenttypes.models import ContentType
 
 from framework.auth import Auth
 
@@ -142,6 +144,27 @@ def link_archive_provider(node, user):
         addon.on_add()
     node.save()
 
+def can_archive_natively(src, dst, addon_short_name):
+    """Whether the files of ``addon_short_name`` on ``src`` can be archived on ``dst`` without
+    copying their contents through WaterButler: OSF Storage files can share their versions with
+    their archived copies, as long as every version is stored in the region of ``dst``.
+    """
+    from osf.models import FileVersion
+
+    if not settings.ARCHIVE_OSFSTORAGE_NATIVELY:
+        return False
+    if addon_short_name != 'osfstorage' or settings.ARCHIVE_PROVIDER != 'osfstorage':
+        return False
+    region_id = dst.get_addon('osfstorage').region_id
+    if src.get_addon('osfstorage').region_id != region_id:
+        return False
+    return not FileVersion.objects.filter(
+        basefilenode__target_object_id=src.id,
+        basefilenode__target_content_type=ContentType.objects.get_for_model(src),
+        basefilenode__provider='osfstorage',
+        region__isnull=False,
+    ).exclude(region_id=region_id).exists()
+
 def aggregate_file_tree_metadata(addon_short_name, fileobj_metadata, user):
     """Recursively traverse the addon's file tree and collect metadata in AggregateStatResult
 
@@ -180,52 +203,77 @@ def _do_get_file_map(file_tree):
     """Reduces a tree of folders and files into a list of (<sha256>, <file_metadata>) pairs
     """
     file_map = []
-    stack = [file_tree]
-    while len(stack):
-        tree_node = stack.pop(0)
+    queue = collections.deque([file_tree])
+    while queue:
+        tree_node = queue.popleft()
         if tree_node['kind'] == 'file':
             file_map.append((tree_node['extra']['hashes']['sha256'], tree_node))
         else:
-            stack = stack + tree_node['children']
+            queue.extend(tree_node['children'])
     return file_map
 
-def _memoize_get_file_map(func):
-    cache = {}
-
-    @functools.wraps(func)
-    def wrapper(node):
-        if node._id not in cache:
-            osf_storage = node.get_addon('osfstorage')
-            file_tree = osf_storage._get_file_tree(user=node.creator)
-            cache[node._id] = _do_get_file_map(file_tree)
-        return func(node, cache[node._id])
-    return wrapper
+def _get_node_file_map(node):
+    osf_storage = node.get_addon('osfstorage')
+    return _do_get_file_map(osf_storage._get_file_tree(user=node.creator))
 
-@_memoize_get_file_map
-def get_file_map(node, file_map):
+def get_file_map(node):
+    """Yield (<sha256>, <file_metadata>, <node _id>) for the OSF Storage files of node and its
+    components
     """
-    note:: file_map is injected implictly by the decorator; this method is called like:
-
-    get_file_map(node)
-    """
-    for (key, value) in file_map:
+    for key, value in _get_node_file_map(node):
         yield (key, value, node._id)
     for child in node.nodes_primary:
         for key, value, node_id in get_file_map(child):
             yield (key, value, node_id)
 
-def find_registration_file(value, node):
+
+class RegistrationFileIndex(object):
+    """The archived OSF Storage files of a registration and its components, indexed by
+    (<sha256>, <_id of the node the file was registered from>, <name>).
+
+    The index is built on first use, fetching each file tree once, and lives as long as the
+    instance: one is made for each archive job, see `website.archiver.tasks.archive_success`.
+    """
+
+    def __init__(self, registration):
+        self.registration = registration
+        self._index = None
+
+    def _build(self):
+        from osf.models import AbstractNode
+
+        nodes = list(self.registration.node_and_primary_descendants())
+        registered_from = {
+            node.id: node._id
+            for node in AbstractNode.objects.filter(id__in=[node.registered_from_id for node in nodes])
+        }
+        index = {}
+        for node in nodes:
+            registered_from_id = registered_from.get(node.registered_from_id)
+            for sha256, file_info in _get_node_file_map(node):
+                # The first of identical files is the one found, as when searching the trees in order
+                index.setdefault((sha256, registered_from_id, file_info['name']), (file_info, node._id))
+        return index
+
+    def get(self, sha256, registered_from_id, name):
+        """The (file_info, node_id) of an archived file, or (None, None)"""
+        if self._index is None:
+            self._index = self._build()
+        return self._index.get((sha256, registered_from_id, name), (None, None))
+
+
+def find_registration_file(value, node, file_index=None):
     """
     some annotations:
 
     - `value` is  the `extra` from a file upload in `registered_meta`
         (see `Uploader.addFile` in website/static/js/registrationEditorExtensions.js)
     - `node` is a Registration instance
+    - `file_index` is the RegistrationFileIndex of `node`, made if not given
     - returns a `(file_info, node_id)` or `(None, None)` tuple, where `file_info` is from waterbutler's api
         (see `addons.base.models.BaseStorageAddon._get_fileobj_child_metadata` and `waterbutler.core.metadata.BaseMetadata`)
     """
-    from osf.models import AbstractNode
-    orig_sha256 = value['sha256']
+    file_index = file_index or RegistrationFileIndex(node)
     orig_name = unescape_entities(
         value['selectedFileName'],
         safe={
@@ -233,15 +281,9 @@ def find_registration_file(value, node):
             '&gt;': '>'
         }
     )
-    orig_node = value['nodeId']
-    file_map = get_file_map(node)
-    for sha256, file_info, node_id in file_map:
-        registered_from_id = AbstractNode.load(node_id).registered_from._id
-        if sha256 == orig_sha256 and registered_from_id == orig_node and orig_name == file_info['name']:
-            return file_info, node_id
-    return None, None
-
-def find_registration_files(values, node):
+    return file_index.get(value['sha256'], value['nodeId'], orig_name)
+
+def find_registration_files(values, node, file_index=None):
     """
     some annotations:
 
@@ -250,9 +292,10 @@ def find_registration_files(values, node):
     - returns a list of `(file_info, node_id, index)` or `(None, None, index)` tuples,
         where `file_info` is from `find_registration_file` above
     """
+    file_index = file_index or RegistrationFileIndex(node)
     ret = []
     for i in range(len(values.get('extra', []))):
-        ret.append(find_registration_file(values['extra'][i], node) + (i,))
+        ret.append(find_registration_file(values['extra'][i], node, file_index=file_index) + (i,))
     return ret
 
 def get_title_for_question(schema, path):
@@ -315,7 +358,11 @@ def deep_get(obj, path):
         item = item[key]
     return item
 
-def migrate_file_metadata(dst, schema):
+def migrate_file_metadata(dst, schema, file_index=None):
+    """Point the files selected in the responses of ``dst`` to ``schema`` at their archived
+    copies. ``file_index`` is the RegistrationFileIndex of ``dst``, made if not given.
+    """
+    file_index = file_index or RegistrationFileIndex(dst)
     metadata = dst.registered_meta[schema._id]
     missing_files = []
     selected_files = find_selected_files(schema, metadata)
@@ -323,7 +370,7 @@ def migrate_file_metadata(dst, schema):
     for path, selected in selected_files.items():
         target = deep_get(metadata, path)
 
-        for archived_file_info, node_id, index in find_registration_files(selected, dst):
+        for archived_file_info, node_id, index in find_registration_files(selected, dst, file_index=file_index):
             if not archived_file_info:
                 missing_files.append({
                     'file_name': selected['extra'][index]['selectedFileName'],
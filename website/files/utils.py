@@ -1,53 +1,173 @@
+from django.db import connection, transaction
+
+# Number of rows created per INSERT when copying a tree of files
+COPY_BATCH_SIZE = 1000
+
+# The most recent version of each file
+LATEST_VERSIONS_SQL = """
+    SELECT DISTINCT ON (T.basefilenode_id) T.basefilenode_id, V.id, V.region_id
+    FROM osf_basefileversionsthrough AS T
+      JOIN osf_fileversion AS V ON V.id = T.fileversion_id
+    WHERE T.basefilenode_id = ANY(%s)
+    ORDER BY T.basefilenode_id, V.created DESC, V.id DESC;
+"""
+
+# Attach the versions of each source file to its copy. The most recent version may be replaced
+# by a copy of it (when moving to another region) and may be named after the copy.
+COPY_VERSIONS_SQL = """
+    INSERT INTO osf_basefileversionsthrough (basefilenode_id, fileversion_id, version_name)
+    SELECT
+      F.new_id,
+      CASE WHEN T.fileversion_id = F.latest_id THEN COALESCE(F.replacement_id, T.fileversion_id) ELSE T.fileversion_id END,
+      CASE WHEN T.fileversion_id = F.latest_id AND F.latest_name IS NOT NULL THEN F.latest_name ELSE T.version_name END
+    FROM unnest(%s::integer[], %s::integer[], %s::integer[], %s::integer[], %s::text[])
+      AS F(old_id, new_id, latest_id, replacement_id, latest_name)
+      JOIN osf_basefileversionsthrough AS T ON T.basefilenode_id = F.old_id;
+"""
+
 
 def copy_files(src, target_node, parent=None, name=None):
     """Copy the files from src to the target node
     :param Folder src: The source to copy children from
     :param Node target_node: The node to copy files to
     :param Folder parent: The parent of to attach the clone of src to, if applicable
+
+    The tree is copied one level of folders at a time, with a few bulk queries per level
+    and a few more for the versions and metadata records of all files, rather than a few
+    queries per file.
     """
+    from osf.models import BaseFileNode, TrashedFileNode
+
     assert not parent or not parent.is_file, 'Parent must be a folder'
     renaming = src.name != name
 
-    cloned = src.clone()
-    cloned.parent = parent
-    cloned.target = target_node
-    cloned.name = name or cloned.name
-    cloned.copied_from = src
-
-    cloned.save()
-    if src.is_file and src.versions.exists():
-        fileversions = src.versions.select_related('region').order_by('-created')
-        most_recent_fileversion = fileversions.first()
-        if most_recent_fileversion.region and most_recent_fileversion.region != target_node.osfstorage_region:
-            # add all original version except the most recent
-            attach_versions(cloned, fileversions[1:], src)
-            # create a new most recent version and update the region before adding
-            new_fileversion = most_recent_fileversion.clone()
-            new_fileversion.region = target_node.osfstorage_region
-            new_fileversion.save()
-            attach_versions(cloned, [new_fileversion], src)
-        else:
-            attach_versions(cloned, src.versions.all(), src)
-
-        if renaming:
-            latest_version = cloned.versions.first()
-            node_file_version = latest_version.get_basefilenode_version(cloned)
-            # If this is a copy and a rename, update the name on the through table
-            node_file_version.version_name = cloned.name
-            node_file_version.save()
-
-        # copy over file metadata records
+    # [(source id, copy)] of every file node copied
+    copies = []
+    with transaction.atomic():
+        level = [(BaseFileNode.objects.get(id=src.id), parent)]
+        while level:
+            clones = [
+                (node.id, _copy_file_node(node, target_node, new_parent, name=name if not copies else None))
+                for node, new_parent in level
+            ]
+            BaseFileNode.objects.bulk_create([clone for _, clone in clones], batch_size=COPY_BATCH_SIZE)
+            copies.extend(clones)
+
+            folders = {old_id: clone for old_id, clone in clones if not clone.is_file}
+            level = [
+                (child, folders[child.parent_id])
+                for child in BaseFileNode.objects.filter(
+                    parent_id__in=list(folders)
+                ).exclude(
+                    type__in=TrashedFileNode._typedmodels_subtypes
+                ).order_by('id')
+            ] if folders else []
+
+        cloned = copies[0][1]
+        files = [(old_id, clone) for old_id, clone in copies if clone.is_file]
+        # If the top file keeps its name, its most recent version keeps the name it had on src
+        _copy_versions(files, target_node, keep_names=() if renaming else (src.id, ))
         if cloned.provider == 'osfstorage':
-            for record in cloned.records.all():
-                record.metadata = src.records.get(schema__name=record.schema.name).metadata
-                record.save()
+            _copy_metadata_records(files)
 
-    if not src.is_file:
-        for child in src.children:
-            copy_files(child, target_node, parent=cloned)
+    if cloned.provider == 'osfstorage' and getattr(target_node, 'is_public', False):
+        from website.search import search
+        for _, clone in files:
+            search.update_file(clone)
 
     return cloned
 
+def _copy_instance(instance, **fields):
+    """An unsaved copy of ``instance`` without its relations, like BaseModel.clone"""
+    from osf.models.base import generate_object_id
+
+    values = {
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+        if not field.primary_key and not field.is_relation
+    }
+    values['_id'] = generate_object_id()
+    values.update(fields)
+    return instance.__class__(**values)
+
+def _copy_file_node(node, target_node, parent, name=None):
+    clone = _copy_instance(node, parent=parent, target=target_node, copied_from_id=node.id)
+    clone.name = name or clone.name
+    if clone.provider == 'osfstorage':
+        if parent is not None:
+            # A copy of a root folder under another folder is an ordinary folder
+            clone.is_root = None
+        # As computed by OsfStorageFileNode.save
+        clone._path = ''
+        clone._materialized_path = (parent.materialized_path if parent else '') + clone.name + ('' if clone.is_file else '/')
+    return clone
+
+def _copy_versions(files, target_node, keep_names=()):
+    """Attach the versions of the source files to their copies in ``files``, [(source id, copy)].
+    If the most recent version of a file is stored in another region than the target node's,
+    it is replaced by a copy of it in the target node's region.
+    """
+    from osf.models import FileVersion
+
+    if not files:
+        return
+    latest = {}
+    with connection.cursor() as cursor:
+        cursor.execute(LATEST_VERSIONS_SQL, [[old_id for old_id, _ in files]])
+        for file_id, version_id, region_id in cursor.fetchall():
+            latest[file_id] = (version_id, region_id)
+    if not latest:
+        return
+
+    replacements = {}
+    target_region = target_node.osfstorage_region
+    moved = {
+        file_id: version_id for file_id, (version_id, region_id) in latest.items()
+        if region_id and region_id != getattr(target_region, 'id', None)
+    }
+    if moved:
+        versions = FileVersion.objects.in_bulk(set(moved.values()))
+        replacements = {
+            file_id: _copy_instance(versions[version_id], region=target_region)
+            for file_id, version_id in moved.items()
+        }
+        FileVersion.objects.bulk_create(replacements.values(), batch_size=COPY_BATCH_SIZE)
+
+    rows = [
+        (
+            old_id,
+            clone.id,
+            latest[old_id][0],
+            replacements[old_id].id if old_id in replacements else None,
+            None if old_id in keep_names and old_id not in replacements else clone.name,
+        )
+        for old_id, clone in files if old_id in latest
+    ]
+    with connection.cursor() as cursor:
+        for i in range(0, len(rows), COPY_BATCH_SIZE):
+            cursor.execute(COPY_VERSIONS_SQL, [list(column) for column in zip(*rows[i:i + COPY_BATCH_SIZE])])
+
+def _copy_metadata_records(files):
+    """Create the metadata records of the copies in ``files``, [(source id, copy)], with the
+    metadata of the source files' records.
+    """
+    from osf.models import FileMetadataRecord, FileMetadataSchema
+
+    if not files:
+        return
+    schemas = list(FileMetadataSchema.objects.all())
+    metadata = {
+        (file_id, schema_name): record_metadata
+        for file_id, schema_name, record_metadata in FileMetadataRecord.objects.filter(
+            file_id__in=[old_id for old_id, _ in files]
+        ).values_list('file_id', 'schema__name', 'metadata')
+    }
+    FileMetadataRecord.objects.bulk_create([
+        FileMetadataRecord(file=clone, schema=schema, metadata=metadata.get((old_id, schema.name), {}))
+        for old_id, clone in files
+        for schema in schemas
+    ], batch_size=COPY_BATCH_SIZE)
+
 def attach_versions(file, versions_list, src=None):
     """
     Loops through all versions in the versions list and attaches them to the file.
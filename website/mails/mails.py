@@ -60,6 +60,7 @@ class Mail(object):
         self._subject = subject
         self.categories = categories
         self.engagement = engagement
+        self._subject_template = None
 
     def html(self, **context):
         """Render the HTML email message."""
@@ -67,7 +68,9 @@ class Mail(object):
         return render_message(tpl_name, **context)
 
     def subject(self, **context):
-        return Template(self._subject).render(**context)
+        if self._subject_template is None:
+            self._subject_template = Template(self._subject)
+        return self._subject_template.render(**context)
 
 
 def render_message(tpl_name, **context):
@@ -136,6 +139,46 @@ def send_mail(
             return ret
 
 
+def send_mail_batch(mail, recipients, from_addr=None, mailer=None, celery=True, **context):
+    """Send an email to many recipients, over a single connection to the mail server.
+
+    :param Mail mail: The mail object
+    :param recipients: Iterable of (to_addr, context) pairs, the address of each recipient and
+        the context vars of their message, which override ``context``
+    :param **context: Context vars shared by every message
+    """
+    if waffle.switch_is_active(features.DISABLE_ENGAGEMENT_EMAILS) and mail.engagement:
+        return False
+
+    from_addr = from_addr or settings.FROM_EMAIL
+    mailer = mailer or tasks.send_emails
+    messages = []
+    for to_addr, recipient_context in recipients:
+        message_context = dict(context, **recipient_context)
+        messages.append({
+            'to_addr': to_addr,
+            'subject': mail.subject(**message_context),
+            'message': mail.html(**message_context),
+        })
+    # Don't use ttls and login in DEBUG_MODE
+    ttls = login = not settings.DEBUG_MODE
+    logger.debug('Sending {} emails...'.format(len(messages)))
+
+    kwargs = dict(
+        from_addr=from_addr,
+        messages=messages,
+        ttls=ttls,
+        login=login,
+        categories=mail.categories,
+    )
+
+    if settings.USE_EMAIL and messages:
+        if settings.USE_CELERY and celery:
+            return mailer.apply_async(kwargs=kwargs)
+        else:
+            return mailer(**kwargs)
+
+
 def get_english_article(word):
     """
     Decide whether to use 'a' or 'an' for a given English word.
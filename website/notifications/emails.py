@@ -1,6 +1,7 @@
 from babel import dates, core, Locale
 
-from osf.models import AbstractNode, OSFUser, NotificationDigest, NotificationSubscription
+from osf.models import AbstractNode, OSFUser, NodeClosure, NotificationDigest, NotificationSubscription
+from osf.utils.permission_resolver import NodePermissionResolver
 from osf.utils.permissions import ADMIN, READ
 from website import mails
 from website.notifications import constants
@@ -120,34 +121,63 @@ def store_emails(recipient_ids, notification_type, event, user, node, timestamp,
         digest.save()
 
 
-def compile_subscriptions(node, event_type, event=None, level=0):
-    """Recurse through node and parents for subscriptions.
+def compile_subscriptions(node, event_type, event=None):
+    """Compile the users subscribed to ``event_type`` on node and its parents.
+
+    A user's subscription on a node overrides their subscriptions on its parents, and their
+    subscription to a particular ``event`` on the node overrides all of them. Subscriptions on
+    nodes the user cannot read are ignored, as are users who cannot read ``node``.
+
+    The subscriptions of the whole lineage are loaded with one query per notification type and
+    the permissions of their users with one more, however deep the node and many the users.
 
     :param node: current node
     :param event_type: Generally node_subscriptions_available
     :param event: Particular event such a file_updated that has specific file subs
-    :param level: How deep the recursion is
     :return: a dict of notification types with lists of users.
     """
-    subscriptions = check_node(node, event_type)
+    # [(node id, subscription key)], from the most particular to the most general
+    levels = [(node.id, utils.to_subscription_key(node._id, event_type))]
     if event:
-        subscriptions = check_node(node, event)  # Gets particular event subscriptions
-        parent_subscriptions = compile_subscriptions(node, event_type, level=level + 1)  # get node and parent subs
-    elif getattr(node, 'parent_id', False):
-        parent_subscriptions = \
-            compile_subscriptions(AbstractNode.load(node.parent_id), event_type, level=level + 1)
-    else:
-        parent_subscriptions = check_node(None, event_type)
-    for notification_type in parent_subscriptions:
-        p_sub_n = parent_subscriptions[notification_type]
-        p_sub_n.extend(subscriptions[notification_type])
-        for nt in subscriptions:
-            if notification_type != nt:
-                p_sub_n = list(set(p_sub_n).difference(set(subscriptions[nt])))
-        if level == 0:
-            p_sub_n, removed = utils.separate_users(node, p_sub_n)
-        parent_subscriptions[notification_type] = p_sub_n
-    return parent_subscriptions
+        levels.insert(0, (node.id, utils.to_subscription_key(node._id, event)))
+    levels.extend(
+        (ancestor_id, utils.to_subscription_key(ancestor_guid, event_type))
+        for ancestor_id, ancestor_guid in NodeClosure.objects.filter(
+            descendant_id=node.id
+        ).order_by('depth').values_list('ancestor_id', 'ancestor__guids___id')
+    )
+
+    # {subscription key: {notification type: set of user ids}}
+    subscribed = {key: {notification_type: set() for notification_type in constants.NOTIFICATION_TYPES} for _, key in levels}
+    user_guids = {}
+    for notification_type in constants.NOTIFICATION_TYPES:
+        through = getattr(NotificationSubscription, notification_type).through
+        for key, user_id, user_guid in through.objects.filter(
+            notificationsubscription___id__in=list(subscribed),
+            osfuser__date_disabled__isnull=True,
+        ).values_list('notificationsubscription___id', 'osfuser_id', 'osfuser__guids___id'):
+            subscribed[key][notification_type].add(user_id)
+            user_guids[user_id] = user_guid
+
+    resolver = NodePermissionResolver.get_current()
+    resolver.resolve(user_guids, {node_id for node_id, _ in levels})
+
+    subscriptions = {notification_type: set() for notification_type in constants.NOTIFICATION_TYPES}
+    for node_id, key in reversed(levels):
+        level_subscriptions = {
+            notification_type: {user_id for user_id in user_ids if resolver.has_permission(user_id, node_id, READ)}
+            for notification_type, user_ids in subscribed[key].items()
+        }
+        for notification_type, user_ids in level_subscriptions.items():
+            subscriptions[notification_type] |= user_ids
+            for other_type, other_user_ids in level_subscriptions.items():
+                if other_type != notification_type:
+                    subscriptions[notification_type] -= other_user_ids
+
+    return {
+        notification_type: [user_guids[user_id] for user_id in user_ids if resolver.has_permission(user_id, node.id, READ)]
+        for notification_type, user_ids in subscriptions.items()
+    }
 
 
 def check_node(node, event):
@@ -155,11 +185,14 @@ def check_node(node, event):
     node_subscriptions = {key: [] for key in constants.NOTIFICATION_TYPES}
     if node:
         subscription = NotificationSubscription.load(utils.to_subscription_key(node._id, event))
+        resolver = NodePermissionResolver.get_current()
         for notification_type in node_subscriptions:
             users = getattr(subscription, notification_type, [])
             if users:
-                for user in users.exclude(date_disabled__isnull=False):
-                    if node.has_permission(user, READ):
+                users = list(users.exclude(date_disabled__isnull=False))
+                resolver.resolve(users, [node])
+                for user in users:
+                    if resolver.has_permission(user, node, READ):
                         node_subscriptions[notification_type].append(user._id)
     return node_subscriptions
 
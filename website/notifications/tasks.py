@@ -13,6 +13,9 @@ from osf.utils.permissions import ADMIN
 from website import mails, settings
 from website.notifications.utils import NotificationsDict
 
+# Number of users whose digests are sent at a time
+DIGEST_BATCH_SIZE = 100
+
 
 @celery_app.task(name='website.notifications.tasks.send_users_email', max_retries=0)
 def send_users_email(send_type):
@@ -28,31 +31,54 @@ def send_users_email(send_type):
 def _send_global_and_node_emails(send_type):
     """
     Called by `send_users_email`. Send all global and node-related notification emails.
+
+    Digests are streamed from the database and sent DIGEST_BATCH_SIZE users at a time.
     """
     grouped_emails = get_users_emails(send_type)
-    for group in grouped_emails:
-        user = OSFUser.load(group['user_id'])
+    while True:
+        groups = list(itertools.islice(grouped_emails, DIGEST_BATCH_SIZE))
+        if not groups:
+            break
+        _send_digests(groups)
+
+
+def _send_digests(groups):
+    """Send the digests of a batch of users, loading the users and nodes they mention with a
+    query each, as a single batch of emails, and remove the notifications sent. An email that
+    fails does not stop the rest of the batch and is retried by `framework.email.tasks.send_emails`.
+    """
+    users = {user._id: user for user in OSFUser.objects.filter(guids___id__in=[group['user_id'] for group in groups])}
+    sorted_messages = {group['user_id']: group_by_node(group['info']) for group in groups}
+    # If there's only one node in digest we can show it's preferences link in the template.
+    single_node_ids = {
+        list(messages['children'].keys())[0]
+        for messages in sorted_messages.values()
+        if len(messages['children']) == 1
+    }
+    nodes = {node._id: node for node in AbstractNode.objects.filter(guids___id__in=single_node_ids)}
+
+    recipients = []
+    notification_ids = []
+    for group in groups:
+        user = users.get(group['user_id'])
         if not user:
             log_exception()
             continue
-        info = group['info']
-        notification_ids = [message['_id'] for message in info]
-        sorted_messages = group_by_node(info)
-        if sorted_messages:
-            if not user.is_disabled:
-                # If there's only one node in digest we can show it's preferences link in the template.
-                notification_nodes = list(sorted_messages['children'].keys())
-                node = AbstractNode.load(notification_nodes[0]) if len(
-                    notification_nodes) == 1 else None
-                mails.send_mail(
-                    to_addr=user.username,
-                    can_change_node_preferences=bool(node),
-                    node=node,
-                    mail=mails.DIGEST,
-                    name=user.fullname,
-                    message=sorted_messages,
-                )
-            remove_notifications(email_notification_ids=notification_ids)
+        notification_ids.extend(message['_id'] for message in group['info'])
+        if not user.is_disabled:
+            messages = sorted_messages[group['user_id']]
+            notification_nodes = list(messages['children'].keys())
+            node = nodes.get(notification_nodes[0]) if len(notification_nodes) == 1 else None
+            recipients.append((user.username, dict(
+                can_change_node_preferences=bool(node),
+                node=node,
+                name=user.fullname,
+                message=messages,
+            )))
+
+    if recipients:
+        mails.send_mail_batch(mails.DIGEST, recipients)
+    remove_notifications(email_notification_ids=notification_ids)
 
 
 def _send_reviews_moderator_emails(send_type):
@@ -134,9 +160,7 @@ def get_moderators_emails(send_type):
         ORDER BY osf_guid.id ASC
         """
 
-    with connection.cursor() as cursor:
-        cursor.execute(sql, [send_type, ])
-        return itertools.chain.from_iterable(cursor.fetchall())
+    return _stream_rows(sql, [send_type, ])
 
 
 def get_users_emails(send_type):
@@ -183,9 +207,17 @@ def get_users_emails(send_type):
     ORDER BY osf_guid.id ASC
     """
 
-    with connection.cursor() as cursor:
-        cursor.execute(sql, [send_type, ])
-        return itertools.chain.from_iterable(cursor.fetchall())
+    return _stream_rows(sql, [send_type, ])
+
+
+def _stream_rows(sql, params):
+    """Yield the single column of each row returned by ``sql``, read from a server-side cursor
+    a chunk at a time rather than all at once.
+    """
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(sql, params)
+        for row in cursor:
+            yield row[0]
 
 
 def group_by_node(notifications, limit=15):
@@ -27,7 +27,7 @@ def on_node_updated(node_id, user_id, first_save, saved_fields, request_headers=
         need_update = False
 
     if need_update:
-        node.update_search()
+        node.update_search(saved_fields=saved_fields)
         if settings.SHARE_ENABLED:
             update_share(node)
         update_collecting_metadata(node, saved_fields)
@@ -48,6 +48,7 @@ from addons.wiki.models import WikiPage
 from osf.models import AbstractNode, Collection, Contributor, Guid, PrivateLink, Node, NodeRelation, Preprint
 from osf.models.licenses import serialize_node_license_record
 from osf.utils.sanitize import strip_html
+from osf.utils.permission_resolver import NodePermissionResolver
 from osf.utils.permissions import ADMIN, READ, WRITE, CREATOR_PERMISSIONS, ADMIN_NODE
 from website import settings
 from website.views import find_bookmark_collection, validate_page_num
@@ -984,7 +985,10 @@ def get_recent_logs(node, **kwargs):
 def _get_readable_descendants(auth, node, permission=None):
     descendants = []
     all_readable = True
-    for child in node.get_nodes(is_deleted=False):
+    children = node.get_nodes(is_deleted=False)
+    if auth.user:
+        NodePermissionResolver.get_current().resolve([auth.user], [node] + children)
+    for child in children:
         if permission:
             perm = permission.lower().strip()
             if not child.has_permission(auth.user, perm):
@@ -1063,6 +1067,9 @@ def node_child_tree(user, node):
                 .include('contributor__user__guids')
                 )
 
+    children = list(children)
+    NodePermissionResolver.get_current().resolve([user], [node] + children)
+
     nested = defaultdict(list)
     for child in children:
         nested[child.parentnode_id].append(child)
@@ -16,6 +16,7 @@ import six
 from django.apps import apps
 from django.core.paginator import Paginator
 from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
 from django.db.models import Q
 from elasticsearch2 import (ConnectionError, Elasticsearch, NotFoundError,
                            RequestError, TransportError, helpers)
@@ -28,6 +29,7 @@ from osf.models import Institution
 from osf.models import OSFGroup
 from osf.models import QuickFilesNode
 from osf.models import Preprint
+from osf.models import SearchQueueEntry
 from osf.models import SpamStatus
 from addons.wiki.models import WikiPage
 from osf.models import CollectionSubmission
@@ -37,6 +39,10 @@ from website.filters import profile_image_url
 from osf.models.licenses import serialize_node_license_record
 from website.search import exceptions
 from website.search.util import build_query, clean_splitters
+from website.search_migration import (
+    JSON_UPDATE_NODES_SQL, JSON_DELETE_NODES_SQL,
+    JSON_UPDATE_FILES_SQL, JSON_DELETE_FILES_SQL,
+    JSON_UPDATE_USERS_SQL, JSON_DELETE_USERS_SQL)
 from website.views import validate_page_num
 
 logger = logging.getLogger(__name__)
@@ -75,6 +81,24 @@ ENGLISH_ANALYZER_PROPERTY = {'type': 'string', 'analyzer': 'english'}
 
 INDEX = settings.ELASTIC_INDEX
 
+# Fields of nodes and preprints that the search documents of their files depend on. When
+# the saved fields are known, the files of a node or preprint are only reindexed if one of these changed.
+FILE_SEARCH_UPDATE_FIELDS = {
+    'title',
+    'is_public',
+    'is_deleted',
+    'deleted',
+    'archiving',
+    'spam_status',
+    'retraction',
+    'tags',
+    'is_published',
+    'machine_state',
+    'primary_file',
+    'date_withdrawn',
+    'ever_public',
+}
+
 CLIENT = None
 
 
@@ -355,20 +379,20 @@ def get_doctype_from_node(node):
         return node.category
 
 @celery_app.task(bind=True, max_retries=5, default_retry_delay=60)
-def update_node_async(self, node_id, index=None, bulk=False):
+def update_node_async(self, node_id, index=None, bulk=False, saved_fields=None):
     AbstractNode = apps.get_model('osf.AbstractNode')
     node = AbstractNode.load(node_id)
     try:
-        update_node(node=node, index=index, bulk=bulk, async_update=True)
+        update_node(node=node, index=index, bulk=bulk, async_update=True, saved_fields=saved_fields)
     except Exception as exc:
         self.retry(exc=exc)
 
 @celery_app.task(bind=True, max_retries=5, default_retry_delay=60)
-def update_preprint_async(self, preprint_id, index=None, bulk=False):
+def update_preprint_async(self, preprint_id, index=None, bulk=False, saved_fields=None):
     Preprint = apps.get_model('osf.Preprint')
     preprint = Preprint.load(preprint_id)
     try:
-        update_preprint(preprint=preprint, index=index, bulk=bulk, async_update=True)
+        update_preprint(preprint=preprint, index=index, bulk=bulk, async_update=True, saved_fields=saved_fields)
     except Exception as exc:
         self.retry(exc=exc)
 
@@ -439,7 +463,7 @@ def serialize_node(node, category):
         'extra_search_terms': clean_splitters(node.title),
     }
     if not node.is_retracted:
-        for wiki in WikiPage.objects.get_wiki_pages_latest(node):
+        for wiki in WikiPage.objects.get_wiki_pages_latest(node).select_related('wiki_page'):
             # '.' is not allowed in field names in ES2
             elastic_document['wikis'][wiki.wiki_page.page_name.replace('.', ' ')] = wiki.raw_text(node)
 
@@ -516,11 +540,10 @@ def serialize_group(group, category):
     return elastic_document
 
 @requires_search
-def update_node(node, index=None, bulk=False, async_update=False):
-    from addons.osfstorage.models import OsfStorageFile
+def update_node(node, index=None, bulk=False, async_update=False, saved_fields=None):
     index = index or INDEX
-    for file_ in paginated(OsfStorageFile, Q(target_content_type=ContentType.objects.get_for_model(type(node)), target_object_id=node.id)):
-        update_file(file_, index=index)
+    if saved_fields is None or FILE_SEARCH_UPDATE_FIELDS.intersection(saved_fields):
+        update_files(node, index=index)
 
     is_qa_node = bool(set(settings.DO_NOT_INDEX_LIST['tags']).intersection(node.tags.all().values_list('name', flat=True))) or any(substring in node.title for substring in settings.DO_NOT_INDEX_LIST['titles'])
     if node.is_deleted or not node.is_public or node.archiving or node.is_spam or (node.spam_status == SpamStatus.FLAGGED and settings.SPAM_FLAGGED_REMOVE_FROM_SEARCH) or node.is_quickfiles or is_qa_node:
@@ -534,11 +557,10 @@ def update_node(node, index=None, bulk=False, async_update=False):
             client().index(index=index, doc_type=category, id=node._id, body=elastic_document, refresh=True)
 
 @requires_search
-def update_preprint(preprint, index=None, bulk=False, async_update=False):
-    from addons.osfstorage.models import OsfStorageFile
+def update_preprint(preprint, index=None, bulk=False, async_update=False, saved_fields=None):
     index = index or INDEX
-    for file_ in paginated(OsfStorageFile, Q(target_content_type=ContentType.objects.get_for_model(type(preprint)), target_object_id=preprint.id)):
-        update_file(file_, index=index)
+    if saved_fields is None or FILE_SEARCH_UPDATE_FIELDS.intersection(saved_fields):
+        update_files(preprint, index=index)
 
     is_qa_preprint = bool(set(settings.DO_NOT_INDEX_LIST['tags']).intersection(preprint.tags.all().values_list('name', flat=True))) or any(substring in preprint.title for substring in settings.DO_NOT_INDEX_LIST['titles'])
     if not preprint.verified_publishable or preprint.is_spam or (preprint.spam_status == SpamStatus.FLAGGED and settings.SPAM_FLAGGED_REMOVE_FROM_SEARCH) or is_qa_preprint:
@@ -720,39 +742,35 @@ def update_user(user, index=None):
 
     client().index(index=index, doc_type='user', body=user_doc, id=user._id, refresh=True)
 
-@requires_search
-def update_file(file_, index=None, delete=False):
-    index = index or INDEX
-    target = file_.target
+def files_hidden_from_search(target):
+    """Whether none of the files of ``target``, a node or preprint, should be searchable"""
+    target_is_qa = bool(
+        set(settings.DO_NOT_INDEX_LIST['tags']).intersection(target.tags.all().values_list('name', flat=True))
+    ) or any(substring in target.title for substring in settings.DO_NOT_INDEX_LIST['titles'])
+    return not target.is_public or target_is_qa or getattr(target, 'is_deleted', False) or getattr(target, 'archiving', False) or target.is_spam or (
+        target.spam_status == SpamStatus.FLAGGED and settings.SPAM_FLAGGED_REMOVE_FROM_SEARCH)
+
+def serialize_file(file_, target=None, hidden=None):
+    """Return the search document of ``file_``, or None if it should not be searchable.
+
+    :param target: The target of ``file_``, if already loaded
+    :param hidden: The result of `files_hidden_from_search` for the target, if already known
+    """
+    target = target or file_.target
+    if hidden is None:
+        hidden = files_hidden_from_search(target)
 
     # TODO: Can remove 'not file_.name' if we remove all base file nodes with name=None
     file_node_is_qa = bool(
         set(settings.DO_NOT_INDEX_LIST['tags']).intersection(file_.tags.all().values_list('name', flat=True))
-    ) or bool(
-        set(settings.DO_NOT_INDEX_LIST['tags']).intersection(target.tags.all().values_list('name', flat=True))
-    ) or any(substring in target.title for substring in settings.DO_NOT_INDEX_LIST['titles'])
-    if not file_.name or not target.is_public or delete or file_node_is_qa or getattr(target, 'is_deleted', False) or getattr(target, 'archiving', False) or target.is_spam or (
-            target.spam_status == SpamStatus.FLAGGED and settings.SPAM_FLAGGED_REMOVE_FROM_SEARCH):
-        client().delete(
-            index=index,
-            doc_type='file',
-            id=file_._id,
-            refresh=True,
-            ignore=[404]
-        )
-        return
+    )
+    if not file_.name or hidden or file_node_is_qa:
+        return None
 
     if isinstance(target, Preprint):
         if not getattr(target, 'verified_publishable', False) or target.primary_file != file_ or target.is_spam or (
                 target.spam_status == SpamStatus.FLAGGED and settings.SPAM_FLAGGED_REMOVE_FROM_SEARCH):
-            client().delete(
-                index=index,
-                doc_type='file',
-                id=file_._id,
-                refresh=True,
-                ignore=[404]
-            )
-            return
+            return None
 
     # We build URLs manually here so that this function can be
     # run outside of a Flask request context (e.g. in a celery task)
@@ -772,7 +790,7 @@ def update_file(file_, index=None, delete=False):
         guid_url = '/{file_guid}/'.format(file_guid=file_guid._id)
     # File URL's not provided for preprint files, because the File Detail Page will
     # just reroute to preprints detail
-    file_doc = {
+    return {
         'id': file_._id,
         'deep_url': None if isinstance(target, Preprint) else file_deep_url,
         'guid_url': None if isinstance(target, Preprint) else guid_url,
@@ -787,6 +805,20 @@ def update_file(file_, index=None, delete=False):
         'extra_search_terms': clean_splitters(file_.name),
     }
 
+@requires_search
+def update_file(file_, index=None, delete=False):
+    index = index or INDEX
+    file_doc = None if delete else serialize_file(file_)
+    if file_doc is None:
+        client().delete(
+            index=index,
+            doc_type='file',
+            id=file_._id,
+            refresh=True,
+            ignore=[404]
+        )
+        return
+
     client().index(
         index=index,
         doc_type='file',
@@ -795,6 +827,121 @@ def update_file(file_, index=None, delete=False):
         refresh=True
     )
 
+@requires_search
+def update_files(target, index=None):
+    """Reindex, or remove from the index, all the osfstorage files of ``target``, a node
+    or preprint, with bulk requests.
+    """
+    from addons.osfstorage.models import OsfStorageFile
+    index = index or INDEX
+    hidden = files_hidden_from_search(target)
+
+    def actions():
+        files = paginated(
+            OsfStorageFile,
+            Q(target_content_type=ContentType.objects.get_for_model(type(target)), target_object_id=target.id),
+            increment=settings.ELASTIC_BULK_CHUNK_SIZE,
+        )
+        for file_ in files:
+            file_doc = serialize_file(file_, target=target, hidden=hidden)
+            if file_doc is None:
+                yield {'_op_type': 'delete', '_index': index, '_type': 'file', '_id': file_._id}
+            else:
+                yield {'_op_type': 'index', '_index': index, '_type': 'file', '_id': file_._id, '_source': file_doc}
+
+    bulk_update(actions())
+
+def bulk_update(actions):
+    """Send ``actions`` with bulk requests. Deleting a document that is not indexed is reported as
+    an error and ignored, any other failed action, e.g. one rejected by an overloaded cluster,
+    raises a BulkUpdateError once every chunk was sent.
+    """
+    _, errors = helpers.bulk(
+        client(), actions, chunk_size=settings.ELASTIC_BULK_CHUNK_SIZE,
+        refresh=settings.ELASTIC_BULK_REFRESH, raise_on_error=False,
+    )
+    errors = [
+        error for error in errors
+        if not (error.get('delete') and error['delete'].get('status') == 404)
+    ]
+    if errors:
+        logger.error('{} search documents failed to index: {}'.format(len(errors), errors[:10]))
+        raise exceptions.BulkUpdateError(errors)
+
+def sql_bulk_update(statements, id_filter, index):
+    """Index or delete the documents of the objects selected by ``id_filter``, serialized by
+    ``statements`` from `website.search_migration`, with bulk requests.
+    """
+    actions = []
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql.format(
+                index=index,
+                id_filter=id_filter,
+                spam_flagged_removed_from_search=settings.SPAM_FLAGGED_REMOVE_FROM_SEARCH,
+            ))
+            actions.extend(cursor.fetchone()[0] or [])
+    bulk_update(actions)
+
+def ids_filter(column, ids):
+    # Ids are integers from the queue, safe to format into the statement
+    return '{} = ANY(ARRAY[{}]::integer[])'.format(column, ', '.join(str(int(id_)) for id_ in ids))
+
+def index_queued_nodes(node_ids, index):
+    sql_bulk_update((JSON_UPDATE_NODES_SQL, JSON_DELETE_NODES_SQL), ids_filter('id', node_ids), index)
+
+def index_queued_node_files(node_ids, index):
+    id_filter = '{} AND type = \'osf.osfstoragefile\''.format(ids_filter('target_object_id', node_ids))
+    sql_bulk_update((JSON_UPDATE_FILES_SQL, JSON_DELETE_FILES_SQL), id_filter, index)
+
+def index_queued_users(user_ids, index):
+    sql_bulk_update((JSON_UPDATE_USERS_SQL, JSON_DELETE_USERS_SQL), ids_filter('id', user_ids), index)
+    # As in update_user, the quickfiles of users confirmed as spam are removed from search
+    spam_quickfile_ids = QuickFilesNode.objects.filter(
+        creator_id__in=user_ids, creator__is_active=False, creator__spam_status=SpamStatus.SPAM,
+    ).exclude(files=None).values_list('files___id', flat=True)
+    bulk_update(
+        {'_op_type': 'delete', '_index': index, '_type': 'file', '_id': file_id}
+        for file_id in spam_quickfile_ids.iterator()
+    )
+
+def index_queued_preprints(preprint_ids, index):
+    # Preprints are not serialized in SQL yet
+    Preprint.bulk_update_search(Preprint.objects.filter(id__in=preprint_ids), index=index)
+
+def index_queued_groups(group_ids, index):
+    OSFGroup.bulk_update_search(OSFGroup.objects.filter(id__in=group_ids), index=index)
+
+QUEUE_INDEXERS = {
+    SearchQueueEntry.NODE: index_queued_nodes,
+    SearchQueueEntry.NODE_FILES: index_queued_node_files,
+    SearchQueueEntry.USER: index_queued_users,
+    SearchQueueEntry.PREPRINT: index_queued_preprints,
+    SearchQueueEntry.GROUP: index_queued_groups,
+}
+
+@celery_app.task(ignore_results=True)
+def drain_search_queue(index=None):
+    """Index the objects queued by `website.search.search` for at least SEARCH_QUEUE_DELAY
+    seconds, SEARCH_QUEUE_BATCH_SIZE at a time. Each batch is indexed in its own transaction,
+    so that it stays queued if indexing any of its documents fails.
+    """
+    index = index or INDEX
+    total = 0
+    while True:
+        with transaction.atomic():
+            entries = SearchQueueEntry.pop(settings.SEARCH_QUEUE_DELAY, settings.SEARCH_QUEUE_BATCH_SIZE)
+            if not entries:
+                break
+            queued = {}
+            for doc_type, object_id in entries:
+                queued.setdefault(doc_type, []).append(object_id)
+            for doc_type, object_ids in queued.items():
+                QUEUE_INDEXERS[doc_type](object_ids, index)
+        total += len(entries)
+    logger.info('Indexed {} queued objects'.format(total))
+    return total
+
 @requires_search
 def update_institution(institution, index=None):
     index = index or INDEX
@@ -986,21 +1133,33 @@ def search_contributor(query, page=0, size=10, exclude=None, current_user=None):
     pages = math.ceil(results['counts'].get('user', 0) / size)
     validate_page_num(page, pages)
 
+    # Load the users of the page, and count the projects they share with the current user, at once
+    users_by_id = {
+        guid._id: user
+        for user in OSFUser.objects.filter(guids___id__in=[doc['id'] for doc in docs])
+        for guid in user.guids.all()
+    }
+    if current_user:
+        n_projects_in_common_by_user = current_user.n_projects_in_common_by_user(
+            [user for user in users_by_id.values() if user.id != current_user.id]
+        )
+
     users = []
     for doc in docs:
         # TODO: use utils.serialize_user
-        user = OSFUser.load(doc['id'])
+        user = users_by_id.get(doc['id'])
+
+        if user is None:
+            logger.error('Could not load user {0}'.format(doc['id']))
+            continue
 
         if current_user and current_user._id == user._id:
             n_projects_in_common = -1
         elif current_user:
-            n_projects_in_common = current_user.n_projects_in_common(user)
+            n_projects_in_common = n_projects_in_common_by_user.get(user.id, 0)
         else:
             n_projects_in_common = 0
 
-        if user is None:
-            logger.error('Could not load user {0}'.format(doc['id']))
-            continue
         if user.is_active:  # exclude merged, unregistered, etc.
             current_employment = None
             education = None
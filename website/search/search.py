@@ -18,6 +18,14 @@ def requires_search(func):
             return func(*args, **kwargs)
     return wrapped
 
+def use_search_queue():
+    # The queue is drained by a periodic task, only run when celery is
+    return settings.USE_SEARCH_QUEUE and settings.USE_CELERY
+
+def enqueue(doc_type, object_id):
+    from osf.models import SearchQueueEntry
+    SearchQueueEntry.enqueue(doc_type, [object_id])
+
 
 @requires_search
 def search(query, index=None, doc_type=None, raw=None):
@@ -28,9 +36,15 @@ def search(query, index=None, doc_type=None, raw=None):
 def update_node(node, index=None, bulk=False, async_update=True, saved_fields=None):
     kwargs = {
         'index': index,
-        'bulk': bulk
+        'bulk': bulk,
+        'saved_fields': list(saved_fields) if saved_fields is not None else None,
     }
-    if async_update:
+    if async_update and use_search_queue():
+        # Queued in the current transaction, indexed once it is committed
+        enqueue('node', node.id)
+        if saved_fields is None or search_engine.FILE_SEARCH_UPDATE_FIELDS.intersection(saved_fields):
+            enqueue('node_files', node.id)
+    elif async_update:
         node_id = node._id
         # We need the transaction to be committed before trying to run celery tasks.
         # For example, when updating a Node's privacy, is_public must be True in the
@@ -48,9 +62,12 @@ def update_node(node, index=None, bulk=False, async_update=True, saved_fields=No
 def update_preprint(preprint, index=None, bulk=False, async_update=True, saved_fields=None):
     kwargs = {
         'index': index,
-        'bulk': bulk
+        'bulk': bulk,
+        'saved_fields': list(saved_fields) if saved_fields is not None else None,
     }
-    if async_update:
+    if async_update and use_search_queue():
+        enqueue('preprint', preprint.id)
+    elif async_update:
         preprint_id = preprint._id
         # We need the transaction to be committed before trying to run celery tasks.
         if settings.USE_CELERY:
@@ -68,7 +85,9 @@ def update_group(group, index=None, bulk=False, async_update=True, saved_fields=
         'bulk': bulk,
         'deleted_id': deleted_id
     }
-    if async_update:
+    if async_update and use_search_queue() and not deleted_id:
+        enqueue('group', group.id)
+    elif async_update:
         # We need the transaction to be committed before trying to run celery tasks.
         if settings.USE_CELERY:
             enqueue_task(search_engine.update_group_async.s(group_id=group._id, **kwargs))
@@ -102,7 +121,9 @@ def update_contributors_async(user_id):
 @requires_search
 def update_user(user, index=None, async_update=True):
     index = index or settings.ELASTIC_INDEX
-    if async_update:
+    if async_update and use_search_queue():
+        enqueue('user', user.id)
+    elif async_update:
         user_id = user.id
         if settings.USE_CELERY:
             enqueue_task(search_engine.update_user_async.s(user_id, index=index))
@@ -1,3 +1,5 @@
+# Each statement serializes the objects selected by {id_filter}, a condition on the id of the
+# objects (or of the target of files), into a JSON array of bulk actions.
 JSON_UPDATE_NODES_SQL = """
 SELECT json_agg(
     json_build_object(
@@ -304,8 +306,7 @@ WHERE (TYPE = 'osf.node' OR TYPE = 'osf.registration')
             FROM osf_archivejob AJ
             WHERE (AJ.status != 'FAILURE' AND AJ.status != 'SUCCESS'
                    AND AJ.dst_node_id IS NOT NULL)))
-  AND id > {page_start}
-  AND id <= {page_end}
+  AND {id_filter}
 LIMIT 1;
 """
 
@@ -459,8 +460,7 @@ WHERE name IS NOT NULL
                                                 AND AJ.dst_node_id IS NOT NULL)))
                         )
       AND target_content_type_id = (SELECT id FROM "django_content_type" WHERE ("django_content_type"."model" = 'abstractnode' AND "django_content_type"."app_label" = 'osf'))
-      AND id > {page_start}
-      AND id <= {page_end}
+      AND {id_filter}
 LIMIT 1;
 """
 
@@ -587,8 +587,7 @@ FROM osf_osfuser AS U
             LIMIT 1
             ) USER_GUID ON TRUE
 WHERE is_active = TRUE
-      AND id > {page_start}
-      AND id <= {page_end}
+      AND {id_filter}
 LIMIT 1;
 """
 
@@ -644,8 +643,7 @@ WHERE NOT ((TYPE = 'osf.node' OR TYPE = 'osf.registration' OR TYPE = 'osf.quickf
                WHERE (AJ.status != 'FAILURE' AND AJ.status != 'SUCCESS'
                    AND AJ.dst_node_id IS NOT NULL)))
   )
-  AND id > {page_start}
-  AND id <= {page_end}
+  AND {id_filter}
 LIMIT 1;
 """
 
@@ -682,8 +680,7 @@ WHERE NOT (name IS NOT NULL
                         )
       )
       AND target_content_type_id = (SELECT id FROM "django_content_type" WHERE ("django_content_type"."model" = 'abstractnode' AND "django_content_type"."app_label" = 'osf'))
-      AND id > {page_start}
-      AND id <= {page_end}
+      AND {id_filter}
 LIMIT 1;
 """
 
@@ -707,7 +704,6 @@ FROM osf_osfuser AS U
             LIMIT 1
             ) USER_GUID ON TRUE
 WHERE is_active != TRUE
-  AND id > {page_start}
-  AND id <= {page_end}
+  AND {id_filter}
 LIMIT 1;
 """
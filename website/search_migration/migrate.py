@@ -2,22 +2,24 @@
 # -*- coding: utf-8 -*-
 """Migration script for Search-enabled Models."""
 from __future__ import absolute_import
-from math import ceil
 import functools
 import logging
+import multiprocessing
+import time
 
-from django.db import connection
+from django.db import connection, connections
 from django.core.paginator import Paginator
 from elasticsearch2 import helpers
 
 import website.search.search as search
+from website.search import elastic_search
 from website.search.elastic_search import client
 from website.search_migration import (
     JSON_UPDATE_NODES_SQL, JSON_DELETE_NODES_SQL,
     JSON_UPDATE_FILES_SQL, JSON_DELETE_FILES_SQL,
     JSON_UPDATE_USERS_SQL, JSON_DELETE_USERS_SQL)
 from scripts import utils as script_utils
-from osf.models import OSFUser, Institution, AbstractNode, BaseFileNode, Preprint, OSFGroup, CollectionSubmission
+from osf.models import OSFUser, Institution, AbstractNode, BaseFileNode, Preprint, OSFGroup, CollectionSubmission, SearchReindexCheckpoint
 from website import settings
 from website.app import init_app
 from website.search.elastic_search import client as es_client
@@ -27,49 +29,88 @@ from website.search.search import update_institution, bulk_update_collected_meta
 
 logger = logging.getLogger(__name__)
 
-def sql_migrate(index, sql, max_id, increment, es_args=None, **kwargs):
+def sql_migrate(index, sql, max_id, increment, es_args=None, name=None, workers=1, **kwargs):
     """ Run provided SQL and send output to elastic.
 
+    Pages of ``increment`` ids are migrated by ``workers`` processes. When ``name`` is given,
+    migrated pages are checkpointed and skipped when migrating ``name`` to the same index
+    again, so that an interrupted migration can be resumed.
+
     :param str index: Elastic index to update (formatted into `sql`)
     :param str sql: SQL to format and run. See __init__.py in this module
     :param int max_id: Last known object id. Indicates when to stop paging
     :param int increment: Page size
-    :param  dict es_args:  Dict or None, to pass to `helpers.bulk`
+    :param  dict es_args:  Dict or None, to pass to `helpers.streaming_bulk`
+    :param str name: What is migrated, e.g. 'nodes'. Used to checkpoint pages and in logs
+    :param int workers: Number of processes migrating pages in parallel
     :kwargs: Additional format arguments for `sql` arg
 
     :return int: Number of migrated objects
     """
-    if es_args is None:
-        es_args = {}
-    total_pages = int(ceil(max_id / float(increment)))
+    es_args = dict({'chunk_size': settings.ELASTIC_BULK_CHUNK_SIZE}, **(es_args or {}))
+    # An extra page is included to cover the edge case where:
+    #       max_id == (total_pages * increment) - 1
+    # and two additional objects are created during runtime.
+    pages = [(page_start, page_start + increment) for page_start in range(0, max_id + increment + 1, increment)]
+    total_pages = len(pages)
+    if name:
+        migrated = set(SearchReindexCheckpoint.objects.filter(index=index, name=name).values_list('page_start', flat=True))
+        pages = [page for page in pages if page[0] not in migrated]
+        if len(pages) < total_pages:
+            logger.info('Resuming {}, {} / {} pages already migrated'.format(name, total_pages - len(pages), total_pages))
+
+    tasks = [(index, sql, page_start, page_end, es_args, name, kwargs) for page_start, page_end in pages]
     total_objs = 0
-    page_start = 0
-    page_end = 0
-    page = 0
-    while page_end <= (max_id + increment):
-        page += 1
-        page_end += increment
-        if page <= total_pages:
-            logger.info('Updating page {} / {}'.format(page_end / increment, total_pages))
-        else:
-            # An extra page is included to cover the edge case where:
-            #       max_id == (total_pages * increment) - 1
-            # and two additional objects are created during runtime.
-            logger.info('Cleaning up...')
-        with connection.cursor() as cursor:
-            cursor.execute(sql.format(
-                index=index,
-                page_start=page_start,
-                page_end=page_end,
-                **kwargs))
-            ser_objs = cursor.fetchone()[0]
-            if ser_objs:
-                total_objs += len(ser_objs)
-                helpers.bulk(client(), ser_objs, **es_args)
-        page_start = page_end
+    started = time.time()
+    if workers > 1:
+        # Worker processes cannot share the database connection
+        connections.close_all()
+        pool = _get_pool(workers)
+        try:
+            results = pool.imap_unordered(_migrate_page, tasks)
+            for page, count in enumerate(results, total_pages - len(pages) + 1):
+                total_objs += count
+                logger.info('Updated page {} / {}'.format(page, total_pages))
+        finally:
+            pool.terminate()
+            pool.join()
+    else:
+        for page, task in enumerate(tasks, total_pages - len(pages) + 1):
+            logger.info('Updating page {} / {}'.format(page, total_pages))
+            total_objs += _migrate_page(task)
+
+    elapsed = time.time() - started
+    logger.info('{} {} documents sent in {:.0f}s ({:.0f} docs/s)'.format(
+        total_objs, name or index, elapsed, total_objs / elapsed if elapsed else 0))
     return total_objs
 
-def migrate_nodes(index, delete, increment=10000):
+def _get_pool(workers):
+    return multiprocessing.Pool(workers, initializer=_init_worker)
+
+def _init_worker():
+    # Each worker process opens its own database connection and elastic client
+    connections.close_all()
+    elastic_search.CLIENT = None
+
+def _migrate_page(task):
+    """Serialize one page of objects and send it to elastic, see `sql_migrate`"""
+    index, sql, page_start, page_end, es_args, name, kwargs = task
+    with connection.cursor() as cursor:
+        cursor.execute(sql.format(
+            index=index,
+            id_filter='id > {} AND id <= {}'.format(page_start, page_end),
+            **kwargs))
+        ser_objs = cursor.fetchone()[0] or []
+    # streaming_bulk only sends a chunk once elastic has handled the previous one
+    for _ in helpers.streaming_bulk(client(), ser_objs, **es_args):
+        pass
+    if name:
+        SearchReindexCheckpoint.objects.create(
+            index=index, name=name, page_start=page_start, page_end=page_end, documents=len(ser_objs)
+        )
+    return len(ser_objs)
+
+def migrate_nodes(index, delete, increment=10000, workers=1):
     logger.info('Migrating nodes to index: {}'.format(index))
     max_nid = AbstractNode.objects.last().id
     total_nodes = sql_migrate(
@@ -77,6 +118,8 @@ def migrate_nodes(index, delete, increment=10000):
         JSON_UPDATE_NODES_SQL,
         max_nid,
         increment,
+        name='nodes',
+        workers=workers,
         spam_flagged_removed_from_search=settings.SPAM_FLAGGED_REMOVE_FROM_SEARCH)
     logger.info('{} nodes migrated'.format(total_nodes))
     if delete:
@@ -88,6 +131,8 @@ def migrate_nodes(index, delete, increment=10000):
             max_nid,
             increment,
             es_args={'raise_on_error': False},  # ignore 404s
+            name='deleted_nodes',
+            workers=workers,
             spam_flagged_removed_from_search=settings.SPAM_FLAGGED_REMOVE_FROM_SEARCH)
         logger.info('{} nodes marked deleted'.format(total_nodes))
 
@@ -119,7 +164,7 @@ def migrate_groups(index, delete):
         logger.info('Updating page {} / {}'.format(page_number, paginator.num_pages))
         OSFGroup.bulk_update_search(paginator.page(page_number).object_list, index=index)
 
-def migrate_files(index, delete, increment=10000):
+def migrate_files(index, delete, increment=10000, workers=1):
     logger.info('Migrating files to index: {}'.format(index))
     max_fid = BaseFileNode.objects.last().id
     total_files = sql_migrate(
@@ -127,6 +172,8 @@ def migrate_files(index, delete, increment=10000):
         JSON_UPDATE_FILES_SQL,
         max_fid,
         increment,
+        name='files',
+        workers=workers,
         spam_flagged_removed_from_search=settings.SPAM_FLAGGED_REMOVE_FROM_SEARCH)
     logger.info('{} files migrated'.format(total_files))
     if delete:
@@ -138,17 +185,21 @@ def migrate_files(index, delete, increment=10000):
             max_fid,
             increment,
             es_args={'raise_on_error': False},  # ignore 404s
+            name='deleted_files',
+            workers=workers,
             spam_flagged_removed_from_search=settings.SPAM_FLAGGED_REMOVE_FROM_SEARCH)
         logger.info('{} files marked deleted'.format(total_files))
 
-def migrate_users(index, delete, increment=10000):
+def migrate_users(index, delete, increment=10000, workers=1):
     logger.info('Migrating users to index: {}'.format(index))
     max_uid = OSFUser.objects.last().id
     total_users = sql_migrate(
         index,
         JSON_UPDATE_USERS_SQL,
         max_uid,
-        increment)
+        increment,
+        name='users',
+        workers=workers)
     logger.info('{} users migrated'.format(total_users))
     if delete:
         logger.info('Preparing to delete old user documents')
@@ -158,7 +209,9 @@ def migrate_users(index, delete, increment=10000):
             JSON_DELETE_USERS_SQL,
             max_uid,
             increment,
-            es_args={'raise_on_error': False})  # ignore 404s
+            es_args={'raise_on_error': False},  # ignore 404s
+            name='deleted_users',
+            workers=workers)
         logger.info('{} users marked deleted'.format(total_users))
 
 def migrate_collected_metadata(index, delete):
@@ -190,13 +243,16 @@ def migrate_institutions(index):
     for inst in Institution.objects.filter(is_deleted=False):
         update_institution(inst, index)
 
-def migrate(delete, remove=False, index=None, app=None):
+def migrate(delete, remove=False, index=None, app=None, workers=1, resume_index=None):
     """Reindexes relevant documents in ES
 
     :param bool delete: Delete documents that should not be indexed
     :param bool remove: Removes old index after migrating
     :param str index: index alias to version and migrate
     :param App app: Flask app for context
+    :param int workers: Number of processes migrating nodes, files and users
+    :param str resume_index: Versioned index of an interrupted migration to resume, e.g. website_v3.
+        Pages of nodes, files and users it already migrated are skipped.
     """
     index = index or settings.ELASTIC_INDEX
     app = app or init_app('website.settings', set_backends=True, routes=True)
@@ -208,19 +264,24 @@ def migrate(delete, remove=False, index=None, app=None):
     ctx = app.test_request_context()
     ctx.push()
 
-    new_index = set_up_index(index)
+    if resume_index:
+        logger.info('Resuming migration to {}'.format(resume_index))
+        new_index = resume_index
+    else:
+        new_index = set_up_index(index)
 
     if settings.ENABLE_INSTITUTIONS:
         migrate_institutions(new_index)
-    migrate_nodes(new_index, delete=delete)
-    migrate_files(new_index, delete=delete)
-    migrate_users(new_index, delete=delete)
+    migrate_nodes(new_index, delete=delete, workers=workers)
+    migrate_files(new_index, delete=delete, workers=workers)
+    migrate_users(new_index, delete=delete, workers=workers)
     migrate_preprints(new_index, delete=delete)
     migrate_preprint_files(new_index, delete=delete)
     migrate_collected_metadata(new_index, delete=delete)
     migrate_groups(new_index, delete=delete)
 
     set_up_alias(index, new_index)
+    SearchReindexCheckpoint.objects.filter(index=new_index).delete()
 
     if remove:
         remove_old_index(new_index)
@@ -114,6 +114,17 @@ ELASTIC_KWARGS = {
     # 'client_cert': None,
     # 'client_key': None
 }
+# Number of documents sent per bulk request, e.g. when reindexing the files of a node
+ELASTIC_BULK_CHUNK_SIZE = 500
+# Whether bulk requests refresh the index, making documents searchable right away. Slow, only
+# meant for tests that search what they just indexed.
+ELASTIC_BULK_REFRESH = False
+# Queue asynchronous search updates, to be indexed in bulk by drain_search_queue. Updates of an
+# object queued within SEARCH_QUEUE_DELAY seconds of each other are indexed once.
+USE_SEARCH_QUEUE = True
+SEARCH_QUEUE_DELAY = 30
+# Number of queued objects indexed per transaction
+SEARCH_QUEUE_BATCH_SIZE = 5000
 
 # Sessions
 COOKIE_NAME = 'osf'
@@ -356,10 +367,18 @@ SHARE_URL = 'https://share.osf.io/'
 SHARE_API_TOKEN = None  # Required to send project updates to SHARE
 
 CAS_SERVER_URL = 'http://localhost:8080'
+# Per-process cache of CAS profile responses for OAuth2 bearer tokens. Revocations through
+# CasClient.revoke_tokens are recorded in the database, which every process checks on cache hits.
+CAS_TOKEN_CACHE_MAX_SIZE = 10000
+CAS_TOKEN_CACHE_TTL = 60  # seconds
+CAS_TOKEN_CACHE_NEGATIVE_TTL = 10  # seconds, for tokens CAS rejected
 MFR_SERVER_URL = 'http://localhost:7778'
 
 ###### ARCHIVER ###########
 ARCHIVE_PROVIDER = 'osfstorage'
+# Archive OSF Storage to OSF Storage by copying the file tree in the database, sharing the stored
+# contents of the files, rather than through WaterButler
+ARCHIVE_OSFSTORAGE_NATIVELY = True
 
 MAX_ARCHIVE_SIZE = 5 * 1024 ** 3  # == math.pow(1024, 3) == 1 GB
 
@@ -413,7 +432,8 @@ class CeleryConfig:
         'osf.management.commands.migrate_deleted_date',
         'osf.management.commands.addon_deleted_date',
         'osf.management.commands.migrate_registration_responses',
-        'osf.management.commands.update_institution_project_counts'
+        'osf.management.commands.update_institution_project_counts',
+        'osf.management.commands.delete_expired_throttle_counters',
     }
 
     med_pri_modules = {
@@ -471,6 +491,7 @@ class CeleryConfig:
     # Modules to import when celery launches
     imports = (
         'framework.celery_tasks',
+        'framework.analytics.tasks',
         'framework.email.tasks',
         'osf.external.tasks',
         'osf.management.commands.data_storage_usage',
@@ -500,6 +521,7 @@ class CeleryConfig:
         'osf.management.commands.check_crossref_dois',
         'osf.management.commands.update_institution_project_counts',
         'osf.management.commands.correct_registration_moderation_states',
+        'osf.management.commands.delete_expired_throttle_counters',
     )
 
     # Modules that need metrics and release requirements
@@ -519,6 +541,14 @@ class CeleryConfig:
         #  Setting up a scheduler, essentially replaces an independent cron job
         # Note: these times must be in UTC
         beat_schedule = {
+            'flush_page_counters': {
+                'task': 'framework.analytics.tasks.flush_page_counters',
+                'schedule': crontab(minute='*'),  # Every minute
+            },
+            'drain_search_queue': {
+                'task': 'website.search.elastic_search.drain_search_queue',
+                'schedule': crontab(minute='*'),  # Every minute
+            },
             '5-minute-emails': {
                 'task': 'website.notifications.tasks.send_users_email',
                 'schedule': crontab(minute='*/5'),
@@ -641,6 +671,10 @@ class CeleryConfig:
                 'task': 'management.commands.update_institution_project_counts',
                 'schedule': crontab(minute=0, hour=9), # Daily 05:00 a.m. EDT
             },
+            'delete_expired_throttle_counters': {
+                'task': 'management.commands.delete_expired_throttle_counters',
+                'schedule': crontab(minute=15),  # Hourly
+            },
         }
 
         # Tasks that need metrics and release requirements